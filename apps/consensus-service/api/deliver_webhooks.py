@@ -0,0 +1,230 @@
+import logging
+from http.server import BaseHTTPRequestHandler
+import os
+import sys
+import time
+import asyncio
+import pg8000
+from urllib.parse import urlparse, parse_qs
+import json
+
+# Handle imports for both direct execution and package import
+try:
+    from .webhook_utils import WebhookDispatcher, backoff_delay
+except (ImportError, ValueError):
+    from webhook_utils import WebhookDispatcher, backoff_delay
+
+VERSION = "1.0.0"
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+logger = logging.getLogger(__name__)
+
+# Outbox rows claimed and sent concurrently per batch
+BATCH_SIZE = int(os.getenv("WEBHOOK_OUTBOX_BATCH_SIZE", "20"))
+
+# Deliveries per outbox row before it is marked FAILED
+MAX_ATTEMPTS = int(os.getenv("WEBHOOK_OUTBOX_MAX_ATTEMPTS", "8"))
+
+# Retry delays grow exponentially (with jitter) from 30 seconds up to an hour
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+# Seconds the platform lets a run take (maxDuration in vercel.json)
+MAX_DURATION_SECONDS = float(os.getenv("WEBHOOK_MAX_DURATION_SECONDS", "60"))
+
+# Stop claiming new batches after this long, leaving time for the last batch's
+# requests (each capped by the dispatcher's timeout) to finish
+TIME_BUDGET_SECONDS = max(1.0, MAX_DURATION_SECONDS - 15)
+
+# Claimed rows are SENDING until their outcome is recorded; if a run dies
+# mid-send, the rows become due again once this lease has expired
+CLAIM_LEASE_SECONDS = 120
+
+def create_connection():
+    url = urlparse(os.getenv("DATABASE_URL"))
+    conn = pg8000.connect(
+        user=url.username,
+        password=url.password,
+        host=url.hostname,
+        port=url.port or 5432,
+        database=url.path[1:]
+    )
+    return conn
+
+def claim_batch(cursor, batch_size):
+    """
+    Claim up to batch_size due rows: PENDING rows whose nextAttemptAt has
+    passed, and SENDING rows whose lease has expired. Claimed rows are marked
+    SENDING with a lease in nextAttemptAt, in a short transaction the caller
+    commits before sending, so no row locks are held during the HTTP requests
+    and overlapping runs never send a row twice.
+    
+    The attempt is counted when the row is claimed, so rows whose runs keep
+    dying mid-send still run out of attempts: expired claims that already used
+    MAX_ATTEMPTS are marked FAILED instead of being claimed again.
+    """
+    cursor.execute("""
+        UPDATE "WebhookOutbox"
+        SET "status" = 'FAILED',
+            "lastError" = 'Delivery run ended before recording an outcome',
+            "updatedAt" = NOW()
+        WHERE "status" = 'SENDING' AND "nextAttemptAt" <= NOW() AND "attempts" >= %s;
+    """, (MAX_ATTEMPTS,))
+    cursor.execute("""
+        UPDATE "WebhookOutbox" o
+        SET "status" = 'SENDING',
+            "attempts" = o."attempts" + 1,
+            "nextAttemptAt" = NOW() + make_interval(secs => %s),
+            "updatedAt" = NOW()
+        FROM (
+            SELECT uid
+            FROM "WebhookOutbox"
+            WHERE "status" IN ('PENDING', 'SENDING') AND "nextAttemptAt" <= NOW()
+            ORDER BY "nextAttemptAt"
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        ) due
+        WHERE o.uid = due.uid
+        RETURNING o.uid, o."communityModelId", o."pollId", o."attempts";
+    """, (float(CLAIM_LEASE_SECONDS), batch_size))
+    return cursor.fetchall()
+
+def record_delivery(cursor, uid):
+    cursor.execute("""
+        UPDATE "WebhookOutbox"
+        SET "status" = 'DELIVERED',
+            "deliveredAt" = NOW(),
+            "lastError" = NULL,
+            "updatedAt" = NOW()
+        WHERE uid = %s;
+    """, (uid,))
+
+def record_failure(cursor, uid, attempts, error, retryable):
+    """
+    Schedule the next attempt with backoff, or give up. attempts already
+    counts this one (see claim_batch). Returns the new status.
+    """
+    if retryable and attempts < MAX_ATTEMPTS:
+        status = 'PENDING'
+        delay = RETRY_BASE_SECONDS + backoff_delay(attempts - 1, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS)
+    else:
+        status = 'FAILED'
+        delay = 0
+    cursor.execute("""
+        UPDATE "WebhookOutbox"
+        SET "status" = %s,
+            "lastError" = %s,
+            "nextAttemptAt" = NOW() + make_interval(secs => %s),
+            "updatedAt" = NOW()
+        WHERE uid = %s;
+    """, (status, error, float(delay), uid))
+    return status
+
+async def drain_outbox(conn, dispatcher, batch_size=BATCH_SIZE, max_batches=None, time_budget=TIME_BUDGET_SECONDS):
+    """
+    Deliver due outbox rows batch by batch until none are left, max_batches
+    is reached or the time budget is spent. Each batch is sent concurrently
+    and its outcome committed before the next batch is claimed.
+    """
+    deadline = time.monotonic() + time_budget
+    counts = {'claimed': 0, 'delivered': 0, 'retrying': 0, 'failed': 0, 'batches': 0}
+    cursor = conn.cursor()
+
+    while max_batches is None or counts['batches'] < max_batches:
+        if time.monotonic() >= deadline:
+            logger.info("Time budget spent, leaving remaining webhooks for the next run")
+            break
+
+        rows = claim_batch(cursor, batch_size)
+        conn.commit()
+        if not rows:
+            break
+
+        metrics = await asyncio.gather(*(
+            dispatcher.send_once(model_id, poll_id, attempts - 1)
+            for _, model_id, poll_id, attempts in rows
+        ))
+
+        for (uid, _, _, attempts), metric in zip(rows, metrics):
+            if metric['delivered']:
+                record_delivery(cursor, uid)
+                counts['delivered'] += 1
+            elif record_failure(cursor, uid, attempts, metric['error'], metric['retryable']) == 'PENDING':
+                counts['retrying'] += 1
+            else:
+                counts['failed'] += 1
+        conn.commit()
+
+        counts['claimed'] += len(rows)
+        counts['batches'] += 1
+
+    cursor.close()
+    return counts
+
+async def deliver(batch_size, max_batches):
+    conn = create_connection()
+    try:
+        async with WebhookDispatcher(max_concurrency=batch_size) as dispatcher:
+            counts = await drain_outbox(conn, dispatcher, batch_size, max_batches)
+        return {**counts, **dispatcher.summary()}
+    finally:
+        conn.close()
+
+def main(batch_size=BATCH_SIZE, max_batches=None):
+    """
+    Deliver pending constitution creation webhooks from the WebhookOutbox table.
+
+    Rows are queued by update_gac_scores.py in the same transaction as the
+    score updates and are SENDING while a run delivers them. Failed
+    deliveries go back to PENDING with an exponentially growing
+    nextAttemptAt, and are marked FAILED after MAX_ATTEMPTS or a
+    non-retryable response.
+
+    Args:
+        batch_size: Rows claimed and sent concurrently per batch
+        max_batches: Optional limit on the number of batches in this run
+    """
+    logger.info(f"Starting webhook delivery (version {VERSION})")
+    start_time = time.perf_counter()
+    try:
+        result = asyncio.run(deliver(batch_size, max_batches))
+    except Exception as e:
+        logger.error(f"Error delivering webhooks: {e}")
+        raise
+
+    result['durationMs'] = round((time.perf_counter() - start_time) * 1000, 1)
+    logger.info(
+        f"Delivered {result['delivered']} of {result['claimed']} webhooks "
+        f"({result['retrying']} to retry, {result['failed']} failed) in {result['durationMs']}ms"
+    )
+    return result
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            params = parse_qs(urlparse(self.path).query)
+            max_batches = params.get('maxBatches', [None])[0]
+            result = main(
+                batch_size=int(params.get('batchSize', [BATCH_SIZE])[0]),
+                max_batches=int(max_batches) if max_batches else None
+            )
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps(result).encode())
+        except Exception as e:
+            self.send_response(500)
+            self.send_header('Content-type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps({"error": str(e)}).encode())
+        return
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Deliver pending constitution creation webhooks')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Webhooks sent concurrently per batch')
+    parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+    args = parser.parse_args()
+
+    print(json.dumps(main(args.batch_size, args.max_batches), indent=2))
@@ -0,0 +1,68 @@
+import numpy as np
+
+class SignRandomProjectionIndex:
+    """
+    Locality-sensitive hash index for cosine similarity, built with NumPy only.
+
+    Each of n_tables tables hashes a vector to the signs of its projections on
+    n_bits random hyperplanes, so vectors with a small angle between them tend
+    to share a bucket. Queries probe their own bucket, the bucket reached by
+    flipping their least certain bit (smallest projection margin), and the
+    same two buckets for the negated vector, which finds strongly
+    anti-correlated vectors as well.
+    """
+
+    def __init__(self, vectors, n_tables=6, n_bits=None, bucket_size=16, max_bucket_size=None, seed=0):
+        vectors = np.asarray(vectors, dtype=np.float64)
+        n_vectors, n_dims = vectors.shape
+        if n_bits is None:
+            # Aim for about bucket_size vectors per bucket
+            n_bits = int(np.clip(np.round(np.log2(max(n_vectors, 2) / bucket_size)), 1, 30))
+        self.n_vectors = n_vectors
+        self.n_bits = n_bits
+        self.max_bucket_size = max_bucket_size or 4 * bucket_size
+        self.full_mask = (1 << n_bits) - 1
+
+        rng = np.random.default_rng(seed)
+        bit_values = np.left_shift(1, np.arange(n_bits, dtype=np.int64))
+        self.tables = []
+        for _ in range(n_tables):
+            hyperplanes = rng.standard_normal((n_dims, n_bits))
+            projections = vectors @ hyperplanes
+            codes = (projections > 0).astype(np.int64) @ bit_values
+            weakest_bit = np.argmin(np.abs(projections), axis=1)
+            # Shuffle before sorting so that capped buckets keep a random sample
+            shuffled = rng.permutation(n_vectors)
+            order = shuffled[np.argsort(codes[shuffled], kind='stable')]
+            bucket_codes, bucket_starts, bucket_counts = np.unique(codes[order], return_index=True, return_counts=True)
+            self.tables.append({
+                'codes': codes,
+                'weakest_bit': bit_values[weakest_bit],
+                'order': order,
+                'bucket_codes': bucket_codes,
+                'bucket_starts': bucket_starts,
+                'bucket_counts': np.minimum(bucket_counts, self.max_bucket_size)
+            })
+
+    def _probe_codes(self, table):
+        """Codes of the buckets each vector probes in a table, one array per probe."""
+        own = table['codes']
+        negated = ~own & self.full_mask
+        return (own, own ^ table['weakest_bit'], negated, negated ^ table['weakest_bit'])
+
+    def probe_groups(self, table):
+        """
+        Yield (probe, queries, members) for every bucket of the table probed
+        by any vector: probe numbers the probe kind (0-3), queries are the
+        vectors probing the bucket and members its (capped) contents.
+        """
+        for probe, probe_codes in enumerate(self._probe_codes(table)):
+            order = np.argsort(probe_codes, kind='stable')
+            codes, starts, counts = np.unique(probe_codes[order], return_index=True, return_counts=True)
+            buckets = np.minimum(np.searchsorted(table['bucket_codes'], codes), len(table['bucket_codes']) - 1)
+            for code, start, count, bucket in zip(codes, starts, counts, buckets):
+                if table['bucket_codes'][bucket] != code:
+                    continue
+                bucket_start = table['bucket_starts'][bucket]
+                members = table['order'][bucket_start:bucket_start + table['bucket_counts'][bucket]]
+                yield probe, order[start:start + count], members
@@ -0,0 +1,119 @@
+"""
+CPU thread budget shared between poll-level workers and BLAS threads.
+
+NumPy's BLAS (matrix products, eigh) starts one thread per core in every
+process by default, so N poll workers would each run N-core BLAS calls and
+oversubscribe the CPU. GAC_CPU_BUDGET cores (default: all) are split
+between GAC_POLL_WORKERS workers (default 1), each getting
+budget // workers BLAS threads.
+
+Limits are applied at runtime through threadpoolctl. Worker processes are
+started with the spawn method inside blas_environment(), so their BLAS also
+reads the per-worker limit from the environment when NumPy is imported.
+"""
+import os
+import logging
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Cores available to the service; defaults to every core
+CPU_BUDGET = int(os.getenv("GAC_CPU_BUDGET", "0")) or os.cpu_count() or 1
+
+# Poll-level workers sharing the budget; each gets CPU_BUDGET // POLL_WORKERS BLAS threads
+POLL_WORKERS = max(1, int(os.getenv("GAC_POLL_WORKERS", "1")))
+
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'BLIS_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+)
+
+def split_budget(poll_workers=None, cpu_budget=None):
+    """(poll workers, BLAS threads per worker) for the budget; never less than one of each."""
+    cpu_budget = cpu_budget or CPU_BUDGET
+    poll_workers = max(1, min(poll_workers or POLL_WORKERS, cpu_budget))
+    return poll_workers, max(1, cpu_budget // poll_workers)
+
+@contextmanager
+def blas_environment(blas_threads):
+    """
+    Set the BLAS/OpenMP thread variables to blas_threads for processes
+    started inside the block, overriding any inherited value, and restore
+    them afterwards.
+    """
+    saved = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    try:
+        for name in THREAD_ENV_VARS:
+            os.environ[name] = str(blas_threads)
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+_missing_warned = False
+
+def _threadpoolctl():
+    global _missing_warned
+    try:
+        import threadpoolctl
+    except ImportError:
+        if not _missing_warned:
+            logger.warning("threadpoolctl is not installed; BLAS thread limits cannot be applied")
+            _missing_warned = True
+        return None
+    return threadpoolctl
+
+def detect_blas_backend():
+    """
+    Name, version and current thread count of the loaded BLAS.
+
+    Uses threadpoolctl when installed, otherwise NumPy's build configuration,
+    which does not report threads.
+    """
+    threadpoolctl = _threadpoolctl()
+    if threadpoolctl is not None:
+        for pool in threadpoolctl.threadpool_info():
+            if pool.get('user_api') == 'blas':
+                return {
+                    'backend': pool.get('internal_api'),
+                    'version': pool.get('version'),
+                    'threads': pool.get('num_threads'),
+                    'controllable': True,
+                }
+
+    import numpy as np
+    try:
+        blas = np.show_config(mode='dicts')['Build Dependencies']['blas']
+    except Exception:
+        blas = {}
+    return {
+        'backend': blas.get('name', 'unknown'),
+        'version': blas.get('version'),
+        'threads': None,
+        'controllable': False,
+    }
+
+def limit_blas_threads(blas_threads):
+    """
+    Limit BLAS threads of this (already running) process, e.g. in a pool
+    worker initializer. Returns whether the limit could be applied.
+    """
+    threadpoolctl = _threadpoolctl()
+    if threadpoolctl is None:
+        return False
+    threadpoolctl.threadpool_limits(limits=blas_threads, user_api='blas')
+    return True
+
+def blas_threads(blas_threads):
+    """Context manager limiting BLAS threads for a block; a no-op without threadpoolctl."""
+    threadpoolctl = _threadpoolctl()
+    if threadpoolctl is None:
+        return nullcontext()
+    return threadpoolctl.threadpool_limits(limits=blas_threads, user_api='blas')
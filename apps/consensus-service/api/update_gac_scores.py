@@ -4,23 +4,30 @@ import json
 from http.server import BaseHTTPRequestHandler
 import os
 import argparse
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 import pg8000
 from urllib.parse import urlparse
 import numpy as np
 import pandas as pd
 import math
-import aiohttp
-import asyncio
 import uuid
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
 
 # Handle imports for both direct execution and package import
 try:
     # Try relative import first (for when used as a package)
-    from .webhook_utils import send_webhook
+    from .neighbor_index import SignRandomProjectionIndex
+    from .vote_bitsets import VoteBitsets, pairwise_vote_products
+    from . import thread_budget
 except (ImportError, ValueError):
     # Fall back to direct import (for when run as script)
-    from webhook_utils import send_webhook
+    from neighbor_index import SignRandomProjectionIndex
+    from vote_bitsets import VoteBitsets, pairwise_vote_products
+    import thread_budget
 
 # Set pandas option for future-proof behavior with downcasting
 pd.set_option('future.no_silent_downcasting', True)
@@ -84,7 +91,7 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
         try:
-            main()
+            main(time_budget=TIME_BUDGET_SECONDS)
             self.send_response(200)
             self.send_header('Content-type', 'text/plain')
             self.end_headers()
@@ -111,8 +118,9 @@ class handler(BaseHTTPRequestHandler):
                 data = json.loads(post_data)
                 poll_id = data.get('pollId')
                 force = data.get('force', False)
+                use_cache = not data.get('noCache', False)
                 
-                logger.info(f"Parsed request: pollId={poll_id}, force={force}")
+                logger.info(f"Parsed request: pollId={poll_id}, force={force}, noCache={not use_cache}")
                 
                 if not poll_id:
                     logger.warning("Missing required parameter: pollId")
@@ -128,7 +136,7 @@ class handler(BaseHTTPRequestHandler):
                 
                 # Run the GAC update for the specific poll
                 try:
-                    result = main(poll_id=poll_id, force=force)
+                    result = main(poll_id=poll_id, force=force, use_cache=use_cache)
                     logger.info(f"GAC update completed with result: {result}")
                     
                     # Send success response
@@ -255,26 +263,343 @@ def get_constitutionable_statements(cursor, poll_id):
     """, (poll_id,))
     return {row[0] for row in cursor.fetchall()}
 
-async def check_and_create_constitution(cursor, poll_id, pre_update_statements, model_id):
-    """Check if constitution needs to be created and create if necessary."""
-    # Get post-update constitutionable statements
-    post_update_statements = get_constitutionable_statements(cursor, poll_id)
+def enqueue_constitution_webhook(cursor, model_id, poll_id):
+    """
+    Queue a constitution creation webhook in the WebhookOutbox table.
     
-    # If there's a difference in the sets
-    if pre_update_statements != post_update_statements:
-        logger.info(f"Constitutionable statements changed for poll {poll_id}")
-        logger.info(f"Pre-update: {pre_update_statements}")
-        logger.info(f"Post-update: {post_update_statements}")
-        
-        # Send webhook to trigger constitution creation
-        success = await send_webhook(model_id, poll_id)
+    Runs on the caller's transaction, so the trigger is committed together with
+    the score updates that caused it; deliver_webhooks.py sends it later. A poll
+    with a trigger still PENDING is not queued twice, since that trigger has not
+    been sent yet. One that is SENDING may already be past the change, so a new
+    row is queued. Returns True if a row was added.
+    """
+    cursor.execute("""
+        INSERT INTO "WebhookOutbox" ("uid", "eventType", "communityModelId", "pollId", "updatedAt")
+        SELECT %s, %s, %s, %s, NOW()
+        WHERE NOT EXISTS (
+            SELECT 1 FROM "WebhookOutbox"
+            WHERE "pollId" = %s AND "status" = 'PENDING'
+        )
+        RETURNING uid;
+    """, (f"clw{uuid.uuid4().hex[:21]}", "statements_changed", model_id, poll_id, poll_id))
+    return cursor.fetchone() is not None
+
+def scoring_settings():
+    """
+    The code VERSION and every setting that changes what a run computes or
+    writes for a poll: similarity, imputation, clustering and batching
+    choices, score epsilon, constitutionable confidence and bootstrap.
+    """
+    return (
+        VERSION, IMPUTATION_METHOD, SIMILARITY_KERNEL, ANN_MIN_PARTICIPANTS,
+        MINIBATCH_MIN_PARTICIPANTS, MINIBATCH_SIZE, CLUSTER_WORKERS, CLUSTER_PARALLEL_MIN_PARTICIPANTS,
+        BATCH_MAX_PARTICIPANTS, GAC_SCORE_EPSILON, CONSTITUTIONABLE_CONFIDENCE,
+        BOOTSTRAP_REPLICATES, BOOTSTRAP_SEED,
+    )
+
+def compute_poll_fingerprint(cursor, poll_id):
+    """
+    Fingerprint a poll's statements and votes in one aggregate query.
+    
+    Vote and statement rows are hashed with hashtext and summed, so the result
+    does not depend on row order and changes whenever a vote is added, changed
+    or deleted, or a statement is added. scoring_settings() is included so a
+    new release or configuration recomputes every poll.
+    Returns (fingerprint, vote_count, last_vote_at).
+    """
+    cursor.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM "Statement" WHERE "pollId" = %s),
+            (SELECT COALESCE(SUM(hashtext(uid)::bigint), 0) FROM "Statement" WHERE "pollId" = %s),
+            COUNT(v.uid),
+            MAX(v."updatedAt"),
+            COALESCE(SUM(hashtext(v."participantId" || ':' || v."statementId" || ':' || v."voteValue"::text)::bigint), 0)
+        FROM "Vote" v
+        JOIN "Statement" s ON s.uid = v."statementId"
+        WHERE s."pollId" = %s;
+    """, (poll_id, poll_id, poll_id))
+    statement_count, statement_hash, vote_count, last_vote_at, vote_hash = cursor.fetchone()
+    key = "|".join(str(part) for part in (
+        *scoring_settings(), statement_count, statement_hash,
+        vote_count, last_vote_at.isoformat() if last_vote_at else None, vote_hash
+    ))
+    return hashlib.sha256(key.encode()).hexdigest(), vote_count, last_vote_at
+
+def advance_calculated_at(cursor, poll_id, calculated_at):
+    """
+    Move lastCalculatedAt of a poll's voted statements up to calculated_at.
+    
+    Used for cache hits: their votes are unchanged since the last run, so
+    the stored scores are current and the poll should stop showing up in
+    fetch_polls_with_changes until new votes arrive.
+    """
+    cursor.execute("""
+        UPDATE "Statement" s
+        SET "lastCalculatedAt" = %s
+        WHERE s."pollId" = %s
+        AND (s."lastCalculatedAt" IS NULL OR s."lastCalculatedAt" < %s)
+        AND EXISTS (SELECT 1 FROM "Vote" v WHERE v."statementId" = s.uid);
+    """, (calculated_at, poll_id, calculated_at))
+
+def get_cached_fingerprint(cursor, poll_id):
+    cursor.execute('SELECT "fingerprint" FROM "PollScoreCache" WHERE "pollId" = %s;', (poll_id,))
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+def save_poll_fingerprint(cursor, poll_id, fingerprint, vote_count, last_vote_at):
+    cursor.execute("""
+        INSERT INTO "PollScoreCache" ("pollId", "fingerprint", "voteCount", "lastVoteAt", "updatedAt")
+        VALUES (%s, %s, %s, %s, NOW())
+        ON CONFLICT ("pollId") DO UPDATE
+        SET "fingerprint" = EXCLUDED."fingerprint",
+            "voteCount" = EXCLUDED."voteCount",
+            "lastVoteAt" = EXCLUDED."lastVoteAt",
+            "updatedAt" = EXCLUDED."updatedAt";
+    """, (poll_id, fingerprint, vote_count, last_vote_at))
+
+def save_cluster_stats(cursor, poll_id, gac_scores):
+    """
+    Replace a poll's StatementClusterStat rows with the per-cluster aggregates
+    of this run, in one DELETE and one INSERT over unnest() arrays.
+    """
+    columns = {'statement': [], 'cluster': [], 'agree': [], 'active': [], 'size': []}
+    for statement_id, gac_score_data in gac_scores.items():
+        for cluster_id, agree_count, active_count, cluster_size in gac_score_data.get('clusters', []):
+            columns['statement'].append(statement_id)
+            columns['cluster'].append(cluster_id)
+            columns['agree'].append(agree_count)
+            columns['active'].append(active_count)
+            columns['size'].append(cluster_size)
+    
+    cursor.execute('DELETE FROM "StatementClusterStat" WHERE "pollId" = %s;', (poll_id,))
+    if columns['statement']:
+        cursor.execute("""
+            INSERT INTO "StatementClusterStat" (
+                "statementId", "clusterId", "pollId", "agreeCount", "activeCount", "clusterSize", "updatedAt"
+            )
+            SELECT s.statement_id, s.cluster_id, %s, s.agree_count, s.active_count, s.cluster_size, NOW()
+            FROM unnest(%s::text[], %s::int[], %s::int[], %s::int[], %s::int[])
+                AS s(statement_id, cluster_id, agree_count, active_count, cluster_size);
+        """, (poll_id, columns['statement'], columns['cluster'], columns['agree'], columns['active'], columns['size']))
+    return len(columns['statement'])
+
+def save_participant_clusters(cursor, poll_id, cluster_assignments):
+    """
+    Upsert the poll's participant cluster assignments in one statement over
+    unnest() arrays, then drop rows of participants no longer in the poll.
+    """
+    participant_ids = list(cluster_assignments)
+    if participant_ids:
+        cursor.execute("""
+            INSERT INTO "ParticipantCluster" ("pollId", "participantId", "clusterId", "distance", "updatedAt")
+            SELECT %s, a.participant_id, a.cluster_id, a.distance, NOW()
+            FROM unnest(%s::text[], %s::int[], %s::float8[]) AS a(participant_id, cluster_id, distance)
+            ON CONFLICT ("pollId", "participantId") DO UPDATE
+            SET "clusterId" = EXCLUDED."clusterId",
+                "distance" = EXCLUDED."distance",
+                "updatedAt" = EXCLUDED."updatedAt";
+        """, (
+            poll_id,
+            participant_ids,
+            [cluster_assignments[pid][0] for pid in participant_ids],
+            [cluster_assignments[pid][1] for pid in participant_ids]
+        ))
+    cursor.execute("""
+        DELETE FROM "ParticipantCluster"
+        WHERE "pollId" = %s AND NOT ("participantId" = ANY(%s::text[]));
+    """, (poll_id, participant_ids))
+
+# Polls fetched, scored and written together in one phase of a run
+POLL_WINDOW = int(os.getenv("GAC_POLL_WINDOW", "64"))
+
+CACHE_HIT = "cache_hit"
+
+def prepare_poll(cursor, poll_id, use_cache=True):
+    """
+    Fetch everything needed to score and write one poll.
+    
+    Returns CACHE_HIT if the poll's votes match its stored fingerprint, None
+    if it has too little data, and otherwise a job dict for score_poll_jobs
+    and write_poll_results.
+    """
+    logger.info(f"Processing poll ID: {poll_id}")
+    
+    # Stored as lastCalculatedAt, so votes cast after this snapshot bring the poll back
+    cursor.execute("SELECT clock_timestamp();")
+    snapshot_at = cursor.fetchone()[0]
+    
+    # Fingerprint before fetching, so votes arriving meanwhile trigger another run
+    fingerprint, vote_count, last_vote_at = compute_poll_fingerprint(cursor, poll_id)
+    if use_cache and get_cached_fingerprint(cursor, poll_id) == fingerprint:
+        logger.info(f"Cache hit for poll ID: {poll_id}, votes unchanged since last run")
+        advance_calculated_at(cursor, poll_id, snapshot_at)
+        return CACHE_HIT
+    
+    # Get pre-update constitutionable statements
+    pre_update_statements = get_constitutionable_statements(cursor, poll_id)
+    
+    statements, votes, participants = fetch_poll_data(cursor, poll_id)
+    logger.info(f"Fetched data for poll ID: {poll_id}")
+    
+    if not statements or not votes or not participants:
+        logger.warning(f"Insufficient data for poll ID: {poll_id}, skipping.")
+        return None
+    
+    # Get community model ID for the poll before updating statements
+    model_id, auto_create_enabled = get_community_model_id(cursor, poll_id)
+    
+    return {
+        'pollId': poll_id,
+        'statements': statements,
+        'votes': votes,
+        'participants': participants,
+        'preUpdateStatements': pre_update_statements,
+        'modelId': model_id,
+        'autoCreateEnabled': auto_create_enabled,
+        'fingerprint': (fingerprint, vote_count, last_vote_at),
+        'snapshotAt': snapshot_at,
+        'gacScores': {},
+        'clusterAssignments': {}
+    }
+
+def score_poll_jobs(jobs):
+    """
+    Compute gac_scores for every job. Polls with up to BATCH_MAX_PARTICIPANTS
+    participants are scored BATCH_SIZE at a time with process_votes_batch,
+    grouped by size to keep padding small; larger polls go through process_votes.
+    """
+    small = sorted(
+        (job for job in jobs if len(job['participants']) <= BATCH_MAX_PARTICIPANTS),
+        key=lambda job: (len(job['participants']), len(job['statements']))
+    )
+    for batch_start in range(0, len(small), BATCH_SIZE):
+        batch = small[batch_start:batch_start + BATCH_SIZE]
+        try:
+            results = process_votes_batch(
+                [(job['participants'], job['statements'], job['votes']) for job in batch],
+                include_clusters=True
+            )
+        except Exception as e:
+            logger.error(f"Batch scoring failed, scoring polls one by one: {e}")
+            results = [
+                process_votes(job['participants'], job['statements'], job['votes'], include_clusters=True)
+                for job in batch
+            ]
+        for job, (gac_scores, assignments) in zip(batch, results):
+            job['gacScores'], job['clusterAssignments'] = gac_scores, assignments
+    
+    for job in jobs:
+        if len(job['participants']) > BATCH_MAX_PARTICIPANTS:
+            job['gacScores'], job['clusterAssignments'] = process_votes(
+                job['participants'], job['statements'], job['votes'], include_clusters=True
+            )
+        logger.info(f"Calculated GAC scores for poll ID: {job['pollId']}")
+
+def write_poll_results(cursor, conn, job, dry_run=False):
+    """
+    Write one scored poll in a single transaction, queueing a constitution
+    webhook if its constitutionable statements changed. Returns True if one was queued.
+    """
+    poll_id = job['pollId']
+    statements, gac_scores = job['statements'], job['gacScores']
+    model_id = job['modelId']
+    
+    if dry_run:
+        # Log what would have been updated in dry run mode, deciding the flag
+        # against the stored one the same way update_statements does
+        current_scores = fetch_current_scores(cursor, list(gac_scores)) if gac_scores else {}
+        for row in build_poll_diff(poll_id, statements, gac_scores, current_scores)['statements']:
+            if row['newScore'] is None:
+                continue
+            logger.info(f"[DRY RUN] Would update statement {row['statementId']}:")
+            logger.info(f"  - GAC Score: {row['newScore']}")
+            logger.info(f"  - Is Constitutionable: {row['newIsConstitutionable']}")
+            logger.info(f"  - Material change: {row['material']}")
+        return False
+    
+    # Pass model_id to update_statements to avoid redundant database queries.
+    # The transaction stays open so a constitution trigger commits with the scores.
+    changed_statements = update_statements(
+        cursor, conn, statements, gac_scores, job['votes'], model_id, commit=False, calculated_at=job['snapshotAt']
+    )
+    logger.info(f"Updated GAC scores for poll ID: {poll_id}")
+    logger.info(f"Changed statements: {len(changed_statements)} statements had score changes")
+    
+    save_cluster_stats(cursor, poll_id, gac_scores)
+    save_participant_clusters(cursor, poll_id, job['clusterAssignments'])
+    
+    # Check if we need to create a constitution
+    # We no longer send GAC score updates via webhook, only constitution creation triggers
+    queued = False
+    if model_id and job['autoCreateEnabled']:
+        pre_update_statements = job['preUpdateStatements']
+        post_update_statements = get_constitutionable_statements(cursor, poll_id)
         
-        if success:
-            logger.info(f"Successfully triggered constitution creation for model {model_id}")
-        else:
-            logger.error(f"Failed to trigger constitution creation for model {model_id}")
+        # If there's a difference in the sets
+        if pre_update_statements != post_update_statements:
+            logger.info(f"Constitutionable statements changed for poll {poll_id}")
+            logger.info(f"Pre-update: {pre_update_statements}")
+            logger.info(f"Post-update: {post_update_statements}")
+            queued = enqueue_constitution_webhook(cursor, model_id, poll_id)
+            if queued:
+                logger.info(f"Queued constitution creation webhook for poll {poll_id}")
+    
+    # A poll whose scoring failed keeps its old fingerprint, so the next run retries it
+    if gac_scores:
+        save_poll_fingerprint(cursor, poll_id, *job['fingerprint'])
+    else:
+        logger.warning(f"No GAC scores for poll ID: {poll_id}, not caching its fingerprint")
+    conn.commit()
+    return queued
+
+# Seconds the platform lets a tick run (maxDuration in vercel.json); the cron runs every minute
+MAX_DURATION_SECONDS = float(os.getenv("GAC_MAX_DURATION_SECONDS", "60"))
+
+# Seconds kept back from MAX_DURATION_SECONDS for the poll still being written when the budget ends
+TIME_BUDGET_MARGIN_SECONDS = float(os.getenv("GAC_TIME_BUDGET_MARGIN_SECONDS", "15"))
+
+# Seconds a scheduled tick may spend before it stops and leaves the rest to the next tick
+TIME_BUDGET_SECONDS = float(os.getenv("GAC_TIME_BUDGET_SECONDS", "0")) or max(
+    1.0, MAX_DURATION_SECONDS - TIME_BUDGET_MARGIN_SECONDS)
+
+# Seconds per poll assumed before any tick has measured it
+DEFAULT_SECONDS_PER_POLL = 1.0
+
+RUN_CURSOR_ID = "update_gac_scores"
+
+def get_run_cursor(cursor):
+    """(staleSince, pollId, secondsPerPoll) stored by the last scheduled tick, all None if there is none."""
+    cursor.execute("""
+        SELECT "staleSince", "pollId", "secondsPerPoll" FROM "GacRunCursor" WHERE id = %s;
+    """, (RUN_CURSOR_ID,))
+    result = cursor.fetchone()
+    return tuple(result) if result else (None, None, None)
+
+def save_run_cursor(cursor, stale_since, poll_id, seconds_per_poll):
+    cursor.execute("""
+        INSERT INTO "GacRunCursor" (id, "staleSince", "pollId", "secondsPerPoll", "updatedAt")
+        VALUES (%s, %s, %s, %s, NOW())
+        ON CONFLICT (id) DO UPDATE
+        SET "staleSince" = EXCLUDED."staleSince",
+            "pollId" = EXCLUDED."pollId",
+            "secondsPerPoll" = EXCLUDED."secondsPerPoll",
+            "updatedAt" = EXCLUDED."updatedAt";
+    """, (RUN_CURSOR_ID, stale_since, poll_id, seconds_per_poll))
+
+def resume_order(polls, stale_since=None, poll_id=None):
+    """
+    Rotate polls (ordered by staleSince, uid) to start after the stored
+    cursor position, wrapping around to the polls at or before it. Without a
+    cursor the order is unchanged.
+    """
+    if poll_id is None:
+        return list(polls)
+    resume_key = (stale_since, poll_id)
+    after = [poll for poll in polls if (poll['staleSince'], poll['uid']) > resume_key]
+    before = [poll for poll in polls if (poll['staleSince'], poll['uid']) <= resume_key]
+    return after + before
 
-def main(poll_id=None, dry_run=False, force=False):
+def main(poll_id=None, dry_run=False, force=False, use_cache=True, time_budget=None):
     """
     Main function to update GAC scores for a specific poll or all polls with changes.
     
@@ -282,119 +607,350 @@ def main(poll_id=None, dry_run=False, force=False):
         poll_id: Optional specific poll ID to process
         dry_run: If True, don't actually update the database
         force: If True, process even if no new votes
+        use_cache: If True, skip polls whose vote fingerprint matches the last run
+        time_budget: Optional seconds to spend; windows are sized to the
+            measured seconds per poll, and no poll is fetched, scored or
+            written once the budget is used up
+    
+    Scheduled runs (no poll_id, force or dry_run) handle the stalest polls
+    first and persist a cursor in GacRunCursor after every poll written, so
+    the next run resumes after the last poll handled.
     """
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget else None
+    
     # Set up logging
     setup_logging()
     logger.info(f"Starting GAC score update (version {VERSION})")
-    logger.info(f"Parameters: poll_id={poll_id}, dry_run={dry_run}, force={force}")
+    logger.info(f"Parameters: poll_id={poll_id}, dry_run={dry_run}, force={force}, use_cache={use_cache}, "
+                f"time_budget={time_budget}")
+    logger.info(f"BLAS: {thread_budget.detect_blas_backend()}")
     
-    try:
-        # Create database connection
-        conn = create_connection()
-        cursor = conn.cursor()
+    # Polls are scored one at a time here, so BLAS gets the whole CPU budget
+    with thread_budget.blas_threads(thread_budget.CPU_BUDGET):
+        try:
+            # Create database connection
+            conn = create_connection()
+            cursor = conn.cursor()
         
-        # Verify poll exists if specified
-        if poll_id:
-            logger.info(f"Verifying poll exists: {poll_id}")
-            if not verify_poll_exists(cursor, poll_id):
-                error_msg = f"Poll with ID {poll_id} not found"
-                logger.error(error_msg)
-                return {"error": error_msg}
-        
-        # Get polls to process
-        polls_to_process = []
-        if poll_id:
-            logger.info(f"Using specified poll: {poll_id}")
-            polls_to_process = [poll_id]
-        else:
-            # If force flag is set, fetch all polls regardless of vote changes
-            if force:
-                logger.info("Force flag set, fetching all polls regardless of vote changes")
-                polls_to_process = fetch_all_polls(cursor)
+            # Verify poll exists if specified
+            if poll_id:
+                logger.info(f"Verifying poll exists: {poll_id}")
+                if not verify_poll_exists(cursor, poll_id):
+                    error_msg = f"Poll with ID {poll_id} not found"
+                    logger.error(error_msg)
+                    return {"error": error_msg}
+        
+            # Only scheduled runs read and advance the resume cursor
+            scheduled = not (poll_id or force or dry_run)
+            seconds_per_poll = DEFAULT_SECONDS_PER_POLL
+        
+            # Get polls to process
+            polls_to_process = []
+            if poll_id:
+                logger.info(f"Using specified poll: {poll_id}")
+                polls_to_process = [{'uid': poll_id}]
             else:
-                logger.info("Fetching polls with recent vote changes")
-                polls_to_process = fetch_polls_with_changes(cursor)
+                # If force flag is set, fetch all polls regardless of vote changes
+                if force:
+                    logger.info("Force flag set, fetching all polls regardless of vote changes")
+                    polls_to_process = fetch_all_polls(cursor)
+                else:
+                    logger.info("Fetching polls with recent vote changes")
+                    polls_to_process = fetch_polls_with_changes(cursor)
+                if scheduled:
+                    resume_stale_since, resume_poll_id, stored_seconds = get_run_cursor(cursor)
+                    seconds_per_poll = stored_seconds or DEFAULT_SECONDS_PER_POLL
+                    if resume_poll_id:
+                        logger.info(f"Resuming after poll {resume_poll_id} (stale since {resume_stale_since})")
+                    polls_to_process = resume_order(polls_to_process, resume_stale_since, resume_poll_id)
+                conn.commit()
             
-        if not polls_to_process:
-            msg = "No polls need GAC score updates"
-            logger.info(msg)
-            return {"message": msg}
+            if not polls_to_process:
+                msg = "No polls need GAC score updates"
+                logger.info(msg)
+                return {"message": msg}
             
-        logger.info(f"Processing {len(polls_to_process)} polls")
+            logger.info(f"Processing {len(polls_to_process)} polls")
         
-        # Process each poll
-        for current_poll_id in polls_to_process:
-            try:
-                poll_id = current_poll_id
-                logger.info(f"Processing poll ID: {poll_id}")
-                
-                # Get pre-update constitutionable statements
-                pre_update_statements = get_constitutionable_statements(cursor, poll_id)
-                
-                statements, votes, participants = fetch_poll_data(cursor, poll_id)
-                logger.info(f"Fetched data for poll ID: {poll_id}")
+            # Polls whose constitution creation webhook was queued in the outbox
+            webhooks_queued = 0
+            # Polls skipped because their votes match the last run's fingerprint
+            cache_hits = 0
+            # Polls handled so far, in processing order
+            handled = 0
+            deadline_reached = False
+        
+            def past_deadline():
+                return deadline is not None and time.monotonic() >= deadline
+        
+            def advance_cursor(done):
+                """Store the last of the first `done` polls as the position the next scheduled run resumes after."""
+                if scheduled and done:
+                    last = polls_to_process[done - 1]
+                    save_run_cursor(cursor, last['staleSince'], last['uid'], seconds_per_poll)
+                    conn.commit()
+        
+            # Polls are handled in windows: fetch every poll of the window, score
+            # them (small polls batched together), then write the results. The
+            # deadline is checked before each of these steps; a poll only counts
+            # as handled (and moves the cursor) once it was a cache hit or written,
+            # and at least one poll is handled per run so slow polls can't stall the queue
+            while handled < len(polls_to_process):
+                window_size = POLL_WINDOW
+                if deadline is not None:
+                    # Only start as many polls as the measured rate fits before the deadline
+                    fitting = int((deadline - time.monotonic()) / seconds_per_poll)
+                    if fitting < 1 and handled:
+                        deadline_reached = True
+                        break
+                    window_size = max(1, min(POLL_WINDOW, fitting))
+                window = polls_to_process[handled:handled + window_size]
+                window_started = time.monotonic()
+            
+                # Dry runs always recompute, since they exist to show the calculations
+                jobs = []
+                # Position in the window of each job
+                positions = []
+                prepared = 0
+                for poll in window:
+                    if past_deadline() and handled + prepared:
+                        deadline_reached = True
+                        break
+                    prepared += 1
+                    current_poll_id = poll['uid']
+                    try:
+                        job = prepare_poll(cursor, current_poll_id, use_cache and not dry_run)
+                        conn.commit()
+                    except Exception as e:
+                        logger.error(f"Error fetching poll ID {current_poll_id}: {e}")
+                        conn.rollback()
+                        continue
+                    if job == CACHE_HIT:
+                        cache_hits += 1
+                    elif job:
+                        jobs.append(job)
+                        positions.append(prepared - 1)
+            
+                if jobs and past_deadline():
+                    # Nothing handled yet this run means the first poll is scored anyway
+                    keep = 0 if handled + positions[0] else 1
+                    deadline_reached = deadline_reached or keep < len(jobs)
+                    jobs = jobs[:keep]
+            
+                score_poll_jobs(jobs)
+            
+                written = 0
+                for job, position in zip(jobs, positions):
+                    if handled + position and past_deadline():
+                        deadline_reached = True
+                        break
+                    try:
+                        if write_poll_results(cursor, conn, job, dry_run):
+                            webhooks_queued += 1
+                    except Exception as e:
+                        logger.error(f"Error processing poll ID {job['pollId']}: {e}")
+                        conn.rollback()
+                    written += 1
+                    advance_cursor(handled + position + 1)
+            
+                # Polls from the first unwritten job on are left for the next run
+                done = positions[written] if written < len(positions) else prepared
+                if done:
+                    # Smooth the rate over windows, so one slow poll doesn't halve the next window
+                    window_rate = (time.monotonic() - window_started) / done
+                    seconds_per_poll = 0.5 * seconds_per_poll + 0.5 * window_rate
+                handled += done
+                advance_cursor(handled)
+                if deadline_reached:
+                    break
+        
+            remaining = len(polls_to_process) - handled
+            if scheduled and not remaining:
+                # Everything was handled, so the next run starts with the stalest poll again
+                save_run_cursor(cursor, None, None, seconds_per_poll)
+                conn.commit()
+            if deadline_reached:
+                logger.info(f"Time budget of {time_budget}s reached after {handled} polls, "
+                            f"{remaining} left for the next run")
 
-                if not statements or not votes or not participants:
-                    logger.warning(f"Insufficient data for poll ID: {poll_id}, skipping.")
-                    continue
+            # Close database connection
+            cursor.close()
+            conn.close()
+            logger.info("Completed update-gac-scores.py script successfully")
+            return {
+                "message": f"Processed {handled} of {len(polls_to_process)} polls",
+                "cacheHits": cache_hits,
+                "webhooksQueued": webhooks_queued,
+                "remaining": remaining,
+                "deadlineReached": deadline_reached,
+                "secondsPerPoll": round(seconds_per_poll, 3),
+                "elapsedSeconds": round(time.monotonic() - started, 3)
+            }
 
-                gac_scores = process_votes(participants, statements, votes)
-                logger.info(f"Calculated GAC scores for poll ID: {poll_id}")
+        except Exception as e:
+            logger.error(f"Error in main function: {e}")
+            sys.exit(1)
 
-                # Get community model ID for the poll before updating statements
-                model_id, auto_create_enabled = get_community_model_id(cursor, poll_id)
-                
-                if dry_run:
-                    # Log what would have been updated in dry run mode
-                    for statement in statements:
-                        statement_id = statement['uid']
-                        if statement_id in gac_scores:
-                            gac_score_data = gac_scores[statement_id]
-                            score = gac_score_data['score']
-                            is_const = is_constitutionable(gac_score_data)
-                            logger.info(f"[DRY RUN] Would update statement {statement_id}:")
-                            logger.info(f"  - GAC Score: {score}")
-                            logger.info(f"  - Is Constitutionable: {is_const}")
-                else:
-                    # Pass model_id to update_statements to avoid redundant database queries
-                    changed_statements = update_statements(cursor, conn, statements, gac_scores, votes, model_id)
-                    logger.info(f"Updated GAC scores for poll ID: {poll_id}")
-                    logger.info(f"Changed statements: {len(changed_statements)} statements had score changes")
-
-                    # Check if we need to create a constitution
-                    # We no longer send GAC score updates via webhook, only constitution creation triggers
-                    if model_id and auto_create_enabled:
-                        # Get pre-update constitutionable statements
-                        pre_update_statements = get_constitutionable_statements(cursor, poll_id)
-                        # Get post-update constitutionable statements
-                        post_update_statements = get_constitutionable_statements(cursor, poll_id)
-                        
-                        # If there's a difference in the sets
-                        if pre_update_statements != post_update_statements:
-                            logger.info(f"Constitutionable statements changed for poll {poll_id}")
-                            logger.info(f"Pre-update: {pre_update_statements}")
-                            logger.info(f"Post-update: {post_update_statements}")
-                            
-                            # Send webhook to trigger constitution creation only
-                            webhook_success = asyncio.run(send_webhook(model_id, poll_id))
-                            logger.info(f"Constitution creation webhook delivery {'succeeded' if webhook_success else 'failed'}")
 
-            except Exception as e:
-                logger.error(f"Error processing poll ID {poll_id}: {e}")
-                continue
+def build_poll_diff(poll_id, statements, gac_scores, current_scores, epsilon=None):
+    """
+    Compare freshly computed GAC scores of a poll with the values stored now.
+    
+    Returns the per-statement old/new score and constitutionable flag, and a
+    summary with the number of material changes, flag flips and score deltas.
+    """
+    rows = []
+    for statement in statements:
+        statement_id = statement['uid']
+        old_score, old_is_const = current_scores.get(statement_id, (None, False))
+        if statement_id in gac_scores:
+            new_score = float(gac_scores[statement_id]['score'])
+            new_is_const = confident_constitutionable(gac_scores[statement_id], old_is_const if old_score is not None else None)
+            material = is_material_change(old_score, old_is_const, new_score, new_is_const, epsilon)
+        else:
+            new_score, new_is_const = None, False
+            material = old_score is not None
+        delta = new_score - old_score if new_score is not None and old_score is not None else None
+        rows.append({
+            'statementId': statement_id,
+            'oldScore': old_score,
+            'newScore': new_score,
+            'delta': delta,
+            'oldIsConstitutionable': bool(old_is_const),
+            'newIsConstitutionable': new_is_const,
+            'material': material
+        })
+    
+    deltas = np.abs([row['delta'] for row in rows if row['delta'] is not None])
+    summary = {
+        'statements': len(rows),
+        'scored': sum(1 for row in rows if row['newScore'] is not None),
+        'materialChanges': sum(row['material'] for row in rows),
+        'becameConstitutionable': sum(row['newIsConstitutionable'] and not row['oldIsConstitutionable'] for row in rows),
+        'lostConstitutionable': sum(row['oldIsConstitutionable'] and not row['newIsConstitutionable'] for row in rows),
+        'constitutionableBefore': sum(row['oldIsConstitutionable'] for row in rows),
+        'constitutionableAfter': sum(row['newIsConstitutionable'] for row in rows),
+        'meanAbsDelta': float(deltas.mean()) if len(deltas) else None,
+        'maxAbsDelta': float(deltas.max()) if len(deltas) else None
+    }
+    return {'pollId': poll_id, 'summary': summary, 'statements': rows}
 
-        # Close database connection
-        cursor.close()
-        conn.close()
-        logger.info("Completed update-gac-scores.py script successfully")
+def write_poll_diff(diff, output_dir, report_format='json'):
+    """Write one poll's diff as <pollId>.json, or <pollId>.csv with one row per statement."""
+    if report_format == 'csv':
+        path = os.path.join(output_dir, f"{diff['pollId']}.csv")
+        pd.DataFrame(diff['statements']).to_csv(path, index=False)
+    else:
+        path = os.path.join(output_dir, f"{diff['pollId']}.json")
+        with open(path, 'w') as f:
+            json.dump(diff, f, separators=(',', ':'))
+    return path
+
+def create_read_only_connection():
+    """Connection on which every transaction is READ ONLY, so nothing can be written by mistake."""
+    conn = create_connection()
+    cursor = conn.cursor()
+    cursor.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY;")
+    conn.commit()
+    return conn
+
+# Read-only connection of a report worker process
+_report_conn = None
+
+def _init_report_worker(blas_threads=None):
+    global _report_conn
+    if blas_threads:
+        thread_budget.limit_blas_threads(blas_threads)
+    _report_conn = create_read_only_connection()
 
+def _report_poll(task):
+    """Score one poll against its stored values and write its diff. Returns the poll summary."""
+    poll_id, output_dir, report_format = task
+    cursor = _report_conn.cursor()
+    try:
+        statements, votes, participants = fetch_poll_data(cursor, poll_id)
+        current_scores = fetch_current_scores(cursor, [s['uid'] for s in statements]) if statements else {}
+        _report_conn.rollback()
+        
+        gac_scores = process_votes(participants, statements, votes) if votes else {}
+        diff = build_poll_diff(poll_id, statements, gac_scores, current_scores)
+        write_poll_diff(diff, output_dir, report_format)
+        return {'pollId': poll_id, **diff['summary']}
     except Exception as e:
-        logger.error(f"Error in main function: {e}")
-        sys.exit(1)
+        logger.error(f"Error reporting poll ID {poll_id}: {e}")
+        _report_conn.rollback()
+        return {'pollId': poll_id, 'error': str(e)}
+    finally:
+        cursor.close()
+
+def dry_run_report(poll_id=None, force=False, output_dir='dry_run_report', workers=None, report_format='json'):
+    """
+    Preview the effect of the current scoring code without writing anything.
+    
+    All reads happen in READ ONLY transactions. Polls are scored in a pool of
+    `workers` processes (default GAC_POLL_WORKERS), each with its own
+    connection and an equal share of the CPU budget as BLAS threads, and
+    every poll's diff against the stored scores is written to output_dir,
+    together with a summary.json covering all polls.
+    """
+    setup_logging()
+    start_time = datetime.now()
+    os.makedirs(output_dir, exist_ok=True)
+    
+    conn = create_read_only_connection()
+    try:
+        cursor = conn.cursor()
+        if poll_id:
+            poll_ids = [poll_id]
+        else:
+            polls = fetch_all_polls(cursor) if force else fetch_polls_with_changes(cursor)
+            poll_ids = [poll['uid'] for poll in polls]
+        conn.rollback()
+    finally:
+        conn.close()
+    
+    workers, blas_threads = thread_budget.split_budget(workers)
+    logger.info(f"Writing dry-run diffs for {len(poll_ids)} polls to {output_dir} using {workers} workers with {blas_threads} BLAS threads each")
+    tasks = [(pid, output_dir, report_format) for pid in poll_ids]
+    if workers > 1 and len(tasks) > 1:
+        import multiprocessing
+        # Spawned workers import NumPy afresh, so their BLAS reads this worker's share from the environment
+        context = multiprocessing.get_context('spawn')
+        with thread_budget.blas_environment(blas_threads):
+            pool = context.Pool(min(workers, len(tasks)), initializer=_init_report_worker, initargs=(blas_threads,))
+        with pool:
+            summaries = pool.map(_report_poll, tasks, chunksize=1)
+    else:
+        _init_report_worker()
+        try:
+            with thread_budget.blas_threads(blas_threads):
+                summaries = [_report_poll(task) for task in tasks]
+        finally:
+            _report_conn.close()
+    
+    report = {
+        'version': VERSION,
+        'imputationMethod': IMPUTATION_METHOD,
+        'epsilon': GAC_SCORE_EPSILON,
+        'generatedAt': datetime.now(timezone.utc).isoformat(),
+        'durationSeconds': (datetime.now() - start_time).total_seconds(),
+        'polls': summaries
+    }
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    logger.info(f"Dry-run report for {len(poll_ids)} polls written in {report['durationSeconds']:.1f}s")
+    return report
 
 def fetch_polls_with_changes(cursor):
+    """
+    Polls with votes newer than their statements' last calculation, stalest
+    first. staleSince is the time of the oldest such vote, so together with
+    uid it gives every poll a stable place in the order until it is scored.
+    """
     query = """
-        SELECT DISTINCT "Poll".uid
+        SELECT "Poll".uid, MIN(GREATEST("Vote"."createdAt", "Vote"."updatedAt")) AS "staleSince"
         FROM "Poll"
         JOIN "Statement" ON "Poll".uid = "Statement"."pollId"
         JOIN "Vote" ON "Statement".uid = "Vote"."statementId"
@@ -406,7 +962,9 @@ def fetch_polls_with_changes(cursor):
         AND EXISTS (
             SELECT 1 FROM "Vote" v
             WHERE v."statementId" = "Statement".uid
-        );
+        )
+        GROUP BY "Poll".uid
+        ORDER BY "staleSince", "Poll".uid;
     """
     cursor.execute(query)
     columns = [col[0] for col in cursor.description]
@@ -492,27 +1050,59 @@ def generate_vote_matrix(statements, votes, participants):
     
     return vote_df
 
-def calculate_cosine_similarity(matrix):
+SIMILARITY_KERNELS = ('float', 'bitset')
+
+# Similarity kernel for ternary vote matrices: float64 matrix products, or
+# popcounts over packed agree/disagree/voted bitsets, each 1/64 the size of a
+# float64 matrix, for very wide polls
+SIMILARITY_KERNEL = os.getenv("GAC_SIMILARITY_KERNEL", "float")
+
+def calculate_cosine_similarity(matrix, kernel=None):
     """Calculate pairwise cosine similarities between participants with realistic confidence scaling."""
-    valid_votes_mask = (~np.isnan(matrix.values)).astype(np.float64)
-    common_votes = valid_votes_mask @ valid_votes_mask.T
+    kernel = kernel or SIMILARITY_KERNEL
+    if kernel not in SIMILARITY_KERNELS:
+        raise ValueError(f"Unknown similarity kernel: {kernel}")
+    values = matrix.to_numpy(dtype=np.float64)
+    if kernel == 'bitset' and is_ternary(values):
+        similarities = _bitset_cosine_similarity_values(VoteBitsets.from_values(values))
+    else:
+        similarities = _cosine_similarity_values(values)
+    return pd.DataFrame(similarities, index=matrix.index, columns=matrix.index)
+
+def is_ternary(values):
+    """Whether every vote is 1, -1, 0 or missing, so it fits in bitsets."""
+    return bool(np.isin(values[~np.isnan(values)], VOTE_VALUES_ARRAY).all())
+
+def _bitset_cosine_similarity_values(bitsets):
+    """_cosine_similarity_values computed from packed vote bitsets."""
+    common_votes, dot_products = pairwise_vote_products(bitsets, bitsets)
+    norms = np.sqrt(bitsets.vote_counts().astype(np.float64))
+    norms[norms == 0] = 1
+    confidence = np.sqrt(common_votes / (common_votes + 5))
+    return dot_products / np.outer(norms, norms) * confidence
+
+def _cosine_similarity_values(values):
+    """
+    Confidence-scaled cosine similarities of the rows of a (..., participants, statements)
+    array with NaN for missing votes; leading dimensions are batched over.
+    """
+    valid_votes_mask = (~np.isnan(values)).astype(np.float64)
+    common_votes = valid_votes_mask @ np.swapaxes(valid_votes_mask, -1, -2)
     
-    vote_matrix_filled = np.nan_to_num(matrix.values, nan=0, copy=True)
+    vote_matrix_filled = np.nan_to_num(values, nan=0, copy=True)
     
     # Calculate normalized vote similarities
-    norms = np.linalg.norm(vote_matrix_filled, axis=1)
+    norms = np.linalg.norm(vote_matrix_filled, axis=-1)
     norms[norms == 0] = 1
-    vote_matrix_normalized = vote_matrix_filled / norms[:, np.newaxis]
-    vote_similarities = np.dot(vote_matrix_normalized, vote_matrix_normalized.T)
+    vote_matrix_normalized = vote_matrix_filled / norms[..., np.newaxis]
+    vote_similarities = vote_matrix_normalized @ np.swapaxes(vote_matrix_normalized, -1, -2)
     
     # New confidence scaling that rises more quickly for realistic vote counts
     # Square root makes confidence rise more quickly initially while still smoothly approaching 1
     # Dividing by 5 means 5 common votes gives 0.5 confidence, 20 common votes gives 0.8 confidence
     confidence = np.sqrt(common_votes / (common_votes + 5))
     
-    similarities = vote_similarities * confidence
-    
-    return pd.DataFrame(similarities, index=matrix.index, columns=matrix.index)
+    return vote_similarities * confidence
 
 def cosine_impute(vote_matrix, n_neighbors):
     """Impute missing votes using cosine similarity with realistic confidence scaling."""
@@ -551,20 +1141,304 @@ def cosine_impute(vote_matrix, n_neighbors):
     
     return imputed_matrix
 
-def impute_missing_votes(vote_matrix):
+def _normalized_votes(values, rows=slice(None)):
+    """
+    Missing votes filled with 0, the vote mask and unit-length vote rows for
+    the selected rows. values may be an np.memmap; only those rows are read.
+    """
+    block = np.asarray(values[rows], dtype=np.float64)
+    mask = (~np.isnan(block)).astype(np.float64)
+    filled = np.nan_to_num(block, nan=0.0)
+    norms = np.linalg.norm(filled, axis=1)
+    norms[norms == 0] = 1
+    return filled, mask, filled / norms[:, np.newaxis]
+
+# Vote values per block in the row-blocked passes over (possibly memory-mapped)
+# vote matrices, about 32MB of float64
+BLOCK_ELEMENTS = 1 << 22
+
+def _row_blocks(n_rows, n_columns, block_elements=None):
+    """Row slices covering n_rows, each with about block_elements values."""
+    block_rows = max(1, (block_elements or BLOCK_ELEMENTS) // max(n_columns, 1))
+    for start in range(0, n_rows, block_rows):
+        yield slice(start, min(start + block_rows, n_rows))
+
+def _without_nan(values, block_elements=None):
+    """
+    values with NaN replaced by 0. Arrays without NaN, such as imputed or
+    memory-mapped matrices, are returned as they are instead of copied; the
+    check runs in row blocks.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    for rows in _row_blocks(len(values), values.shape[1] if values.ndim > 1 else 1, block_elements):
+        if np.isnan(values[rows]).any():
+            return np.nan_to_num(values, nan=0.0)
+    return values
+
+def _row_squared_norms(values, block_elements=None):
+    """Squared norm of every row, computed in row blocks."""
+    norms = np.empty(len(values))
+    for rows in _row_blocks(len(values), values.shape[1], block_elements):
+        norms[rows] = np.einsum('ij,ij->i', values[rows], values[rows])
+    return norms
+
+def _spill_array(spill_dir, name, shape, dtype):
+    """An empty array, or a .npy-backed np.memmap in spill_dir when one is given."""
+    if spill_dir is None:
+        return np.empty(shape, dtype=dtype)
+    os.makedirs(spill_dir, exist_ok=True)
+    return np.lib.format.open_memmap(os.path.join(spill_dir, f"{name}.npy"), mode='w+', dtype=dtype, shape=shape)
+
+def exact_cosine_neighbors(values, n_neighbors, block_size=1024, spill_dir=None):
+    """
+    The n_neighbors most similar participants (by absolute confidence-scaled
+    cosine similarity) of every row.
+
+    Rows are compared block_size x block_size at a time, keeping a running
+    top list per row, so only a few row blocks of values are in memory and
+    values can be an np.memmap larger than RAM. With spill_dir, the neighbor
+    lists are written to neighbors.npy and neighbor_similarities.npy there.
+    """
+    n_rows = len(values)
+    neighbors = _spill_array(spill_dir, 'neighbors', (n_rows, n_neighbors), np.int64)
+    neighbor_similarities = _spill_array(spill_dir, 'neighbor_similarities', (n_rows, n_neighbors), np.float64)
+
+    for start in range(0, n_rows, block_size):
+        rows = np.arange(start, min(start + block_size, n_rows))
+        _, mask, normalized = _normalized_votes(values, slice(start, start + block_size))
+        best = np.full((len(rows), n_neighbors), -1, dtype=np.int64)
+        best_ranking = np.full((len(rows), n_neighbors), -np.inf)
+        best_similarities = np.zeros((len(rows), n_neighbors))
+
+        for column_start in range(0, n_rows, block_size):
+            columns = np.arange(column_start, min(column_start + block_size, n_rows))
+            if column_start == start:
+                column_mask, column_normalized = mask, normalized
+            else:
+                _, column_mask, column_normalized = _normalized_votes(values, slice(column_start, column_start + block_size))
+            common_votes = mask @ column_mask.T
+            similarities = (normalized @ column_normalized.T) * np.sqrt(common_votes / (common_votes + 5))
+            ranking = np.abs(similarities)
+            ranking[rows[:, np.newaxis] == columns] = -np.inf
+            top = np.argsort(-ranking, axis=1, kind='stable')[:, :n_neighbors]
+
+            # Earlier blocks hold lower indices, so a stable sort keeps nlargest's tie order
+            candidates = np.hstack([best, columns[top]])
+            candidate_ranking = np.hstack([best_ranking, np.take_along_axis(ranking, top, axis=1)])
+            candidate_similarities = np.hstack([best_similarities, np.take_along_axis(similarities, top, axis=1)])
+            keep = np.argsort(-candidate_ranking, axis=1, kind='stable')[:, :n_neighbors]
+            best = np.take_along_axis(candidates, keep, axis=1)
+            best_ranking = np.take_along_axis(candidate_ranking, keep, axis=1)
+            best_similarities = np.take_along_axis(candidate_similarities, keep, axis=1)
+
+        neighbors[rows] = best
+        neighbor_similarities[rows] = best_similarities
+
+    return neighbors, neighbor_similarities
+
+def _pair_similarities(mask, normalized, query_idx, candidate_idx, chunk_size):
+    """Confidence-scaled cosine similarities of (query, candidate) row pairs."""
+    similarities = np.empty(len(query_idx), dtype=normalized.dtype)
+    for start in range(0, len(query_idx), chunk_size):
+        q = query_idx[start:start + chunk_size]
+        c = candidate_idx[start:start + chunk_size]
+        common_votes = np.einsum('ij,ij->i', mask[q], mask[c])
+        cosine = np.einsum('ij,ij->i', normalized[q], normalized[c])
+        similarities[start:start + chunk_size] = cosine * np.sqrt(common_votes / (common_votes + 5))
+    return similarities
+
+def _merge_neighbors(candidates, scores, n_neighbors):
+    """
+    Best n_neighbors distinct candidates per row by score. Candidates of -1
+    are empty slots; rows with fewer candidates keep -1 padding.
+    """
+    order = np.argsort(candidates, axis=1, kind='stable')
+    candidates = np.take_along_axis(candidates, order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+    duplicate = np.zeros(candidates.shape, dtype=bool)
+    duplicate[:, 1:] = candidates[:, 1:] == candidates[:, :-1]
+    scores[duplicate | (candidates < 0)] = -np.inf
+
+    best = np.argsort(-scores, axis=1, kind='stable')[:, :n_neighbors]
+    candidates = np.take_along_axis(candidates, best, axis=1)
+    scores = np.take_along_axis(scores, best, axis=1)
+    candidates[np.isinf(scores)] = -1
+    return candidates, scores
+
+def ann_cosine_neighbors(values, n_neighbors, n_tables=4, bucket_size=64, seed=0):
+    """
+    Approximate exact_cosine_neighbors in near-linear time.
+
+    Candidates come from a sign-random-projection LSH index over the
+    normalized vote vectors. Each probed bucket is scored against the
+    participants probing it with one small float32 matrix product, and the
+    best candidates of every table are merged into a running top list. The
+    similarities of the kept neighbors are then recomputed in float64.
+    """
+    n_rows, n_statements = values.shape
+    filled, mask, normalized = _normalized_votes(values)
+    index = SignRandomProjectionIndex(normalized, n_tables=n_tables, bucket_size=bucket_size, seed=seed)
+    mask32, normalized32 = mask.astype(np.float32), normalized.astype(np.float32)
+
+    neighbors = np.full((n_rows, n_neighbors), -1, dtype=np.int64)
+    scores = np.full((n_rows, n_neighbors), -np.inf, dtype=np.float32)
+    for table in index.tables:
+        # Per probe kind, the best n_neighbors members of the probed bucket
+        candidates = np.full((n_rows, 4 * n_neighbors), -1, dtype=np.int64)
+        candidate_scores = np.full((n_rows, 4 * n_neighbors), -np.inf, dtype=np.float32)
+        for probe, queries, members in index.probe_groups(table):
+            common_votes = mask32[queries] @ mask32[members].T
+            similarities = (normalized32[queries] @ normalized32[members].T) * np.sqrt(common_votes / (common_votes + 5))
+            ranking = np.abs(similarities)
+            ranking[queries[:, np.newaxis] == members] = -np.inf
+
+            k = min(n_neighbors, len(members))
+            top = np.argpartition(-ranking, k - 1, axis=1)[:, :k] if len(members) > k else np.broadcast_to(np.arange(k), (len(queries), k))
+            columns = slice(probe * n_neighbors, probe * n_neighbors + k)
+            candidates[queries, columns] = members[top]
+            candidate_scores[queries, columns] = np.take_along_axis(ranking, top, axis=1)
+
+        neighbors, scores = _merge_neighbors(
+            np.hstack([neighbors, candidates]), np.hstack([scores, candidate_scores]), n_neighbors
+        )
+
+    found = neighbors >= 0
+    query_idx = np.broadcast_to(np.arange(n_rows)[:, np.newaxis], neighbors.shape)[found]
+    # Gathered rows are processed in chunks of about 16M values
+    pair_chunk = max(1, 2 ** 24 // max(n_statements, 1))
+    neighbor_similarities = np.zeros((n_rows, n_neighbors))
+    neighbor_similarities[found] = _pair_similarities(mask, normalized, query_idx, neighbors[found], pair_chunk)
+    return neighbors, neighbor_similarities
+
+def impute_from_neighbors(values, neighbors, neighbor_similarities, block_size=1024, out=None):
+    """
+    Fill the missing votes of each row from its neighbor lists with the
+    cosine_impute formula: the similarity-weighted mean of the neighbors'
+    votes, scaled by cbrt(w / (w + 1)) where w is the total absolute weight.
+    Neighbors of -1 are padding.
+
+    Rows are imputed block by block, reading only the block's neighbor rows,
+    so values, the neighbor lists and out may all be np.memmaps.
+    """
+    imputed = out if out is not None else np.empty(values.shape)
+
+    for start in range(0, len(values), block_size):
+        rows = slice(start, start + block_size)
+        block_values = np.asarray(values[rows], dtype=np.float64)
+        block_neighbors = np.asarray(neighbors[rows])
+        present = block_neighbors >= 0
+        block_neighbors = np.where(present, block_neighbors, 0)
+        similarities = np.where(present, neighbor_similarities[rows], 0.0)
+
+        neighbor_votes = np.asarray(values[block_neighbors.ravel()], dtype=np.float64)
+        neighbor_votes = neighbor_votes.reshape(block_neighbors.shape + (values.shape[1],))
+        weights = np.einsum('bn,bns->bs', np.abs(similarities), (~np.isnan(neighbor_votes)).astype(np.float64))
+        weighted_votes = np.einsum('bn,bns->bs', similarities, np.nan_to_num(neighbor_votes, nan=0.0))
+        raw_imputed = np.divide(weighted_votes, weights, out=np.zeros_like(weights), where=weights > 0)
+        estimates = raw_imputed * np.cbrt(weights / (weights + 1))
+        imputed[rows] = np.where(np.isnan(block_values), estimates, block_values)
+
+    return imputed
+
+def blocked_cosine_impute(values, n_neighbors, spill_dir=None, block_size=1024):
+    """
+    Out-of-core cosine imputation of a (possibly memory-mapped) vote array.
+
+    Neighbor lists and the imputed matrix are spilled to .npy files in
+    spill_dir; the imputed matrix is returned as a read-only np.memmap. Without
+    a spill_dir a new temporary directory is used (see the memmap's filename),
+    which the caller removes when done.
+    """
+    if spill_dir is None:
+        spill_dir = tempfile.mkdtemp(prefix='gac-spill-')
+    neighbors, neighbor_similarities = exact_cosine_neighbors(values, n_neighbors, block_size, spill_dir)
+    imputed = _spill_array(spill_dir, 'imputed', values.shape, np.float64)
+    impute_from_neighbors(values, neighbors, neighbor_similarities, block_size, out=imputed)
+    for spilled in (neighbors, neighbor_similarities, imputed):
+        spilled.flush()
+    return np.load(os.path.join(spill_dir, 'imputed.npy'), mmap_mode='r')
+
+def ann_cosine_impute(vote_matrix, n_neighbors, **index_options):
+    """cosine_impute with neighbors retrieved from an LSH index instead of all P² similarities."""
+    values = vote_matrix.to_numpy(dtype=np.float64)
+    neighbors, neighbor_similarities = ann_cosine_neighbors(values, n_neighbors, **index_options)
+    imputed_values = impute_from_neighbors(values, neighbors, neighbor_similarities)
+    return pd.DataFrame(imputed_values, index=vote_matrix.index, columns=vote_matrix.columns)
+
+def sds_impute(vote_matrix, k_user=3.0, k_statement=2.0, w_user=0.6, w_statement=0.4):
+    """
+    Impute missing votes with Similarity-Degree Scoring (SDS), computed for all cells at once.
+    
+    User similarity is the mean product of votes on commonly voted statements,
+    scaled by overlap confidence n / (n + k_user). Overlap counts and agreement
+    sums come from mask and filled-value matrix products, and the user-based
+    prediction for every missing cell is a single similarity-weighted matmul.
+    It is blended with each participant's shrunk mean vote.
+    """
+    imputed_values = _sds_impute_values(vote_matrix.values, k_user, k_statement, w_user, w_statement)
+    return pd.DataFrame(imputed_values, index=vote_matrix.index, columns=vote_matrix.columns)
+
+def _sds_impute_values(values, k_user=3.0, k_statement=2.0, w_user=0.6, w_statement=0.4):
+    """SDS imputation of a (..., participants, statements) array; leading dimensions are batched over."""
+    valid = ~np.isnan(values)
+    mask = valid.astype(np.float64)
+    filled = np.nan_to_num(values, nan=0.0)
+    
+    # Pairwise overlaps and agreement over commonly voted statements
+    n_overlaps = mask @ np.swapaxes(mask, -1, -2)
+    agreement_sums = filled @ np.swapaxes(filled, -1, -2)
+    agreement_ratios = np.divide(agreement_sums, n_overlaps, out=np.zeros_like(agreement_sums), where=n_overlaps > 0)
+    similarities = agreement_ratios * (n_overlaps / (n_overlaps + k_user))
+    
+    # User-based prediction; a participant's own missing cell never contributes
+    weighted_votes = similarities @ filled
+    abs_weights = np.abs(similarities) @ mask
+    user_pred = np.where(abs_weights > 0, weighted_votes / (abs_weights + 1e-10), 0.0)
+    
+    # Participant's own voting tendency, shrunk towards 0 for few votes
+    n_votes = mask.sum(axis=-1)
+    mean_votes = np.divide(filled.sum(axis=-1), n_votes, out=np.zeros_like(n_votes), where=n_votes > 0)
+    vote_patterns = mean_votes * (n_votes / (n_votes + k_statement))
+    
+    imputed = np.clip(w_user * user_pred + w_statement * vote_patterns[..., np.newaxis], -0.99, 0.99)
+    return np.where(valid, values, imputed)
+
+IMPUTATION_METHODS = ('cosine', 'sds')
+
+# Imputation strategy used by impute_missing_votes unless one is passed explicitly
+IMPUTATION_METHOD = os.getenv("GAC_IMPUTATION_METHOD", "cosine")
+
+# Polls with at least this many participants find cosine neighbors through
+# an LSH index instead of computing all pairwise similarities
+ANN_MIN_PARTICIPANTS = int(os.getenv("GAC_ANN_MIN_PARTICIPANTS", "5000"))
+
+def impute_missing_votes(vote_matrix, method=None):
     """
-    Impute missing votes with adaptive neighbor selection using cosine similarity.
+    Impute missing votes with the selected strategy:
+    - cosine: adaptive neighbor selection using cosine similarity (default),
+      approximate above ANN_MIN_PARTICIPANTS participants
+    - sds: vectorized Similarity-Degree Scoring
     Works for all group sizes.
     """
-    n_participants = len(vote_matrix)
-    logger.info(f"Imputing missing votes for {n_participants} participants")
+    method = method or IMPUTATION_METHOD
+    if method not in IMPUTATION_METHODS:
+        raise ValueError(f"Unknown imputation method: {method}")
     
-    # Adaptive number of neighbors - for small groups, use n-1 neighbors
-    n_neighbors = min(n_participants - 1, max(2, int(np.log2(n_participants))))
-    logger.info(f"Using {n_neighbors} neighbors for imputation")
+    n_participants = len(vote_matrix)
+    logger.info(f"Imputing missing votes for {n_participants} participants using {method} imputation")
     
     try:
-        imputed = cosine_impute(vote_matrix, n_neighbors)
+        if method == 'sds':
+            imputed = sds_impute(vote_matrix)
+        else:
+            # Adaptive number of neighbors - for small groups, use n-1 neighbors
+            n_neighbors = min(n_participants - 1, max(2, int(np.log2(n_participants))))
+            logger.info(f"Using {n_neighbors} neighbors for imputation")
+            if n_participants >= ANN_MIN_PARTICIPANTS:
+                logger.info("Using approximate nearest neighbors")
+                imputed = ann_cosine_impute(vote_matrix, n_neighbors)
+            else:
+                imputed = cosine_impute(vote_matrix, n_neighbors)
         logger.info("Successfully imputed missing votes")
         return imputed
     except Exception as e:
@@ -617,11 +1491,17 @@ def perform_pca(data, n_components):
         logger.info("Linear algebra error in PCA, using original data")
         return data
 
-def perform_kmeans(data, k, max_iterations=100):
+def perform_kmeans(data, k, max_iterations=100, rng=None, squared_norms=None):
     """
     Perform KMeans clustering using numpy with improved stability.
+    
+    rng is a np.random.Generator (the global NumPy random state by default),
+    so concurrent runs can each have their own. squared_norms are the
+    precomputed squared row norms of data; when given, distances are
+    expanded as ||x||² - 2x·c + ||c||² so callers trying several k share them.
     """
     logger.info(f"Performing KMeans clustering with k={k}")
+    rng = rng or np.random
     
     n_samples = data.shape[0]
     
@@ -632,27 +1512,30 @@ def perform_kmeans(data, k, max_iterations=100):
     
     try:
         # Ensure data is float64 and handle NaN values
-        data_array = np.array(data, dtype=np.float64)
+        data_array = np.asarray(data, dtype=np.float64)
         if np.isnan(data_array).any():
             data_array = np.nan_to_num(data_array, nan=0.0)
         
         # Initialize centroids using better sampling
-        centroid_indices = np.random.choice(n_samples, k, replace=False)
+        centroid_indices = rng.choice(n_samples, k, replace=False)
         centroids = data_array[centroid_indices]
         
         # Handle case where initial centroids are identical
         if np.allclose(centroids, centroids[0]):
             logger.info("Initial centroids are identical, adding small random noise")
-            centroids += np.random.normal(0, 1e-4, centroids.shape)
+            centroids += rng.normal(0, 1e-4, centroids.shape)
         
         prev_labels = None
         
         for iteration in range(max_iterations):
             # Calculate distances with numerical stability
-            distances = np.zeros((n_samples, k))
-            for i in range(k):
-                diff = data_array - centroids[i]
-                distances[:, i] = np.sum(np.square(diff), axis=1)
+            if squared_norms is not None:
+                distances = squared_norms[:, np.newaxis] - 2 * (data_array @ centroids.T) + np.sum(np.square(centroids), axis=1)
+            else:
+                distances = np.zeros((n_samples, k))
+                for i in range(k):
+                    diff = data_array - centroids[i]
+                    distances[:, i] = np.sum(np.square(diff), axis=1)
             
             # Assign clusters
             labels = np.argmin(distances, axis=1)
@@ -672,7 +1555,7 @@ def perform_kmeans(data, k, max_iterations=100):
                 else:
                     # If cluster is empty, reinitialize its centroid
                     logger.info(f"Reinitializing empty cluster {i}")
-                    centroids[i] = data_array[np.random.choice(n_samples)]
+                    centroids[i] = data_array[rng.choice(n_samples)]
         
         return labels.astype(np.int64)
         
@@ -681,6 +1564,76 @@ def perform_kmeans(data, k, max_iterations=100):
         # Fallback to single cluster
         return np.zeros(n_samples, dtype=np.int64)
 
+# Polls with at least this many participants are clustered with mini-batch k-means
+MINIBATCH_MIN_PARTICIPANTS = int(os.getenv("GAC_MINIBATCH_MIN_PARTICIPANTS", "10000"))
+
+# Participants sampled per mini-batch k-means step
+MINIBATCH_SIZE = int(os.getenv("GAC_MINIBATCH_SIZE", "1024"))
+
+def assign_to_centroids(data_array, centroids, block_size=65536):
+    """Index of the nearest centroid of every row, computed in row blocks."""
+    centroid_norms = np.sum(np.square(centroids), axis=1)
+    labels = np.empty(len(data_array), dtype=np.int64)
+    for start in range(0, len(data_array), block_size):
+        block = data_array[start:start + block_size]
+        # ||x - c||² up to the per-row constant ||x||²
+        distances = centroid_norms - 2 * (block @ centroids.T)
+        labels[start:start + block_size] = np.argmin(distances, axis=1)
+    return labels
+
+def perform_minibatch_kmeans(data, k, batch_size=None, max_iterations=100, tol=1e-4, rng=None):
+    """
+    Mini-batch k-means: each step assigns a random sample of batch_size
+    participants and moves their centroids towards them with per-centroid
+    learning rates 1 / (points seen). Stops once no centroid moves more than
+    tol (Euclidean distance), then labels every participant in one full
+    assignment pass. Cost per step does not grow with the number of
+    participants. rng is as for perform_kmeans.
+    """
+    batch_size = batch_size or MINIBATCH_SIZE
+    rng = rng or np.random
+    logger.info(f"Performing mini-batch KMeans clustering with k={k}, batch size {batch_size}")
+    
+    n_samples = data.shape[0]
+    
+    if n_samples < k:
+        logger.info(f"Too few samples ({n_samples}) for {k} clusters, adjusting k")
+        k = max(2, n_samples)
+    
+    try:
+        data_array = _without_nan(data)
+        
+        centroids = data_array[rng.choice(n_samples, k, replace=False)].copy()
+        if np.allclose(centroids, centroids[0]):
+            logger.info("Initial centroids are identical, adding small random noise")
+            centroids += rng.normal(0, 1e-4, centroids.shape)
+        
+        counts = np.zeros(k)
+        batch_size = min(batch_size, n_samples)
+        for iteration in range(max_iterations):
+            # Sorted indices read a memory-mapped matrix front to back
+            batch = data_array[np.sort(rng.choice(n_samples, batch_size, replace=False))]
+            batch_labels = assign_to_centroids(batch, centroids)
+            
+            previous = centroids.copy()
+            batch_counts = np.bincount(batch_labels, minlength=k)
+            batch_sums = np.zeros_like(centroids)
+            np.add.at(batch_sums, batch_labels, batch)
+            counts += batch_counts
+            # Moving each centroid by 1/count per point towards it, summed over the batch
+            seen = batch_counts > 0
+            centroids[seen] += (batch_sums[seen] - batch_counts[seen, np.newaxis] * centroids[seen]) / counts[seen, np.newaxis]
+            
+            if np.max(np.linalg.norm(centroids - previous, axis=1)) < tol:
+                logger.info(f"Mini-batch KMeans converged after {iteration + 1} iterations")
+                break
+        
+        return assign_to_centroids(data_array, centroids)
+        
+    except Exception as e:
+        logger.error(f"Mini-batch KMeans clustering failed: {e}")
+        return np.zeros(n_samples, dtype=np.int64)
+
 def compute_silhouette_score(data, labels):
     """
     Compute silhouette score manually.
@@ -705,6 +1658,68 @@ def compute_silhouette_score(data, labels):
     s = np.nan_to_num(s)  # Handle division by zero
     return np.mean(s)
 
+# Threads evaluating candidate cluster counts; NumPy releases the GIL in its kernels
+CLUSTER_WORKERS = int(os.getenv("GAC_CLUSTER_WORKERS", "4"))
+
+# Below this many participants candidate counts are clustered one after another,
+# since each run is cheaper than handing it to a thread
+CLUSTER_PARALLEL_MIN_PARTICIPANTS = int(os.getenv("GAC_CLUSTER_PARALLEL_MIN_PARTICIPANTS", "2000"))
+
+@functools.lru_cache(maxsize=None)
+def _cluster_executor(workers):
+    """
+    Thread pool shared by every evaluate_k_candidates call with this many
+    workers. Spawned report workers start with an empty cache and build
+    their own.
+    """
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gac-kmeans')
+
+def evaluate_k_candidates(data, ks, kmeans=perform_kmeans, workers=None, squared_norms=None):
+    """
+    Run kmeans for the candidate ks.
+    
+    Polls with at least CLUSTER_PARALLEL_MIN_PARTICIPANTS participants run
+    every k concurrently in a shared thread pool; smaller polls run each k
+    only when the caller asks for the next candidate, so a caller that stops
+    at the first acceptable k skips the rest. Each run gets its own random
+    generator seeded from the global random state, so results stay
+    reproducible under np.random.seed. Yields one entry per k that did not
+    fail, in the order of ks, with labels, cluster sizes and inertia (total
+    squared distance to the cluster means). squared_norms are the squared
+    row norms of data, computed here when not given.
+    """
+    ks = list(ks)
+    if squared_norms is None:
+        squared_norms = _row_squared_norms(data)
+    seeds = np.random.randint(0, 2**31 - 1, size=len(ks))
+    
+    def run(k, seed):
+        try:
+            labels = kmeans(data, k, rng=np.random.default_rng(seed))
+        except Exception as e:
+            logger.warning(f"Clustering failed with k={k}: {e}")
+            return None
+        sizes = np.bincount(labels)
+        # Per cluster: sum of ||x||² minus size x ||mean||²
+        sums = np.zeros((len(sizes), data.shape[1]))
+        for rows in _row_blocks(len(data), data.shape[1]):
+            np.add.at(sums, labels[rows], data[rows])
+        occupied = sizes > 0
+        inertia = squared_norms.sum() - np.sum(np.square(sums[occupied]).sum(axis=1) / sizes[occupied])
+        return {'k': k, 'labels': labels, 'sizes': sizes, 'inertia': float(max(inertia, 0.0))}
+    
+    workers = max(1, min(workers or CLUSTER_WORKERS, len(ks)))
+    if workers == 1 or len(data) < CLUSTER_PARALLEL_MIN_PARTICIPANTS:
+        results = (run(k, seed) for k, seed in zip(ks, seeds))
+    else:
+        # Split this worker's BLAS threads between the concurrent runs
+        blas_threads = max(1, thread_budget.split_budget()[1] // workers)
+        with thread_budget.blas_threads(blas_threads):
+            executor = _cluster_executor(workers)
+            futures = [executor.submit(run, k, seed) for k, seed in zip(ks, seeds)]
+            results = [future.result() for future in futures]
+    return (result for result in results if result is not None)
+
 def perform_clustering(vote_matrix):
     """
     Perform clustering with adaptive scaling based on group size.
@@ -712,9 +1727,9 @@ def perform_clustering(vote_matrix):
     n_participants = len(vote_matrix)
     logger.info(f"Starting clustering with {n_participants} participants")
     
-    # Convert to numpy array and handle missing values
-    data = vote_matrix.values
-    data = np.nan_to_num(data)
+    # Convert to numpy array and handle missing values; NaN-free (e.g.
+    # memory-mapped, imputed) matrices are used without a copy
+    data = _without_nan(vote_matrix)
     
     # For very small groups (< 4), use voting pattern to determine clusters
     if n_participants < 4:
@@ -725,130 +1740,221 @@ def perform_clustering(vote_matrix):
     max_k = min(5, max(2, int(np.sqrt(n_participants/4))))
     logger.info(f"Maximum clusters set to {max_k}")
     
-    # Try clustering with decreasing k until valid clusters found
-    for k in range(max_k, 1, -1):
-        try:
-            labels = perform_kmeans(data, k)
-            # Check minimum cluster size (log2 scaling provides good minimums)
-            min_size = max(2, int(np.log2(n_participants)))
-            sizes = np.bincount(labels)
-            
-            if np.all(sizes >= min_size):
-                logger.info(f"Found valid clustering with {k} clusters")
-                logger.info(f"Cluster sizes: {sizes}")
-                return labels
-            else:
-                logger.info(f"Clusters too small with k={k}, trying fewer clusters")
-                
-        except Exception as e:
-            logger.warning(f"Clustering failed with k={k}: {e}")
-            continue
+    # Shared by every candidate k for the distances and inertia
+    squared_norms = _row_squared_norms(data)
+    
+    # Large polls use mini-batch updates so clustering cost stays nearly flat
+    kmeans = functools.partial(perform_kmeans, squared_norms=squared_norms)
+    if n_participants >= MINIBATCH_MIN_PARTICIPANTS:
+        logger.info("Using mini-batch KMeans")
+        kmeans = perform_minibatch_kmeans
+    
+    # Keep the largest k whose clusters all reach the minimum size (log2
+    # scaling provides good minimums); small polls stop trying ks there
+    min_size = max(2, int(np.log2(n_participants)))
+    for candidate in evaluate_k_candidates(data, range(max_k, 1, -1), kmeans, squared_norms=squared_norms):
+        sizes = candidate['sizes']
+        if np.all(sizes >= min_size):
+            logger.info(f"Found valid clustering with {candidate['k']} clusters")
+            logger.info(f"Cluster sizes: {sizes}, inertia {candidate['inertia']:.2f}")
+            return candidate['labels']
+        else:
+            logger.info(f"Clusters too small with k={candidate['k']}, trying fewer clusters")
             
     # Fallback to single cluster
     logger.info("No valid clustering found, using single cluster")
     return np.zeros(n_participants)
 
-def calculate_gac_scores(vote_matrix, clusters):
+def calculate_gac_scores(vote_matrix, clusters, observed=None):
     """
     Calculate GAC scores with adaptive pseudocount scaling.
+    
+    Each statement's entry also lists its per-cluster aggregates as
+    (cluster_id, agree_count, active_count, cluster_size) tuples and, unless
+    the bootstrap is disabled, the bootstrap interval and constitutionable
+    share from bootstrap_intervals. Given the mask of real (non-imputed)
+    votes, entries also get a routing 'priority' from priority_scores.
+    
+    vote_matrix may also be a plain or memory-mapped array (statements are
+    then keyed by column index); every pass over it runs in row blocks.
     """
     n_participants = len(vote_matrix)
     gac_scores = {}
     
     logger.info(f"Calculating GAC scores for {n_participants} participants")
     
-    # Base pseudocount scales logarithmically but stays small
-    base_pseudocount = 0.3 * np.log2(1 + n_participants/10)
-    logger.info(f"Base pseudocount: {base_pseudocount}")
+    values = np.asarray(vote_matrix, dtype=np.float64)
+    cluster_ids, labels = np.unique(np.asarray(clusters), return_inverse=True)
+    n_agree, n_active, cluster_sizes = cluster_stats(values, labels, len(cluster_ids))
+    scores, total_votes = batch_calculate_gac_scores(n_agree, n_active, cluster_sizes, np.array([n_participants]))
+    intervals = bootstrap_intervals(values, labels)
+    priorities = priority_scores(observed, labels, scores[0], intervals) if observed is not None else None
     
-    for statement in vote_matrix.columns:
-        gac = 1.0
-        total_votes = 0
-        
-        for cluster_id in np.unique(clusters):
-            cluster_votes = vote_matrix[statement][clusters == cluster_id]
-            
-            # Remove PASS votes
-            active_votes = cluster_votes[cluster_votes != 0]
-            n_active = len(active_votes)
-            total_votes += n_active
-            
-            if n_active == 0:
-                p_agree = 0.5
-            else:
-                # Calculate agreement with pseudocount stabilization
-                n_agree = np.sum(active_votes > 0)
-                p_agree = (n_agree + base_pseudocount) / (n_active + 2 * base_pseudocount)
-                
-                # Weight by active participation
-                group_weight = n_active / len(cluster_votes)
-                p_agree = p_agree ** group_weight
-                
-            gac *= p_agree
-            
+    statement_ids = getattr(vote_matrix, 'columns', range(values.shape[1]))
+    for j, statement in enumerate(statement_ids):
         gac_scores[statement] = {
-            'score': gac,
-            'n_votes': total_votes,
-            'n_participants': n_participants
+            'score': scores[0, j],
+            'n_votes': int(total_votes[0, j]),
+            'n_participants': n_participants,
+            'clusters': cluster_entries(cluster_ids, n_agree[0, :, j], n_active[0, :, j], cluster_sizes[0, :, 0]),
+            **interval_entry(intervals, j),
+            **priority_entry(priorities, j)
         }
         
     return gac_scores
 
-def update_statements(cursor, conn, statements, gac_scores, votes, model_id):
-    # Create a set of statement IDs that have votes
-    statements_with_votes = set(vote['statementId'] for vote in votes)
+def cluster_entries(cluster_ids, n_agree, n_active, cluster_sizes):
+    """(cluster_id, agree_count, active_count, cluster_size) for the non-empty clusters of one statement."""
+    return [
+        (int(cluster_id), int(agree), int(active), int(size))
+        for cluster_id, agree, active, size in zip(cluster_ids, n_agree, n_active, cluster_sizes)
+        if size > 0
+    ]
+
+# Score changes up to this size are treated as numerical noise (e.g. from k-means
+# initialization) and neither rewrite the score nor emit a GAC_SCORE_UPDATED event
+GAC_SCORE_EPSILON = float(os.getenv("GAC_SCORE_EPSILON", "0.005"))
+
+def is_material_change(old_score, old_is_const, new_score, new_is_const, epsilon=None):
+    """
+    A score update is material when there was no score yet, the score moved by
+    more than epsilon, or the constitutionable flag flipped.
+    """
+    epsilon = GAC_SCORE_EPSILON if epsilon is None else epsilon
+    if old_score is None:
+        return True
+    return abs(new_score - old_score) > epsilon or bool(old_is_const) != bool(new_is_const)
+
+def fetch_current_scores(cursor, statement_ids):
+    """Current gacScore and isConstitutionable of the given statements, in one query."""
+    cursor.execute("""
+        SELECT uid, "gacScore", "isConstitutionable"
+        FROM "Statement"
+        WHERE uid = ANY(%s::text[]);
+    """, (list(statement_ids),))
+    return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+def update_statements(cursor, conn, statements, gac_scores, votes, model_id, commit=True, epsilon=None,
+                      calculated_at=None):
+    """
+    Write new GAC scores and vote counts for a poll's statements in bulk.
+    
+    Only statements whose score changed materially (see is_material_change)
+    get a new score, constitutionable flag and GAC_SCORE_UPDATED event; the
+    rest only have lastCalculatedAt advanced. Vote counts and the routing
+    priorityScore are always written; statements without votes get the
+    highest priority. Returns the materially changed statements.
+    
+    lastCalculatedAt is set to calculated_at, the time the votes were read
+    (default: now), so votes cast while the poll was being scored still mark
+    it as changed. Vote counts are aggregated from "Vote" in the UPDATE
+    itself rather than taken from `votes`, so they include those votes too.
+    """
+    # Vote counts themselves are aggregated in SQL below
+    statements_with_votes = {vote['statementId'] for vote in votes}
     
-    # Track statements with changed GAC scores
+    scored_ids = [s['uid'] for s in statements if s['uid'] in statements_with_votes and s['uid'] in gac_scores]
+    unvoted_ids = [s['uid'] for s in statements if s['uid'] not in statements_with_votes]
+    current_scores = fetch_current_scores(cursor, scored_ids) if scored_ids else {}
+    poll_ids = {s['uid']: s['pollId'] for s in statements}
+    
+    # Track statements with materially changed GAC scores
     changed_statements = []
+    material = {'uid': [], 'score': [], 'is_const': [], 'priority': []}
+    unchanged = {'uid': [], 'priority': []}
 
-    for statement in statements:
-        statement_id = statement['uid']
-        if statement_id in statements_with_votes:
-            if statement_id in gac_scores:
-                gac_score_data = gac_scores[statement_id]
-                is_const = is_constitutionable(gac_score_data)
-                
-                # Get current GAC score before update
-                cursor.execute("""
-                    SELECT "gacScore" FROM "Statement" WHERE uid = %s;
-                """, (statement_id,))
-                result = cursor.fetchone()
-                old_score = result[0] if result else None
-                new_score = gac_score_data['score']
-                
-                # Only track changes if the score actually changed
-                if old_score != new_score:
-                    changed_statements.append({
-                        'statementId': statement_id,
-                        'oldScore': old_score,
-                        'newScore': new_score
-                    })
-                    
-                    # Create SystemEvent record directly in the database
-                    # Pass the model_id to avoid redundant database query                    
-                    create_system_event(cursor, conn, statement_id, statement['pollId'], old_score, new_score, model_id)
-                
-                cursor.execute("""
-                    UPDATE "Statement"
-                    SET "gacScore" = %s,
-                        "lastCalculatedAt" = NOW(),
-                        "isConstitutionable" = %s
-                    WHERE uid = %s;
-                """, (new_score, is_const, statement_id))
-        else:
-            # For statements without votes, ensure gacScore and lastCalculatedAt remain null
-            cursor.execute("""
-                UPDATE "Statement"
-                SET "gacScore" = NULL,
-                    "lastCalculatedAt" = NULL,
-                    "isConstitutionable" = FALSE
-                WHERE uid = %s;
-            """, (statement_id,))
-    conn.commit()
+    for statement_id in scored_ids:
+        gac_score_data = gac_scores[statement_id]
+        new_score = float(gac_score_data['score'])
+        old_score, old_is_const = current_scores.get(statement_id, (None, False))
+        is_const = confident_constitutionable(gac_score_data, old_is_const if old_score is not None else None)
+        
+        if not is_material_change(old_score, old_is_const, new_score, is_const, epsilon):
+            unchanged['uid'].append(statement_id)
+            unchanged['priority'].append(gac_score_data.get('priority'))
+            continue
+        
+        material['uid'].append(statement_id)
+        material['score'].append(new_score)
+        material['is_const'].append(is_const)
+        material['priority'].append(gac_score_data.get('priority'))
+        changed_statements.append({
+            'statementId': statement_id,
+            'oldScore': old_score,
+            'newScore': new_score
+        })
+        
+        # Create SystemEvent record directly in the database
+        # Pass the model_id to avoid redundant database query
+        create_system_event(cursor, conn, statement_id, poll_ids[statement_id], old_score, new_score, model_id)
+    
+    if material['uid']:
+        cursor.execute("""
+            UPDATE "Statement" s
+            SET "gacScore" = u.score,
+                "isConstitutionable" = u.is_const,
+                "priorityScore" = u.priority,
+                "lastCalculatedAt" = COALESCE(%s::timestamptz, NOW())
+            FROM unnest(%s::text[], %s::float8[], %s::boolean[], %s::float8[]) AS u(uid, score, is_const, priority)
+            WHERE s.uid = u.uid;
+        """, (calculated_at, material['uid'], material['score'], material['is_const'], material['priority']))
+    
+    if unchanged['uid']:
+        cursor.execute("""
+            UPDATE "Statement" s
+            SET "priorityScore" = u.priority,
+                "lastCalculatedAt" = COALESCE(%s::timestamptz, NOW())
+            FROM unnest(%s::text[], %s::float8[]) AS u(uid, priority)
+            WHERE s.uid = u.uid;
+        """, (calculated_at, unchanged['uid'], unchanged['priority']))
+    
+    # Count the votes at write time, in the same transaction, so votes the web app
+    # counted after the snapshot are not overwritten; same aggregate as update_vote_counts.py
+    if poll_ids:
+        cursor.execute("""
+            UPDATE "Statement" s
+            SET "agreeCount" = c.agree_count,
+                "disagreeCount" = c.disagree_count,
+                "passCount" = c.pass_count
+            FROM (
+                SELECT
+                    t.uid,
+                    COUNT(v.uid) FILTER (WHERE v."voteValue" = 'AGREE') AS agree_count,
+                    COUNT(v.uid) FILTER (WHERE v."voteValue" = 'DISAGREE') AS disagree_count,
+                    COUNT(v.uid) FILTER (WHERE v."voteValue" = 'PASS') AS pass_count
+                FROM unnest(%s::text[]) AS t(uid)
+                LEFT JOIN "Vote" v ON v."statementId" = t.uid
+                GROUP BY t.uid
+            ) c
+            WHERE s.uid = c.uid
+              AND (s."agreeCount", s."disagreeCount", s."passCount")
+                  IS DISTINCT FROM (c.agree_count, c.disagree_count, c.pass_count);
+        """, (sorted(poll_ids),))
+    
+    if unvoted_ids:
+        # For statements without votes, ensure gacScore and lastCalculatedAt remain null
+        cursor.execute("""
+            UPDATE "Statement"
+            SET "gacScore" = NULL,
+                "lastCalculatedAt" = NULL,
+                "isConstitutionable" = FALSE,
+                "priorityScore" = 1
+            WHERE uid = ANY(%s::text[]);
+        """, (unvoted_ids,))
+    
+    logger.info(f"Statement updates: {len(material['uid'])} material, {len(unchanged['uid'])} within epsilon, "
+                f"{len(unvoted_ids)} without votes")
+    if commit:
+        conn.commit()
     
     # Return the list of statements with changed GAC scores
     return changed_statements
 
+def constitutionable_threshold(n_participants):
+    """GAC score needed to be constitutionable; scales up for small groups but caps at 0.85."""
+    base_threshold = 0.66
+    return min(0.85, base_threshold * (1 + 2/np.log2(2 + n_participants)))
+
 def is_constitutionable(gac_data):
     """
     Determine if a statement is constitutionable with adaptive thresholds.
@@ -859,19 +1965,38 @@ def is_constitutionable(gac_data):
     else:
         raise ValueError("GAC data must be a dictionary containing 'score' and 'n_participants'")
     
-    base_threshold = 0.66
-    
-    # Threshold scales up for small groups but caps at 0.85
-#    threshold = base_threshold
-    threshold = min(0.85, base_threshold * (1 + 2/np.log2(2 + n_participants)))
+    threshold = constitutionable_threshold(n_participants)
     
     logger.debug(f"Constitutionable check: score={gac_score:.3f}, threshold={threshold:.3f}")
     
     return gac_score >= threshold
 
-def process_votes(participants, statements, votes):
+# Bootstrap share that must agree with a new constitutionable decision before it replaces the stored one
+CONSTITUTIONABLE_CONFIDENCE = float(os.getenv("GAC_CONSTITUTIONABLE_CONFIDENCE", "0.8"))
+
+def confident_constitutionable(gac_data, previous=None, confidence=None):
+    """
+    is_constitutionable with hysteresis: a statement only changes from its
+    stored flag (previous) when at least `confidence` of the bootstrap
+    replicates agree with the new decision, so statements whose score
+    hovers around the threshold keep their flag. Without a stored flag or
+    bootstrap data the point estimate decides.
+    """
+    is_const = bool(is_constitutionable(gac_data))
+    p_constitutionable = gac_data.get('p_constitutionable')
+    if previous is None or p_constitutionable is None or is_const == previous:
+        return is_const
+    confidence = CONSTITUTIONABLE_CONFIDENCE if confidence is None else confidence
+    stability = p_constitutionable if is_const else 1 - p_constitutionable
+    return is_const if stability >= confidence else bool(previous)
+
+def process_votes(participants, statements, votes, imputation_method=None, include_clusters=False):
     """
     Process votes with improved error handling and logging.
+    
+    With include_clusters=True, returns (gac_scores, cluster_assignments),
+    where cluster_assignments maps participant ID to (cluster_id, distance to
+    the cluster centroid).
     """
     logger = setup_logging()
     logger.info("Starting vote processing")
@@ -882,18 +2007,368 @@ def process_votes(participants, statements, votes):
         vote_matrix = generate_vote_matrix(statements, votes, participants)
         if vote_matrix.empty or vote_matrix.isnull().values.all():
             logger.warning("Empty vote matrix, skipping processing")
-            return {}
+            return ({}, {}) if include_clusters else {}
             
-        imputed_matrix = impute_missing_votes(vote_matrix)
+        imputed_matrix = impute_missing_votes(vote_matrix, imputation_method)
         clusters = perform_clustering(imputed_matrix)
-        gac_scores = calculate_gac_scores(imputed_matrix, clusters)
+        gac_scores = calculate_gac_scores(imputed_matrix, clusters, observed=vote_matrix.notna().values)
         
         logger.info("Successfully processed votes")
-        return gac_scores
+        if not include_clusters:
+            return gac_scores
+        return gac_scores, calculate_cluster_assignments(imputed_matrix, clusters)
         
     except Exception as e:
         logger.error(f"Error processing votes: {e}")
+        return ({}, {}) if include_clusters else {}
+
+def calculate_cluster_assignments(imputed_matrix, clusters):
+    """Map each participant (row) to (cluster_id, distance to its cluster centroid)."""
+    values = np.asarray(imputed_matrix, dtype=np.float64)
+    cluster_ids, labels = np.unique(np.asarray(clusters), return_inverse=True)
+    distances = batch_cluster_distances(values[np.newaxis], labels.reshape(1, -1), [values.shape[1]])[0]
+    return {
+        participant_id: (int(cluster_ids[label]), float(distance))
+        for participant_id, label, distance in zip(imputed_matrix.index, labels, distances)
+    }
+
+# Polls with at most this many participants are scored together by process_votes_batch
+BATCH_MAX_PARTICIPANTS = int(os.getenv("GAC_BATCH_MAX_PARTICIPANTS", "100"))
+
+# Number of small polls stacked into one padded batch
+BATCH_SIZE = int(os.getenv("GAC_BATCH_SIZE", "32"))
+
+VOTE_VALUES = {"AGREE": 1.0, "DISAGREE": -1.0, "PASS": 0.0}
+
+VOTE_VALUES_ARRAY = np.array(list(VOTE_VALUES.values()))
+
+def stack_vote_matrices(polls):
+    """
+    Stack the vote matrices of several polls into one (polls, participants,
+    statements) array, padded with NaN up to the largest poll. Each poll's
+    block uses the same layout as generate_vote_matrix.
+    
+    Returns the array and the participant and statement counts per poll.
+    """
+    n_participants = np.array([len(participants) for participants, _, _ in polls], dtype=np.int64)
+    n_statements = np.array([len(statements) for _, statements, _ in polls], dtype=np.int64)
+    stacked = np.full((len(polls), n_participants.max(initial=0), n_statements.max(initial=0)), np.nan)
+    
+    poll_idx, rows, cols, values = [], [], [], []
+    for b, (participants, statements, votes) in enumerate(polls):
+        participant_index = {participant['uid']: idx for idx, participant in enumerate(participants)}
+        statement_index = {statement['uid']: idx for idx, statement in enumerate(statements)}
+        for vote in votes:
+            row = participant_index.get(vote['participantId'])
+            col = statement_index.get(vote['statementId'])
+            value = VOTE_VALUES.get(vote['voteValue'])
+            if row is not None and col is not None and value is not None:
+                poll_idx.append(b)
+                rows.append(row)
+                cols.append(col)
+                values.append(value)
+    # Later votes for the same cell win, as in generate_vote_matrix
+    stacked[poll_idx, rows, cols] = values
+    return stacked, n_participants, n_statements
+
+def batch_cosine_impute(stacked, n_participants):
+    """
+    cosine_impute for a stack of padded vote matrices in one pass.
+    
+    Each participant's neighbors are the n_neighbors others with the largest
+    absolute similarity (ties broken by position, like Series.nlargest), with
+    n_neighbors chosen per poll as in impute_missing_votes. Missing cells get
+    the confidence-scaled, similarity-weighted neighbor vote; padding never
+    acts as a neighbor.
+    """
+    n_polls, max_participants, _ = stacked.shape
+    valid = ~np.isnan(stacked)
+    mask = valid.astype(np.float64)
+    filled = np.nan_to_num(stacked, nan=0.0)
+    similarities = _cosine_similarity_values(stacked)
+    
+    n_neighbors = np.minimum(n_participants - 1, np.maximum(2, np.log2(np.maximum(n_participants, 1)).astype(np.int64)))
+    
+    # Rank candidates by descending |similarity|, excluding self and padding rows
+    positions = np.arange(max_participants)
+    excluded = (positions[np.newaxis, np.newaxis, :] == positions[np.newaxis, :, np.newaxis]) | \
+        (positions[np.newaxis, np.newaxis, :] >= n_participants[:, np.newaxis, np.newaxis])
+    sort_keys = np.where(excluded, np.inf, -np.abs(similarities))
+    order = np.argsort(sort_keys, axis=-1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.broadcast_to(positions, order.shape), axis=-1)
+    is_neighbor = (ranks < n_neighbors[:, np.newaxis, np.newaxis]) & ~excluded
+    
+    neighbor_similarities = np.where(is_neighbor, similarities, 0.0)
+    weights = np.abs(neighbor_similarities) @ mask
+    weighted_votes = neighbor_similarities @ filled
+    with np.errstate(divide='ignore', invalid='ignore'):
+        imputed = np.where(weights > 0, weighted_votes / weights * np.cbrt(weights / (weights + 1)), 0.0)
+    return np.where(valid, stacked, imputed)
+
+def _cluster_membership(labels, n_clusters=None):
+    """One-hot (polls, participants, clusters) memberships; label -1 marks padding rows."""
+    if n_clusters is None:
+        n_clusters = int(labels.max(initial=0)) + 1
+    return (labels[..., np.newaxis] == np.arange(n_clusters)).astype(np.float64)
+
+def batch_cluster_distances(imputed, labels, n_statements):
+    """
+    Euclidean distance of every participant to its cluster centroid, in the
+    imputed vote space that was clustered. Padding statements are ignored.
+    Returns a (polls, participants) array; padding rows get 0.
+    """
+    statement_valid = np.arange(imputed.shape[2]) < np.asarray(n_statements)[:, np.newaxis]
+    data = np.nan_to_num(imputed) * statement_valid[:, np.newaxis, :]
+    membership = _cluster_membership(labels)
+    cluster_sizes = membership.sum(axis=1)[..., np.newaxis]
+    centroids = np.einsum('bpk,bps->bks', membership, data) / np.maximum(cluster_sizes, 1)
+    assigned = np.take_along_axis(centroids, np.maximum(labels, 0)[..., np.newaxis], axis=1)
+    distances = np.linalg.norm(data - assigned, axis=-1)
+    return np.where(labels >= 0, distances, 0.0)
+
+def batch_cluster_stats(imputed, labels, n_clusters=None):
+    """
+    Per-cluster agree and active (non-pass) counts of every statement, for a
+    stack of (imputed) vote matrices. labels is (polls, participants) with
+    cluster indices and -1 for padding rows; counts come from one einsum over
+    one-hot memberships. Returns n_agree and n_active shaped (polls, clusters,
+    statements) and cluster sizes shaped (polls, clusters, 1).
+    """
+    membership = _cluster_membership(labels, n_clusters)
+    
+    # Remove PASS votes
+    active = (imputed != 0).astype(np.float64)
+    agree = (imputed > 0).astype(np.float64)
+    n_active = np.einsum('bpk,bps->bks', membership, active)
+    n_agree = np.einsum('bpk,bps->bks', membership, agree)
+    cluster_sizes = membership.sum(axis=1)[..., np.newaxis]
+    return n_agree, n_active, cluster_sizes
+
+def cluster_stats(values, labels, n_clusters=None, block_elements=None):
+    """
+    batch_cluster_stats for a single (possibly memory-mapped) vote matrix,
+    accumulated over row blocks so only one block is in memory at a time.
+    labels are cluster indices 0..n_clusters-1.
+    """
+    labels = np.asarray(labels)
+    n_clusters = int(labels.max(initial=0)) + 1 if n_clusters is None else n_clusters
+    n_agree = np.zeros((1, n_clusters, values.shape[1]))
+    n_active = np.zeros_like(n_agree)
+    cluster_sizes = np.zeros((1, n_clusters, 1))
+    for rows in _row_blocks(len(values), values.shape[1], block_elements):
+        block_stats = batch_cluster_stats(np.asarray(values[rows])[np.newaxis], labels[rows][np.newaxis], n_clusters)
+        n_agree += block_stats[0]
+        n_active += block_stats[1]
+        cluster_sizes += block_stats[2]
+    return n_agree, n_active, cluster_sizes
+
+def batch_calculate_gac_scores(n_agree, n_active, cluster_sizes, n_participants):
+    """
+    GAC scores from the per-cluster counts of batch_cluster_stats. Clusters
+    without members are ignored. Returns (scores, total_votes), both
+    (polls, statements).
+    """
+    # Base pseudocount scales logarithmically but stays small
+    pseudocount = (0.3 * np.log2(1 + n_participants / 10))[:, np.newaxis, np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Calculate agreement with pseudocount stabilization, weighted by active participation
+        p_agree = (n_agree + pseudocount) / (n_active + 2 * pseudocount)
+        p_agree = p_agree ** (n_active / cluster_sizes)
+    p_agree = np.where(n_active == 0, 0.5, p_agree)
+    # Clusters a poll doesn't have leave its scores unchanged
+    p_agree = np.where(cluster_sizes == 0, 1.0, p_agree)
+    
+    return p_agree.prod(axis=1), n_active.sum(axis=1).astype(np.int64)
+
+# Bootstrap replicates per poll for score intervals; off (0) by default, since each
+# replicate costs about one more GAC scoring pass inside the scheduled run's budget
+BOOTSTRAP_REPLICATES = int(os.getenv("GAC_BOOTSTRAP_REPLICATES", "0"))
+
+# Fixed seed, so rerunning unchanged votes gives the same intervals
+BOOTSTRAP_SEED = int(os.getenv("GAC_BOOTSTRAP_SEED", "0"))
+
+# Two-sided interval coverage of ci_low / ci_high
+BOOTSTRAP_COVERAGE = 0.9
+
+def bootstrap_gac_scores(imputed, labels, n_replicates=None, seed=None, block_elements=None):
+    """
+    GAC scores of n_replicates bootstrap resamples of one poll, shaped
+    (replicates, statements).
+    
+    Participants are resampled with replacement within their cluster, so
+    cluster sizes stay fixed. Each replicate is a row of multinomial
+    weights over a cluster's members, drawn from a generator per cluster,
+    and the per-cluster counts come from weights @ votes products.
+    Replicates are handled in chunks whose weights take about
+    block_elements values, each streaming over the (possibly memory-mapped)
+    votes in row blocks; small polls need a single chunk.
+    """
+    n_replicates = BOOTSTRAP_REPLICATES if n_replicates is None else n_replicates
+    seed = BOOTSTRAP_SEED if seed is None else seed
+    imputed = np.asarray(imputed, dtype=np.float64)
+    labels = np.asarray(labels)
+    n_participants, n_statements = imputed.shape
+    
+    cluster_ids, cluster_index = np.unique(labels, return_inverse=True)
+    members = [np.flatnonzero(cluster_index == i) for i in range(len(cluster_ids))]
+    # Chunking replicates doesn't change the draws of a per-cluster generator
+    rngs = [np.random.default_rng([seed, i]) for i in range(len(cluster_ids))]
+    n_agree = np.zeros((n_replicates, len(cluster_ids), n_statements))
+    n_active = np.zeros_like(n_agree)
+    cluster_sizes = np.array([len(index) for index in members], dtype=np.float64).reshape(1, -1, 1)
+    
+    chunk_size = max(1, (block_elements or BLOCK_ELEMENTS) // n_participants)
+    for chunk_start in range(0, n_replicates, chunk_size):
+        replicates = slice(chunk_start, min(chunk_start + chunk_size, n_replicates))
+        n_chunk = replicates.stop - replicates.start
+        weights = np.empty((n_chunk, n_participants))
+        for index, rng in zip(members, rngs):
+            weights[:, index] = rng.multinomial(len(index), np.full(len(index), 1 / len(index)), size=n_chunk)
+        
+        for rows in _row_blocks(n_participants, n_statements, block_elements):
+            block = np.asarray(imputed[rows])
+            active = (block != 0).astype(np.float64)
+            agree = (block > 0).astype(np.float64)
+            block_index = cluster_index[rows]
+            for i in range(len(cluster_ids)):
+                in_cluster = block_index == i
+                if not in_cluster.any():
+                    continue
+                block_weights = weights[:, rows][:, in_cluster]
+                n_agree[replicates, i] += block_weights @ agree[in_cluster]
+                n_active[replicates, i] += block_weights @ active[in_cluster]
+    
+    scores, _ = batch_calculate_gac_scores(
+        n_agree, n_active, np.broadcast_to(cluster_sizes, (n_replicates,) + cluster_sizes.shape[1:]),
+        np.full(n_replicates, n_participants)
+    )
+    return scores
+
+def bootstrap_intervals(imputed, labels, n_replicates=None):
+    """
+    Per-statement bootstrap percentile interval (ci_low, ci_high) of the GAC
+    score and the share of replicates that are constitutionable, as arrays
+    keyed by field name, or None when the bootstrap is disabled.
+    """
+    n_replicates = BOOTSTRAP_REPLICATES if n_replicates is None else n_replicates
+    if n_replicates <= 0:
+        return None
+    replicates = bootstrap_gac_scores(imputed, labels, n_replicates)
+    tail = (1 - BOOTSTRAP_COVERAGE) / 2
+    return {
+        'ci_low': np.quantile(replicates, tail, axis=0),
+        'ci_high': np.quantile(replicates, 1 - tail, axis=0),
+        'p_constitutionable': (replicates >= constitutionable_threshold(len(labels))).mean(axis=0)
+    }
+
+def interval_entry(intervals, j):
+    """Bootstrap fields of statement j for a gac_scores entry."""
+    if intervals is None:
         return {}
+    return {name: float(values[j]) for name, values in intervals.items()}
+
+# Score distance from the threshold at which a statement counts as settled
+# when there is no bootstrap share to judge it by
+PRIORITY_MARGIN = 0.1
+
+def priority_scores(observed, labels, scores, intervals=None):
+    """
+    Routing priority in [0, 1] per statement: how much one more vote could
+    still change its GAC score or constitutionable status.
+    
+    Half comes from flip uncertainty, 1 - |2p - 1| for the bootstrap share p
+    of constitutionable replicates (or, without the bootstrap, closeness of
+    the score to the threshold within PRIORITY_MARGIN). The other half is
+    1 / (1 + n) for the smallest number n of real (non-imputed) votes any
+    cluster has on the statement, roughly the weight one more vote would
+    have there. Settled, well-sampled statements score near 0.
+    """
+    labels = np.asarray(labels)
+    threshold = constitutionable_threshold(len(labels))
+    if intervals is not None:
+        flip_uncertainty = 1 - np.abs(2 * intervals['p_constitutionable'] - 1)
+    else:
+        flip_uncertainty = np.clip(1 - np.abs(scores - threshold) / PRIORITY_MARGIN, 0.0, 1.0)
+    
+    n_clusters = int(labels.max(initial=0)) + 1
+    observed_per_cluster = np.zeros((n_clusters, observed.shape[1]))
+    for rows in _row_blocks(len(observed), observed.shape[1]):
+        observed_per_cluster += _cluster_membership(labels[rows], n_clusters).T @ np.asarray(observed[rows], dtype=np.float64)
+    fewest_votes = observed_per_cluster[np.bincount(labels, minlength=n_clusters) > 0].min(axis=0)
+    return 0.5 * flip_uncertainty + 0.5 / (1 + fewest_votes)
+
+def priority_entry(priorities, j):
+    """Routing priority of statement j for a gac_scores entry."""
+    if priorities is None:
+        return {}
+    return {'priority': float(priorities[j])}
+
+def process_votes_batch(polls, imputation_method=None, include_clusters=False):
+    """
+    Score many small polls at once.
+    
+    polls is a list of (participants, statements, votes) tuples, as passed to
+    process_votes. Vote matrices are stacked and padded, imputation and GAC
+    scoring run on the whole stack, and only clustering runs per poll.
+    Returns one gac_scores dict per poll, in the same order, or with
+    include_clusters=True one (gac_scores, cluster_assignments) tuple per
+    poll as returned by process_votes.
+    """
+    method = imputation_method or IMPUTATION_METHOD
+    if method not in IMPUTATION_METHODS:
+        raise ValueError(f"Unknown imputation method: {method}")
+    if not polls:
+        return []
+    
+    logger.info(f"Batch processing votes for {len(polls)} polls using {method} imputation")
+    stacked, n_participants, n_statements = stack_vote_matrices(polls)
+    
+    if method == 'sds':
+        imputed = _sds_impute_values(stacked)
+    else:
+        imputed = batch_cosine_impute(stacked, n_participants)
+    
+    labels = np.full(stacked.shape[:2], -1, dtype=np.int64)
+    has_votes = (~np.isnan(stacked)).any(axis=(1, 2))
+    for b in np.flatnonzero(has_votes):
+        labels[b, :n_participants[b]] = perform_clustering(imputed[b, :n_participants[b], :n_statements[b]])
+    
+    n_agree, n_active, cluster_sizes = batch_cluster_stats(imputed, labels)
+    scores, total_votes = batch_calculate_gac_scores(n_agree, n_active, cluster_sizes, n_participants)
+    cluster_ids = np.arange(cluster_sizes.shape[1])
+    distances = batch_cluster_distances(imputed, labels, n_statements) if include_clusters else None
+    
+    results = []
+    for b, (participants, statements, _) in enumerate(polls):
+        if not has_votes[b]:
+            results.append(({}, {}) if include_clusters else {})
+            continue
+        intervals = bootstrap_intervals(imputed[b, :n_participants[b], :n_statements[b]], labels[b, :n_participants[b]])
+        priorities = priority_scores(
+            ~np.isnan(stacked[b, :n_participants[b], :n_statements[b]]), labels[b, :n_participants[b]],
+            scores[b, :n_statements[b]], intervals
+        )
+        gac_scores = {
+            statement['uid']: {
+                'score': scores[b, j],
+                'n_votes': int(total_votes[b, j]),
+                'n_participants': len(participants),
+                'clusters': cluster_entries(cluster_ids, n_agree[b, :, j], n_active[b, :, j], cluster_sizes[b, :, 0]),
+                **interval_entry(intervals, j),
+                **priority_entry(priorities, j)
+            }
+            for j, statement in enumerate(statements)
+        }
+        if include_clusters:
+            assignments = {
+                participant['uid']: (int(labels[b, i]), float(distances[b, i]))
+                for i, participant in enumerate(participants)
+            }
+            results.append((gac_scores, assignments))
+        else:
+            results.append(gac_scores)
+    return results
 
 def fetch_all_polls(cursor):
     query = """
@@ -976,6 +2451,16 @@ if __name__ == "__main__":
     parser.add_argument('--poll-id', help='Specific poll ID to process')
     parser.add_argument('--dry-run', action='store_true', help='Show calculations without modifying data')
     parser.add_argument('--force', action='store_true', help='Force update all polls regardless of changes')
+    parser.add_argument('--no-cache', action='store_true', help='Recompute polls even if their votes are unchanged since the last run')
+    parser.add_argument('--report-dir', help='With --dry-run, write a per-poll diff against the stored scores to this directory')
+    parser.add_argument('--report-format', choices=['json', 'csv'], default='json', help='Format of the per-poll diffs')
+    parser.add_argument('--workers', type=int, help='Processes scoring polls in parallel for --report-dir (default: GAC_POLL_WORKERS)')
+    parser.add_argument('--time-budget', type=float, help='Seconds to spend before stopping and leaving the rest to the next run (default: no limit)')
     args = parser.parse_args()
     
-    main(poll_id=args.poll_id, dry_run=args.dry_run, force=args.force)
\ No newline at end of file
+    if args.dry_run and args.report_dir:
+        dry_run_report(poll_id=args.poll_id, force=args.force, output_dir=args.report_dir,
+                       workers=args.workers, report_format=args.report_format)
+    else:
+        main(poll_id=args.poll_id, dry_run=args.dry_run, force=args.force, use_cache=not args.no_cache,
+             time_budget=args.time_budget)
\ No newline at end of file
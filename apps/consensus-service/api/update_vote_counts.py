@@ -2,12 +2,13 @@ import logging
 from http.server import BaseHTTPRequestHandler
 import os
 import sys
-from datetime import datetime
+import time
+from datetime import timedelta
 import pg8000
-from urllib.parse import urlparse
+from urllib.parse import urlparse, parse_qs
 import json
 
-VERSION = "1.0.0"
+VERSION = "1.1.0"
 print(f"Starting update-vote-counts.py version {VERSION}")
 
 # Configure logging
@@ -28,56 +29,170 @@ def create_connection():
     )
     return conn
 
-def get_statements_with_mismatched_counts(cursor):
-    query = """
-    WITH VoteCounts AS (
-        SELECT 
-            "statementId",
-            SUM(CASE WHEN "voteValue" = 'AGREE' THEN 1 ELSE 0 END) as actual_agree_count,
-            SUM(CASE WHEN "voteValue" = 'DISAGREE' THEN 1 ELSE 0 END) as actual_disagree_count,
-            SUM(CASE WHEN "voteValue" = 'PASS' THEN 1 ELSE 0 END) as actual_pass_count
-        FROM "Vote"
-        GROUP BY "statementId"
+JOB_NAME = "update_vote_counts"
+
+# Incremental runs also re-aggregate votes updated shortly before the watermark,
+# so votes from transactions that committed late are not missed. Re-counting a
+# statement is idempotent, so the overlap only costs a little extra work.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Statements to reconcile: every statement, those with votes changed since a
+# watermark, or those of one poll / community model (via the Statement(pollId) index)
+ALL_STATEMENTS = 'SELECT uid FROM "Statement"'
+CHANGED_STATEMENTS = 'SELECT DISTINCT "statementId" AS uid FROM "Vote" WHERE "updatedAt" > %s'
+POLL_STATEMENTS = 'SELECT uid FROM "Statement" WHERE "pollId" = %s'
+MODEL_STATEMENTS = """
+    SELECT uid FROM "Statement" WHERE "pollId" IN (
+        SELECT uid FROM "Poll" WHERE "communityModelId" = %s
+    )
+"""
+
+ACTUAL_COUNTS_CTE = """
+    WITH targets AS ({targets}),
+    actual AS (
+        SELECT
+            t.uid,
+            COUNT(v.uid) FILTER (WHERE v."voteValue" = 'AGREE') AS agree_count,
+            COUNT(v.uid) FILTER (WHERE v."voteValue" = 'DISAGREE') AS disagree_count,
+            COUNT(v.uid) FILTER (WHERE v."voteValue" = 'PASS') AS pass_count
+        FROM targets t
+        LEFT JOIN "Vote" v ON v."statementId" = t.uid
+        GROUP BY t.uid
     )
-    SELECT 
+"""
+
+COUNTS_MISMATCH = """
+    s."agreeCount" != a.agree_count OR
+    s."disagreeCount" != a.disagree_count OR
+    s."passCount" != a.pass_count
+"""
+
+def get_reconciliation_targets(since=None, poll_id=None, community_model_id=None):
+    """
+    Return the SQL and parameters selecting the statements to reconcile.
+    A run is scoped to a poll or a community model, not both.
+    """
+    if poll_id and community_model_id:
+        raise ValueError("Pass either pollId or communityModelId, not both")
+    if poll_id:
+        return POLL_STATEMENTS, (poll_id,)
+    if community_model_id:
+        return MODEL_STATEMENTS, (community_model_id,)
+    if since:
+        return CHANGED_STATEMENTS, (since,)
+    return ALL_STATEMENTS, ()
+
+def get_statements_with_mismatched_counts(cursor, since=None, poll_id=None, community_model_id=None):
+    """Compare stored counts with actual votes without changing anything."""
+    targets, params = get_reconciliation_targets(since, poll_id, community_model_id)
+    query = ACTUAL_COUNTS_CTE.format(targets=targets) + f"""
+    SELECT
         s.uid,
         s."agreeCount",
         s."disagreeCount",
         s."passCount",
-        COALESCE(vc.actual_agree_count, 0) as actual_agree_count,
-        COALESCE(vc.actual_disagree_count, 0) as actual_disagree_count,
-        COALESCE(vc.actual_pass_count, 0) as actual_pass_count
+        a.agree_count,
+        a.disagree_count,
+        a.pass_count
     FROM "Statement" s
-    LEFT JOIN VoteCounts vc ON s.uid = vc."statementId"
-    WHERE 
-        s."agreeCount" != COALESCE(vc.actual_agree_count, 0) OR
-        s."disagreeCount" != COALESCE(vc.actual_disagree_count, 0) OR
-        s."passCount" != COALESCE(vc.actual_pass_count, 0);
+    JOIN actual a ON a.uid = s.uid
+    WHERE {COUNTS_MISMATCH};
     """
-    cursor.execute(query)
+    cursor.execute(query, params)
     return cursor.fetchall()
 
-def update_statement_counts(cursor, statement_id, agree_count, disagree_count, pass_count):
-    query = """
-    UPDATE "Statement"
-    SET "agreeCount" = %s,
-        "disagreeCount" = %s,
-        "passCount" = %s
-    WHERE uid = %s;
+def reconcile_vote_counts(cursor, since=None, poll_id=None, community_model_id=None):
     """
-    cursor.execute(query, (agree_count, disagree_count, pass_count, statement_id))
+    Correct mismatched statement counts in one set-based UPDATE ... FROM (aggregate).
+    
+    With `poll_id` or `community_model_id` only that poll's or model's
+    statements are re-aggregated; with `since`, only statements that have
+    votes updated after that timestamp; otherwise every statement. Returns
+    one row per corrected statement with its old and new counts.
+    """
+    targets, params = get_reconciliation_targets(since, poll_id, community_model_id)
+    query = ACTUAL_COUNTS_CTE.format(targets=targets) + f"""
+    UPDATE "Statement" s
+    SET "agreeCount" = a.agree_count,
+        "disagreeCount" = a.disagree_count,
+        "passCount" = a.pass_count
+    FROM actual a, "Statement" old
+    WHERE a.uid = s.uid
+      AND old.uid = s.uid
+      AND ({COUNTS_MISMATCH})
+    RETURNING
+        s.uid,
+        old."agreeCount",
+        old."disagreeCount",
+        old."passCount",
+        a.agree_count,
+        a.disagree_count,
+        a.pass_count;
+    """
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+def get_watermark(cursor):
+    cursor.execute('SELECT "watermark" FROM "JobState" WHERE "name" = %s;', (JOB_NAME,))
+    result = cursor.fetchone()
+    return result[0] if result else None
 
-def main():
+def save_watermark(cursor, watermark):
+    cursor.execute("""
+    INSERT INTO "JobState" ("name", "watermark", "updatedAt")
+    VALUES (%s, %s, NOW())
+    ON CONFLICT ("name") DO UPDATE
+    SET "watermark" = EXCLUDED."watermark",
+        "updatedAt" = EXCLUDED."updatedAt";
+    """, (JOB_NAME, watermark))
+
+def get_latest_vote_timestamp(cursor):
+    cursor.execute('SELECT MAX("updatedAt") FROM "Vote";')
+    return cursor.fetchone()[0]
+
+def main(full=False, poll_id=None, community_model_id=None, dry_run=False):
+    """
+    Reconcile Statement agree/disagree/pass counts with the Vote table.
+    
+    By default only statements whose votes changed since the last
+    reconciliation watermark are re-aggregated. The first run, or a run with
+    full=True, checks every statement; a full run is also what picks up
+    deleted votes, which leave no timestamp behind.
+    
+    Args:
+        full: Reconcile every statement instead of only recently voted ones
+        poll_id: Only reconcile the statements of this poll
+        community_model_id: Only reconcile the statements of this model's polls
+            (cannot be combined with poll_id)
+        dry_run: Report the differences without updating anything
+    """
     try:
+        start_time = time.perf_counter()
+        
         # Connect to database
         conn = create_connection()
         cursor = conn.cursor()
         
-        # Get statements with mismatched counts
-        mismatched_statements = get_statements_with_mismatched_counts(cursor)
+        # Scoped runs check every statement in scope and leave the global watermark alone
+        scoped = bool(poll_id or community_model_id)
+        watermark = None if (full or scoped) else get_watermark(cursor)
+        if scoped:
+            mode = "poll" if poll_id else "community_model"
+        else:
+            mode = "incremental" if watermark else "full"
+        since = watermark - WATERMARK_OVERLAP if watermark else None
+        
+        # Read the new watermark first: votes written while we reconcile are
+        # picked up by the next run
+        new_watermark = None if (scoped or dry_run) else get_latest_vote_timestamp(cursor)
+        
+        if dry_run:
+            corrected = get_statements_with_mismatched_counts(cursor, since, poll_id, community_model_id)
+        else:
+            corrected = reconcile_vote_counts(cursor, since, poll_id, community_model_id)
         
         updates = []
-        for stmt in mismatched_statements:
+        for stmt in corrected:
             stmt_id = stmt[0]
             old_counts = {
                 "agree": stmt[1],
@@ -89,16 +204,6 @@ def main():
                 "disagree": stmt[5],
                 "pass": stmt[6]
             }
-            
-            # Update the counts
-            update_statement_counts(
-                cursor,
-                stmt_id,
-                new_counts["agree"],
-                new_counts["disagree"],
-                new_counts["pass"]
-            )
-            
             updates.append({
                 "statementId": stmt_id,
                 "oldCounts": old_counts,
@@ -106,17 +211,41 @@ def main():
             })
             
             logger.info(
-                f"Updated statement {stmt_id} counts from "
+                f"{'[DRY RUN] Would update' if dry_run else 'Updated'} statement {stmt_id} counts from "
                 f"({old_counts['agree']}, {old_counts['disagree']}, {old_counts['pass']}) to "
                 f"({new_counts['agree']}, {new_counts['disagree']}, {new_counts['pass']})"
             )
         
-        conn.commit()
+        if new_watermark:
+            save_watermark(cursor, new_watermark)
+        
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
         cursor.close()
         conn.close()
         
+        duration_ms = round((time.perf_counter() - start_time) * 1000, 1)
+        logger.info(
+            f"{mode.capitalize()} reconciliation {'found' if dry_run else 'touched'} "
+            f"{len(updates)} statements in {duration_ms}ms"
+        )
+        
+        if not updates:
+            message = "No statements needed updating."
+        elif dry_run:
+            message = f"{len(updates)} statements would be updated."
+        else:
+            message = f"Updated {len(updates)} statements."
+        
         return {
-            "message": "No statements needed updating." if not updates else f"Updated {len(updates)} statements.",
+            "message": message,
+            "mode": mode,
+            "dryRun": dry_run,
+            "rowsTouched": 0 if dry_run else len(updates),
+            "durationMs": duration_ms,
+            "watermark": new_watermark.isoformat() if new_watermark else None,
             "updates": updates
         }
         
@@ -127,7 +256,23 @@ def main():
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
         try:
-            result = main()
+            params = parse_qs(urlparse(self.path).query)
+            poll_id = params.get('pollId', [None])[0]
+            community_model_id = params.get('communityModelId', [None])[0]
+            if poll_id and community_model_id:
+                self.send_response(400)
+                self.send_header('Content-type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps({
+                    "error": "Pass either pollId or communityModelId, not both"
+                }).encode())
+                return
+            result = main(
+                full=params.get('mode', [''])[0] == 'full',
+                poll_id=poll_id,
+                community_model_id=community_model_id,
+                dry_run=params.get('dryRun', ['false'])[0].lower() in ('true', '1')
+            )
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
             self.end_headers()
@@ -0,0 +1,76 @@
+import numpy as np
+
+WORD_BITS = 64
+
+def _pack_rows(bits):
+    """Pack a (rows, columns) boolean array into (rows, words) uint64 words, little-endian bit order."""
+    n_rows, n_columns = bits.shape
+    n_words = -(-n_columns // WORD_BITS)
+    padded = np.zeros((n_rows, n_words * WORD_BITS), dtype=bool)
+    padded[:, :n_columns] = bits
+    return np.packbits(padded, axis=1, bitorder='little').view(np.uint64)
+
+class VoteBitsets:
+    """
+    Ternary votes (1 agree, -1 disagree, 0 pass, NaN missing) packed into
+    agree, disagree and voted bitsets of uint64 words, one row per
+    participant. A bitset row takes S / 8 bytes instead of the 8 * S bytes of
+    a float64 row.
+    """
+
+    def __init__(self, agree, disagree, voted, n_statements):
+        self.agree = agree
+        self.disagree = disagree
+        self.voted = voted
+        self.n_statements = n_statements
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype=np.float64)
+        voted = ~np.isnan(values)
+        return cls(_pack_rows(values == 1), _pack_rows(values == -1), _pack_rows(voted), values.shape[1])
+
+    def __len__(self):
+        return len(self.voted)
+
+    def rows(self, index):
+        return VoteBitsets(self.agree[index], self.disagree[index], self.voted[index], self.n_statements)
+
+    @property
+    def nbytes(self):
+        return self.agree.nbytes + self.disagree.nbytes + self.voted.nbytes
+
+    def vote_counts(self):
+        """Non-pass votes per participant, the squared norm of the vote row."""
+        return np.bitwise_count(self.agree | self.disagree).sum(axis=1, dtype=np.int64)
+
+def pairwise_vote_products(left, right, block_elements=1 << 16):
+    """
+    Co-vote counts (statements both participants voted on, passes included)
+    and signed dot products of the ternary vote rows, for every left x right
+    pair.
+
+    Both come from AND plus np.bitwise_count: the dot product is the number
+    of statements both voted non-pass on, minus twice the number of those on
+    which they took opposite sides. Left rows are processed in blocks of
+    about block_elements words against the word-major right bitsets.
+    """
+    right_voted = np.ascontiguousarray(right.voted.T)
+    right_nonzero = np.ascontiguousarray((right.agree | right.disagree).T)
+    right_agree = np.ascontiguousarray(right.agree.T)
+    left_nonzero = left.agree | left.disagree
+
+    n_words = left.voted.shape[1]
+    block_size = max(1, block_elements // max(len(right) * n_words, 1))
+    covotes = np.empty((len(left), len(right)), dtype=np.int64)
+    dot_products = np.empty((len(left), len(right)), dtype=np.int64)
+    for start in range(0, len(left), block_size):
+        rows = slice(start, start + block_size)
+        covotes[rows] = np.bitwise_count(left.voted[rows, :, np.newaxis] & right_voted).sum(axis=1, dtype=np.int64)
+        both_nonzero = left_nonzero[rows, :, np.newaxis] & right_nonzero
+        opposite = (left.agree[rows, :, np.newaxis] ^ right_agree) & both_nonzero
+        dot_products[rows] = (
+            np.bitwise_count(both_nonzero).sum(axis=1, dtype=np.int64)
+            - 2 * np.bitwise_count(opposite).sum(axis=1, dtype=np.int64)
+        )
+    return covotes, dot_products
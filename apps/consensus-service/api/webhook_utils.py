@@ -1,13 +1,26 @@
 import os
 import json
 import hmac
+import time
+import random
+import asyncio
 import hashlib
-from datetime import datetime
+from datetime import datetime, timezone
 import aiohttp
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on webhooks in flight at once during a fan-out
+MAX_CONCURRENCY = int(os.getenv('WEBHOOK_MAX_CONCURRENCY', '5'))
+MAX_ATTEMPTS = 3
+REQUEST_TIMEOUT = 10  # seconds per attempt
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_MAX = 8.0  # seconds
+
+# Status codes worth retrying; other 4xx responses will not succeed on retry
+RETRYABLE_STATUSES = {408, 425, 429}
+
 def create_signature(payload: dict, secret: str) -> str:
     """Create HMAC signature for webhook payload."""
     payload_str = json.dumps(payload)
@@ -17,6 +30,146 @@ def create_signature(payload: dict, secret: str) -> str:
         hashlib.sha256
     ).hexdigest()
 
+def create_payload(model_id: str, poll_id: str) -> dict:
+    """Build the constitution creation payload for a poll."""
+    # We now only use the statements_changed event type
+    return {
+        "event": "statements_changed",
+        "modelId": model_id,
+        "pollId": poll_id,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Exponential backoff with full jitter for the given (0-based) failed attempt."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class WebhookDispatcher:
+    """
+    Delivers constitution creation webhooks over one shared aiohttp session.
+    
+    Use as an async context manager. Triggers passed to dispatch() are sent
+    concurrently, at most max_concurrency at a time, retrying failed attempts
+    with exponential backoff and jitter. Every attempt is recorded in
+    self.attempts with its status and latency.
+    """
+    
+    def __init__(self, webhook_url=None, webhook_secret=None, max_concurrency=MAX_CONCURRENCY,
+                 max_attempts=MAX_ATTEMPTS, timeout=REQUEST_TIMEOUT,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX):
+        self.webhook_url = webhook_url or os.getenv('WEBHOOK_URL')
+        self.webhook_secret = webhook_secret or os.getenv('WEBHOOK_SECRET')
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.attempts = []
+        self._session = None
+        self._semaphore = None
+    
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+            timeout=self.timeout
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+        self._session = None
+    
+    async def _post(self, payload, attempt):
+        """Make one delivery attempt and return its metrics."""
+        signature = create_signature(payload, self.webhook_secret)
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Webhook-Signature': signature
+        }
+        metric = {
+            'modelId': payload['modelId'],
+            'pollId': payload['pollId'],
+            'attempt': attempt + 1,
+            'status': None,
+            'delivered': False,
+            'retryable': False,
+            'error': None
+        }
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                # Sign and send the exact same bytes
+                async with self._session.post(
+                    self.webhook_url,
+                    data=json.dumps(payload),
+                    headers=headers
+                ) as response:
+                    metric['status'] = response.status
+                    if response.status == 200:
+                        metric['delivered'] = True
+                    else:
+                        metric['error'] = (await response.text())[:500]
+                        metric['retryable'] = response.status >= 500 or response.status in RETRYABLE_STATUSES
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metric['error'] = str(e) or type(e).__name__
+                metric['retryable'] = True
+            metric['latencyMs'] = round((time.perf_counter() - start) * 1000, 1)
+        
+        self.attempts.append(metric)
+        if metric['error'] is not None:
+            logger.error(f"Webhook delivery failed for poll {metric['pollId']} "
+                         f"(attempt {metric['attempt']}, status {metric['status']}, "
+                         f"{metric['latencyMs']}ms): {metric['error']}")
+        return metric
+    
+    def _configured(self):
+        if not self.webhook_url or not self.webhook_secret:
+            logger.error("Missing required environment variables: WEBHOOK_URL or WEBHOOK_SECRET")
+            return False
+        return True
+    
+    async def send(self, model_id: str, poll_id: str) -> bool:
+        """Send one constitution creation webhook. Returns True if delivered."""
+        if not self._configured():
+            return False
+        
+        payload = create_payload(model_id, poll_id)
+        for attempt in range(self.max_attempts):
+            metric = await self._post(payload, attempt)
+            if metric['delivered']:
+                logger.info(f"Constitution creation webhook delivered successfully for model {model_id}")
+                return True
+            if not metric['retryable'] or attempt == self.max_attempts - 1:
+                break
+            # Back off outside the semaphore so waiting retries don't block other deliveries
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+        return False
+    
+    async def send_once(self, model_id: str, poll_id: str, attempt: int = 0) -> dict:
+        """
+        Make a single delivery attempt without retrying, for callers that
+        schedule retries themselves. Returns the attempt's metrics.
+        """
+        if not self._configured():
+            return {'modelId': model_id, 'pollId': poll_id, 'attempt': attempt + 1, 'status': None,
+                    'delivered': False, 'retryable': True, 'error': 'Webhook not configured', 'latencyMs': 0.0}
+        return await self._post(create_payload(model_id, poll_id), attempt)
+    
+    async def dispatch(self, triggers) -> list:
+        """Send (model_id, poll_id) triggers concurrently. Returns delivery results in order."""
+        results = await asyncio.gather(*(self.send(model_id, poll_id) for model_id, poll_id in triggers))
+        return list(results)
+    
+    def summary(self) -> dict:
+        latencies = sorted(metric['latencyMs'] for metric in self.attempts)
+        return {
+            'attempts': len(self.attempts),
+            'failedAttempts': sum(1 for metric in self.attempts if metric['error'] is not None),
+            'maxLatencyMs': latencies[-1] if latencies else None,
+            'medianLatencyMs': latencies[len(latencies) // 2] if latencies else None
+        }
+
 async def send_webhook(model_id: str, poll_id: str, changed_statements: list = None) -> bool:
     """
     Send webhook to notify about changes in constitutionable statements.
@@ -38,57 +191,9 @@ async def send_webhook(model_id: str, poll_id: str, changed_statements: list = N
     logger.info(f"WEBHOOK_URL is {'set' if webhook_url else 'NOT SET'}")
     logger.info(f"WEBHOOK_SECRET is {'set' if webhook_secret else 'NOT SET'}")
     
-    if not webhook_url or not webhook_secret:
-        logger.error("Missing required environment variables: WEBHOOK_URL or WEBHOOK_SECRET")
-        return False
-        
-    # We now only use the statements_changed event type
-    event_type = "statements_changed"
-    logger.info(f"Using event type: {event_type}")
-    
-    payload = {
-        "event": event_type,
-        "modelId": model_id,
-        "pollId": poll_id,
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    
     try:
-        # Create signature
-        signature = create_signature(payload, webhook_secret)
-        logger.info(f"Created signature: {signature[:10]}...")
-        
-        # Prepare headers
-        headers = {
-            'Content-Type': 'application/json',
-            'X-Webhook-Signature': signature
-        }
-        
-        # Send webhook with retries
-        async with aiohttp.ClientSession() as session:
-            for attempt in range(3):  # Try up to 3 times
-                try:
-                    async with session.post(
-                        webhook_url,
-                        json=payload,
-                        headers=headers,
-                        timeout=10  # 10 second timeout
-                    ) as response:
-                        if response.status == 200:
-                            logger.info(f"Constitution creation webhook delivered successfully for model {model_id}")
-                            return True
-                        else:
-                            error_data = await response.json()
-                            logger.error(f"Webhook delivery failed (attempt {attempt + 1}): {error_data}")
-                            
-                except aiohttp.ClientError as e:
-                    logger.error(f"Webhook request failed (attempt {attempt + 1}): {e}")
-                    if attempt == 2:  # Last attempt
-                        return False
-                    continue
-                    
-        return False
-        
+        async with WebhookDispatcher(webhook_url, webhook_secret) as dispatcher:
+            return await dispatcher.send(model_id, poll_id)
     except Exception as e:
         logger.error(f"Error sending webhook: {e}")
-        return False 
\ No newline at end of file
+        return False
@@ -1,18 +1,30 @@
 import numpy as np
 import time
 import pandas as pd
-from typing import Callable, Dict, List, Tuple
+from typing import Callable, Dict
 import sys
 import os
 from tabulate import tabulate
 import logging
 import contextlib
-import multiprocessing
-from joblib import Parallel, delayed
+import resource
+import tempfile
 
 # Add parent directory to path to import from api
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from api.update_gac_scores import cosine_impute
+from api.update_gac_scores import (
+    cosine_impute,
+    sds_impute,
+    exact_cosine_neighbors,
+    ann_cosine_neighbors,
+    impute_from_neighbors,
+    blocked_cosine_impute,
+    perform_clustering,
+    calculate_gac_scores,
+    _cosine_similarity_values,
+    _bitset_cosine_similarity_values
+)
+from api.vote_bitsets import VoteBitsets
 
 @contextlib.contextmanager
 def silence_logger(logger_name):
@@ -25,114 +37,6 @@ def silence_logger(logger_name):
     finally:
         logger.setLevel(original_level)
 
-def sds_impute(vote_matrix: pd.DataFrame,
-               k_user: float = 3.0,
-               k_statement: float = 2.0,
-               w_user: float = 0.6,
-               w_statement: float = 0.4) -> pd.DataFrame:
-    """SDS implementation with parallel processing"""
-    matrix_values = vote_matrix.values
-    
-    # Pre-calculate masks and indices once
-    missing_mask = np.isnan(matrix_values)
-    missing_indices = np.where(missing_mask)
-    n_users = len(matrix_values)
-    
-    # Pre-calculate valid votes masks for all users
-    valid_votes_masks = ~np.isnan(matrix_values)
-    user_valid_votes = [matrix_values[i][valid_votes_masks[i]] for i in range(n_users)]
-    user_vote_patterns = np.array([
-        np.mean(votes) * (len(votes) / (len(votes) + k_statement))
-        if len(votes) > 0 else 0.0
-        for votes in user_valid_votes
-    ])
-    
-    def calculate_user_similarities(user_idx: int) -> np.ndarray:
-        """Calculate similarities for a user against all other users vectorized"""
-        user_votes = matrix_values[user_idx]
-        
-        # Calculate overlaps for all users at once
-        overlaps = valid_votes_masks[user_idx] & valid_votes_masks
-        n_overlaps = np.sum(overlaps, axis=1)
-        
-        # Where there are no overlaps, we'll get 0 similarity
-        no_overlap_mask = n_overlaps == 0
-        similarities = np.zeros(n_users)
-        
-        # Only calculate for users with overlaps
-        has_overlaps = ~no_overlap_mask
-        if np.any(has_overlaps):
-            # Calculate agreement ratios vectorized
-            votes_i = user_votes[None, :]  # Add dimension for broadcasting
-            agreement_ratios = np.zeros(n_users)
-            
-            # Calculate only for users with overlaps
-            overlap_indices = np.where(has_overlaps)[0]
-            for idx in overlap_indices:
-                common_mask = overlaps[idx]
-                if np.any(common_mask):
-                    votes1 = user_votes[common_mask]
-                    votes2 = matrix_values[idx][common_mask]
-                    agreement_ratios[idx] = np.mean(votes1 * votes2)
-            
-            # Calculate confidence factors
-            confidence = n_overlaps / (n_overlaps + k_user)
-            
-            # Combine for final similarities
-            similarities[has_overlaps] = agreement_ratios[has_overlaps] * confidence[has_overlaps]
-        
-        return similarities
-    
-    def process_missing_value(user_idx: int, statement_idx: int) -> Tuple[int, int, float]:
-        """Process a single missing value and return indices with result"""
-        similarities = calculate_user_similarities(user_idx)
-        
-        # Get relevant votes for this statement
-        statement_votes = matrix_values[:, statement_idx]
-        valid_votes_mask = ~np.isnan(statement_votes)
-        valid_votes_mask[user_idx] = False
-        
-        # Calculate user-based prediction
-        if np.any(valid_votes_mask):
-            relevant_similarities = similarities[valid_votes_mask]
-            relevant_votes = statement_votes[valid_votes_mask]
-            weighted_votes = relevant_similarities * relevant_votes
-            abs_sum = np.sum(np.abs(relevant_similarities))
-            user_pred = np.sum(weighted_votes) / (abs_sum + 1e-10) if abs_sum > 0 else 0.0
-        else:
-            user_pred = 0.0
-        
-        # Get statement-based prediction
-        statement_pred = user_vote_patterns[user_idx]
-        
-        # Combine predictions
-        imputed_value = w_user * user_pred + w_statement * statement_pred
-        return user_idx, statement_idx, np.clip(imputed_value, -0.99, 0.99)
-    
-    # Pre-allocate output matrix
-    imputed_matrix = matrix_values.copy()
-    
-    # Process missing values in parallel
-    n_jobs = min(multiprocessing.cpu_count(), 8)  # Cap at 8 cores
-    missing_coords = list(zip(*missing_indices))
-    
-    if len(missing_coords) > 100:  # Only parallelize for larger datasets
-        results = Parallel(n_jobs=n_jobs)(
-            delayed(process_missing_value)(user_idx, statement_idx)
-            for user_idx, statement_idx in missing_coords
-        )
-        
-        # Update matrix with results
-        for user_idx, statement_idx, value in results:
-            imputed_matrix[user_idx, statement_idx] = value
-    else:
-        # Use original sequential processing for small datasets
-        for user_idx, statement_idx in missing_coords:
-            _, _, value = process_missing_value(user_idx, statement_idx)
-            imputed_matrix[user_idx, statement_idx] = value
-    
-    return pd.DataFrame(imputed_matrix, index=vote_matrix.index, columns=vote_matrix.columns)
-
 def generate_test_matrix(n_users: int, n_statements: int, missing_ratio: float = 0.3) -> pd.DataFrame:
     """Generate a test vote matrix with specified dimensions and missing ratio"""
     # Generate random votes (-1, 0, 1)
@@ -150,6 +54,22 @@ def generate_test_matrix(n_users: int, n_statements: int, missing_ratio: float =
         columns=[f'statement_{i}' for i in range(n_statements)]
     )
 
+def generate_clustered_matrix(n_users: int, n_statements: int, n_groups: int = 4,
+                              noise: float = 0.2, missing_ratio: float = 0.5,
+                              group_votes: np.ndarray = None) -> np.ndarray:
+    """
+    Generate votes of opinion groups: each participant copies their group's
+    votes, with a noise share of random votes, so neighbor structure exists.
+    """
+    if group_votes is None:
+        group_votes = np.random.choice([-1.0, 0.0, 1.0], size=(n_groups, n_statements))
+    n_groups = len(group_votes)
+    matrix = group_votes[np.random.randint(0, n_groups, n_users)]
+    noisy = np.random.random(size=matrix.shape) < noise
+    matrix[noisy] = np.random.choice([-1.0, 0.0, 1.0], size=noisy.sum())
+    matrix[np.random.random(size=matrix.shape) < missing_ratio] = np.nan
+    return matrix
+
 def time_algorithm(algo: Callable, matrix: pd.DataFrame, n_runs: int = 3) -> Dict:
     """Time an algorithm's execution with multiple runs"""
     times = []
@@ -224,5 +144,170 @@ def run_benchmarks():
             numalign='right'
         ))
 
+def run_ann_recall_report(sizes, n_statements: int = 100):
+    """
+    Compare LSH neighbor retrieval with exact neighbors on clustered votes:
+    recall@k of the neighbor lists, share of the exact neighbors' total
+    absolute similarity that was found, and the mean absolute difference of
+    the imputed votes.
+    """
+    results = []
+
+    print("\nRunning ANN recall report...\n")
+
+    for n_users in sizes:
+        print(f"Testing {n_users} users × {n_statements} statements...")
+        matrix = generate_clustered_matrix(n_users, n_statements)
+        n_neighbors = max(2, int(np.log2(n_users)))
+
+        start = time.perf_counter()
+        exact, exact_similarities = exact_cosine_neighbors(matrix, n_neighbors)
+        exact_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        approximate, approximate_similarities = ann_cosine_neighbors(matrix, n_neighbors)
+        ann_time = time.perf_counter() - start
+
+        found = (approximate[:, :, np.newaxis] == exact[:, np.newaxis, :]).any(axis=1)
+        exact_imputed = impute_from_neighbors(matrix, exact, exact_similarities)
+        approximate_imputed = impute_from_neighbors(matrix, approximate, approximate_similarities)
+        missing = np.isnan(matrix)
+
+        results.append({
+            'Size': f"{n_users}×{n_statements}",
+            'Neighbors': n_neighbors,
+            'Exact': format_time(exact_time),
+            'ANN': format_time(ann_time),
+            'Recall@k': f"{found.mean():.3f}",
+            'Similarity Found': f"{np.abs(approximate_similarities).sum() / np.abs(exact_similarities).sum():.3f}",
+            'Imputed Diff': f"{np.abs(exact_imputed[missing] - approximate_imputed[missing]).mean():.4f}"
+        })
+
+    print("\nANN Recall Results:")
+    print(tabulate(
+        results,
+        headers='keys',
+        tablefmt='grid',
+        numalign='right'
+    ))
+
+def run_similarity_benchmark(sizes, n_statements_list):
+    """Compare the float64 and bitset similarity kernels on ternary votes with half missing."""
+    results = []
+
+    print("\nRunning similarity kernel benchmarks...\n")
+
+    for n_users in sizes:
+        for n_statements in n_statements_list:
+            print(f"Testing {n_users} users × {n_statements} statements...")
+            values = generate_test_matrix(n_users, n_statements, missing_ratio=0.5).values
+
+            float_times = time_algorithm(_cosine_similarity_values, values)
+            pack_times = time_algorithm(VoteBitsets.from_values, values)
+            bitsets = VoteBitsets.from_values(values)
+            bitset_times = time_algorithm(_bitset_cosine_similarity_values, bitsets)
+            max_diff = np.abs(_cosine_similarity_values(values) - _bitset_cosine_similarity_values(bitsets)).max()
+
+            results.append({
+                'Size': f"{n_users}×{n_statements}",
+                'Float Avg': format_time(float_times['avg']),
+                'Pack Avg': format_time(pack_times['avg']),
+                'Bitset Avg': format_time(bitset_times['avg']),
+                'Float Input': f"{values.nbytes / 2**20:.1f}MB",
+                'Bitset Input': f"{bitsets.nbytes / 2**20:.2f}MB",
+                'Max Diff': f"{max_diff:.1e}"
+            })
+
+    print("\nSimilarity Kernel Results:")
+    print(tabulate(
+        results,
+        headers='keys',
+        tablefmt='grid',
+        numalign='right'
+    ))
+
+def write_clustered_memmap(path, n_users: int, n_statements: int, block_size: int = 4096) -> np.memmap:
+    """Write clustered test votes to a .npy file block by block and map it"""
+    group_votes = np.random.choice([-1.0, 0.0, 1.0], size=(4, n_statements))
+    matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(n_users, n_statements))
+    for start in range(0, n_users, block_size):
+        rows = min(block_size, n_users - start)
+        matrix[start:start + rows] = generate_clustered_matrix(rows, n_statements, group_votes=group_votes)
+    matrix.flush()
+    return np.load(path, mmap_mode='r')
+
+def run_out_of_core_benchmark(sizes, n_statements: int = 100, work_dir=None, block_size: int = 1024):
+    """
+    Impute memory-mapped vote matrices with blocked_cosine_impute, spilling
+    neighbor lists and imputed votes to disk, then cluster and score the
+    mapped result. Reports times, file sizes and the peak resident memory
+    of the process.
+    """
+    results = []
+
+    print("\nRunning out-of-core benchmarks...\n")
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        for n_users in sizes:
+            print(f"Testing {n_users} users × {n_statements} statements...")
+            spill_dir = os.path.join(tmp_dir, f"{n_users}x{n_statements}")
+            os.makedirs(spill_dir)
+            values = write_clustered_memmap(os.path.join(spill_dir, 'votes.npy'), n_users, n_statements)
+            n_neighbors = max(2, int(np.log2(n_users)))
+
+            start = time.perf_counter()
+            imputed = blocked_cosine_impute(values, n_neighbors, spill_dir, block_size)
+            elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with silence_logger('api.update_gac_scores'):
+                labels = perform_clustering(imputed)
+                calculate_gac_scores(imputed, labels)
+            scoring_elapsed = time.perf_counter() - start
+
+            spilled = sum(
+                os.path.getsize(os.path.join(spill_dir, name))
+                for name in os.listdir(spill_dir) if name != 'votes.npy'
+            )
+            results.append({
+                'Size': f"{n_users}×{n_statements}",
+                'Time': format_time(elapsed),
+                'Cluster + GAC': format_time(scoring_elapsed),
+                'Matrix': f"{values.nbytes / 2**20:.1f}MB",
+                'Spilled': f"{spilled / 2**20:.1f}MB",
+                'Peak RSS': f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB",
+                'Missing Left': int(np.isnan(imputed).sum())
+            })
+            del values, imputed
+
+    print("\nOut-of-Core Results:")
+    print(tabulate(
+        results,
+        headers='keys',
+        tablefmt='grid',
+        numalign='right'
+    ))
+
 if __name__ == "__main__":
-    run_benchmarks() 
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark vote imputation')
+    parser.add_argument('--ann', action='store_true', help='Report LSH neighbor recall against exact neighbors instead')
+    parser.add_argument('--similarity', action='store_true', help='Compare the float64 and bitset similarity kernels instead')
+    parser.add_argument('--out-of-core', action='store_true',
+                        help='Impute memory-mapped matrices block by block, spilling to disk, instead')
+    parser.add_argument('--work-dir', help='Directory for out-of-core spill files (default: system temp)')
+    parser.add_argument('--block-size', type=int, default=1024, help='Rows per block for the out-of-core benchmark')
+    parser.add_argument('--participants', type=int, nargs='+', default=[1000, 5000, 10000],
+                        help='Participant counts for the ANN, similarity and out-of-core runs')
+    parser.add_argument('--statements', type=int, nargs='+', default=[100],
+                        help='Statement counts (the ANN and out-of-core runs use the first)')
+    args = parser.parse_args()
+
+    if args.ann:
+        run_ann_recall_report(args.participants, args.statements[0])
+    elif args.similarity:
+        run_similarity_benchmark(args.participants, args.statements)
+    elif args.out_of_core:
+        run_out_of_core_benchmark(args.participants, args.statements[0], args.work_dir, args.block_size)
+    else:
+        run_benchmarks() 
\ No newline at end of file
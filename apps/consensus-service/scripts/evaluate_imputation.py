@@ -6,6 +6,8 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 import json
+import multiprocessing
+import tempfile
 from tqdm import tqdm
 from itertools import combinations
 
@@ -15,9 +17,9 @@ sys.path.insert(0, str(root_dir))
 
 from api.update_gac_scores import (
     impute_missing_votes,
-    generate_vote_matrix,
     setup_logging as gac_setup_logging
 )
+from vote_data import load_votes
 
 # Keep the existing logging suppression
 @contextlib.contextmanager
@@ -50,40 +52,19 @@ logger = setup_logging(False)
 
 def load_vote_data(csv_path, min_votes=3):
     """Load vote data and identify qualified participants"""
-    df = pd.read_csv(csv_path)
+    data = load_votes(csv_path).actual()
     
     # First identify participants with sufficient votes
-    vote_counts = df.groupby('participant_id').size()
-    qualified_participants = vote_counts[vote_counts >= min_votes].index
+    vote_counts = data.participant_vote_counts()
+    qualified = vote_counts >= min_votes
+    qualified_participants = pd.Index(data.participant_ids[qualified], name='participant_id')
     
     # Filter to only include votes from qualified participants
-    df_qualified = df[df['participant_id'].isin(qualified_participants)]
-    
-    # Convert to format expected by generate_vote_matrix
-    votes = [
-        {
-            'statementId': row['statement_id'],
-            'participantId': row['participant_id'],
-            'voteValue': row['vote_value'],
-            'createdAt': datetime.now().isoformat(),
-            'updatedAt': datetime.now().isoformat()
-        }
-        for _, row in df_qualified.iterrows()
-    ]
-    
-    participants = [
-        {'uid': pid, 'createdAt': datetime.now().isoformat()}
-        for pid in qualified_participants
-    ]
-    
-    statements = [
-        {
-            'uid': sid,
-            'pollId': 'dummy_poll_id',
-            'createdAt': datetime.now().isoformat()
-        } 
-        for sid in df_qualified['statement_id'].unique()
-    ]
+    votes = data.subset(qualified[data.participant_codes])
+    df_qualified = votes.to_frame()
+    
+    participants = [{'uid': pid} for pid in votes.participant_ids]
+    statements = [{'uid': sid, 'pollId': 'dummy_poll_id'} for sid in votes.statement_ids]
     
     return df_qualified, participants, statements, votes, qualified_participants
 
@@ -139,122 +120,166 @@ def evaluate_participant_imputation(participant_id, df, vote_matrix, k_values=[1
     
     return results
 
-def evaluate_imputation_quality(df, participants, statements, votes, sample_size=None, max_k=3, random_state=42):
+# Read-only vote arrays shared with evaluation workers (see _init_worker)
+_shared = None
+
+def encode_vote_data(votes, data_dir):
+    """
+    Write the vote data as flat arrays that evaluation workers memory-map read-only.
+
+    Votes are stored in their original row order together with two index
+    permutations (by participant and by statement) and CSR-style offsets, so
+    a worker can pull one participant's votes or one statement's votes
+    without touching a DataFrame.
+    """
+    data_dir = Path(data_dir)
+
+    # Stable sorts keep each participant's votes in their original row order
+    by_participant = np.argsort(votes.participant_codes, kind='stable')
+    by_statement = np.argsort(votes.statement_codes, kind='stable')
+    participant_counts = np.bincount(votes.participant_codes, minlength=votes.n_participants)
+    statement_counts = np.bincount(votes.statement_codes, minlength=votes.n_statements)
+
+    arrays = {
+        'participant_ids': votes.participant_ids,
+        'statement_ids': votes.statement_ids,
+        'participant_codes': votes.participant_codes,
+        'statement_codes': votes.statement_codes,
+        'vote_codes': votes.votes,
+        'by_participant': by_participant,
+        'by_statement': by_statement,
+        'participant_offsets': np.concatenate(([0], np.cumsum(participant_counts))),
+        'statement_offsets': np.concatenate(([0], np.cumsum(statement_counts))),
+    }
+    for name, array in arrays.items():
+        np.save(data_dir / f'{name}.npy', array)
+
+def _init_worker(data_dir, verbose=False):
+    """Memory-map the shared vote arrays once per worker process"""
+    global _shared, logger
+    logger = setup_logging(verbose)
+    data_dir = Path(data_dir)
+    _shared = {
+        path.stem: np.load(path, mmap_mode='r')
+        for path in data_dir.glob('*.npy')
+    }
+    n_votes = np.diff(_shared['participant_offsets'])
+    _shared['eligible_participants'] = np.flatnonzero(n_votes >= 2)
+
+def _build_focused_matrix(statement_cols, participant, masked_cols):
+    """Build the participants x statements matrix for one participant's statements, with masked votes removed"""
+    data = _shared
+    offsets = data['statement_offsets']
+    vote_rows = np.concatenate([
+        data['by_statement'][offsets[s]:offsets[s + 1]] for s in statement_cols
+    ])
+    col_positions = np.repeat(
+        np.arange(len(statement_cols)),
+        [offsets[s + 1] - offsets[s] for s in statement_cols]
+    )
+
+    matrix = np.full((len(data['participant_ids']), len(statement_cols)), np.nan, dtype=np.float64)
+    matrix[data['participant_codes'][vote_rows], col_positions] = data['vote_codes'][vote_rows]
+    matrix[participant, masked_cols] = np.nan
+
+    return pd.DataFrame(
+        matrix,
+        index=np.asarray(data['participant_ids']),
+        columns=np.asarray(data['statement_ids'][statement_cols])
+    )
+
+def _evaluate_scenario(task, max_attempts=10):
+    """
+    Run one leave-k-out scenario with its own random generator.
+
+    Each scenario draws from a generator seeded by its own child SeedSequence,
+    so the results depend only on the scenario index and never on which
+    worker happens to run it.
+    """
+    scenario_index, seed_sequence, max_k = task
+    rng = np.random.default_rng(seed_sequence)
+    data = _shared
+
+    for _ in range(max_attempts):
+        try:
+            # Randomly select a participant with enough votes to mask
+            participant = data['eligible_participants'][rng.integers(len(data['eligible_participants']))]
+            start, end = data['participant_offsets'][participant], data['participant_offsets'][participant + 1]
+            n_votes = int(end - start)
+
+            # Randomly select k (number of votes to mask) and the votes to mask
+            k = int(rng.integers(1, min(max_k + 1, n_votes)))
+            mask_positions = rng.choice(n_votes, size=k, replace=False)
+
+            vote_rows = data['by_participant'][start:end]
+            statement_cols = pd.unique(data['statement_codes'][vote_rows])
+            col_lookup = {s: j for j, s in enumerate(statement_cols)}
+            masked_rows = vote_rows[mask_positions]
+
+            logger.info(f"Scenario {scenario_index}: participant {data['participant_ids'][participant]} "
+                        f"with {n_votes} votes, masking {k} votes")
+
+            masked_cols = [col_lookup[s] for s in data['statement_codes'][masked_rows]]
+            test_matrix = _build_focused_matrix(statement_cols, participant, masked_cols)
+
+            with suppress_gac_logging():
+                imputed_matrix = impute_missing_votes(test_matrix)
+
+            results = []
+            for row, col in zip(masked_rows, masked_cols):
+                true_value = float(data['vote_codes'][row])
+                imputed_value = float(imputed_matrix.iat[participant, col])
+                results.append({
+                    'participant_id': str(data['participant_ids'][participant]),
+                    'statement_id': str(test_matrix.columns[col]),
+                    'k_value': k,
+                    'n_available_votes': n_votes - k,
+                    'true_value': true_value,
+                    'imputed_value': imputed_value,
+                    'confidence': abs(imputed_value),
+                    'correct_sign': (true_value * imputed_value) > 0 if true_value != 0 else abs(imputed_value) < 0.3
+                })
+            return results
+
+        except Exception as e:
+            logger.warning(f"Error processing scenario {scenario_index}: {str(e)}, redrawing")
+
+    logger.error(f"Giving up on scenario {scenario_index} after {max_attempts} attempts")
+    return []
+
+def evaluate_imputation_quality(df, participants, statements, votes, sample_size=None, max_k=3, random_state=42,
+                                workers=1, verbose=False):
     """
     Evaluate imputation quality using leave-k-out cross validation.
+
+    Scenarios are independent, so with workers > 1 they run in a process pool.
+    Every scenario gets a generator spawned from SeedSequence(random_state) and
+    results are collected in scenario order, which makes the output identical
+    for a given random_state regardless of the number of workers.
     """
-    np.random.seed(random_state)
-    
-    # Get all qualified participants and their vote counts
-    print("Preparing participant data...")
-    participant_votes = df.groupby('participant_id')
-    all_participants = list(participant_votes.groups.keys())
-    
-    # Pre-process data for faster access
-    print("Pre-processing data structures...")
-    statement_map = {sid: i for i, sid in enumerate(df['statement_id'].unique())}
-    participant_map = {pid: i for i, pid in enumerate(all_participants)}
-    
-    # Pre-calculate participant vote data
-    participant_data = {}
-    print("Caching participant vote data...")
-    for pid in tqdm(all_participants, desc="Processing participants"):
-        p_votes = df[df['participant_id'] == pid]
-        participant_data[pid] = {
-            'votes': p_votes,
-            'statement_ids': p_votes['statement_id'].unique(),
-            'n_votes': len(p_votes)
-        }
-    
+    n_scenarios = sample_size or len(participants)
+    seed_sequences = np.random.SeedSequence(random_state).spawn(n_scenarios)
+    tasks = [(i, seed_sequences[i], max_k) for i in range(n_scenarios)]
+
     all_results = []
-    n_scenarios = sample_size or len(all_participants)
-    
-    # Evaluate scenarios with better progress tracking
-    print("\nEvaluating imputation scenarios...")
-    with tqdm(total=n_scenarios, desc="Progress", unit="scenarios", mininterval=1.0) as pbar:
-        scenario_count = 0
-        last_time = datetime.now()
-        
-        while scenario_count < n_scenarios:
-            try:
-                current_time = datetime.now()
-                if (current_time - last_time).total_seconds() >= 5:
-                    print(f"\nProcessing scenario {scenario_count + 1}/{n_scenarios}")
-                    last_time = current_time
-                
-                # Randomly select a participant
-                participant_id = np.random.choice(all_participants)
-                p_data = participant_data[participant_id]
-                
-                if p_data['n_votes'] < 2:  # Skip if not enough votes to mask
-                    continue
-                
-                # Randomly select k (number of votes to mask)
-                k = np.random.randint(1, min(max_k + 1, p_data['n_votes']))
-                
-                print(f"Processing participant {participant_id} with {p_data['n_votes']} votes, masking {k} votes")
-                
-                # Randomly select k votes to mask
-                mask_indices = np.random.choice(range(p_data['n_votes']), size=k, replace=False)
-                masked_votes = p_data['votes'].iloc[mask_indices]
-                
-                # Get relevant votes for this participant's statements
-                relevant_df = df[df['statement_id'].isin(p_data['statement_ids'])]
-                print(f"Found {len(relevant_df)} relevant votes for {len(p_data['statement_ids'])} statements")
-                
-                # Create focused vote data
-                focused_votes = [
-                    {
-                        'statementId': row['statement_id'],
-                        'participantId': row['participant_id'],
-                        'voteValue': row['vote_value'],
-                        'createdAt': datetime.now().isoformat(),
-                        'updatedAt': datetime.now().isoformat()
-                    }
-                    for _, row in relevant_df.iterrows()
-                ]
-                
-                focused_statements = [
-                    {'uid': sid, 'pollId': 'dummy_poll_id', 'createdAt': datetime.now().isoformat()}
-                    for sid in p_data['statement_ids']
-                ]
-                
-                print("Running imputation...")
-                # Generate focused vote matrix and run imputation
-                with suppress_gac_logging():
-                    test_matrix = generate_vote_matrix(focused_statements, focused_votes, participants)
-                    print(f"Generated test matrix of shape {test_matrix.shape}")
-                    
-                    # Mask the selected votes
-                    for _, vote in masked_votes.iterrows():
-                        test_matrix.loc[vote['participant_id'], vote['statement_id']] = np.nan
-                    
-                    imputed_matrix = impute_missing_votes(test_matrix)
-                
-                # Compare results
-                for _, vote in masked_votes.iterrows():
-                    true_value = 1.0 if vote['vote_value'] == 'AGREE' else (-1.0 if vote['vote_value'] == 'DISAGREE' else 0.0)
-                    imputed_value = imputed_matrix.loc[vote['participant_id'], vote['statement_id']]
-                    
-                    all_results.append({
-                        'participant_id': participant_id,
-                        'statement_id': vote['statement_id'],
-                        'k_value': k,
-                        'n_available_votes': p_data['n_votes'] - k,
-                        'true_value': true_value,
-                        'imputed_value': imputed_value,
-                        'confidence': abs(imputed_value),
-                        'correct_sign': (true_value * imputed_value) > 0 if true_value != 0 else abs(imputed_value) < 0.3
-                    })
-                
-                scenario_count += 1
-                pbar.update(1)
-                
-            except Exception as e:
-                print(f"\nError processing scenario: {str(e)}")
-                print(f"Continuing with next scenario...")
-                continue
-    
+    with tempfile.TemporaryDirectory(prefix='imputation_eval_') as data_dir:
+        print("Pre-processing data structures...")
+        encode_vote_data(votes, data_dir)
+
+        print(f"\nEvaluating imputation scenarios with {workers} worker(s)...")
+        with tqdm(total=n_scenarios, desc="Progress", unit="scenarios", mininterval=1.0) as pbar:
+            if workers > 1:
+                with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(data_dir, verbose)) as pool:
+                    chunksize = max(1, n_scenarios // (workers * 8))
+                    for results in pool.imap(_evaluate_scenario, tasks, chunksize=chunksize):
+                        all_results.extend(results)
+                        pbar.update(1)
+            else:
+                _init_worker(data_dir, verbose)
+                for task in tasks:
+                    all_results.extend(_evaluate_scenario(task))
+                    pbar.update(1)
+
     return all_results, None
 
 def calculate_metrics(results):
@@ -344,7 +369,7 @@ def print_results(metrics, matrix_stats):
             print(f"    Accuracy: {metrics[key]['accuracy']:.3f}")
             print(f"    Mean Confidence: {metrics[key]['mean_confidence']:.3f}")
 
-def main(csv_path, sample_size=None, min_votes=3, max_k=3, random_state=42, verbose=False):
+def main(csv_path, sample_size=None, min_votes=3, max_k=3, random_state=42, verbose=False, workers=1):
     """Main function to evaluate imputation quality"""
     global logger
     logger = setup_logging(verbose)
@@ -358,7 +383,7 @@ def main(csv_path, sample_size=None, min_votes=3, max_k=3, random_state=42, verb
     
     # Calculate total possible scenarios
     total_scenarios = 0
-    vote_counts = df.groupby('participant_id').size()
+    vote_counts = votes.participant_vote_counts()
     for participant_votes in vote_counts[vote_counts >= min_votes]:
         for k in range(1, min(max_k + 1, participant_votes)):
             total_scenarios += len(list(combinations(range(participant_votes), k)))
@@ -372,17 +397,17 @@ def main(csv_path, sample_size=None, min_votes=3, max_k=3, random_state=42, verb
     
     # Run evaluation
     results, _ = evaluate_imputation_quality(
-        df, participants, statements, votes, sample_size, max_k, random_state
+        df, participants, statements, votes, sample_size, max_k, random_state, workers, verbose
     )
     
     # Calculate metrics
     metrics = calculate_metrics(results)
     
     # Calculate matrix stats from the original data
-    total_possible_votes = len(qualified_participants) * len(df['statement_id'].unique())
-    actual_votes = len(df)
+    total_possible_votes = votes.n_participants * votes.n_statements
+    actual_votes = len(votes)
     matrix_stats = {
-        'matrix_shape': (len(qualified_participants), len(df['statement_id'].unique())),
+        'matrix_shape': (votes.n_participants, votes.n_statements),
         'sparsity': 1 - (actual_votes / total_possible_votes)
     }
     
@@ -393,6 +418,7 @@ def main(csv_path, sample_size=None, min_votes=3, max_k=3, random_state=42, verb
             'min_votes': min_votes,
             'max_k': max_k,
             'random_state': random_state,
+            'workers': workers,
             'duration_seconds': (datetime.now() - start_time).total_seconds(),
             'matrix_stats': matrix_stats
         },
@@ -412,12 +438,13 @@ def main(csv_path, sample_size=None, min_votes=3, max_k=3, random_state=42, verb
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description='Evaluate vote imputation quality')
-    parser.add_argument('csv_path', help='Path to the votes CSV file')
+    parser.add_argument('csv_path', help='Path to the votes CSV file or an exported .votes.npz file')
     parser.add_argument('--sample-size', type=int, help='Number of rows to sample (default: use all)')
     parser.add_argument('--min-votes', type=int, default=3, help='Minimum votes required for participant evaluation')
     parser.add_argument('--max-k', type=int, default=3, help='Maximum number of votes to mask at once')
     parser.add_argument('--random-state', type=int, default=42, help='Random seed for reproducibility')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes (results do not depend on this)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Show detailed progress logs')
     
     args = parser.parse_args()
-    main(args.csv_path, args.sample_size, args.min_votes, args.max_k, args.random_state, args.verbose)
\ No newline at end of file
+    main(args.csv_path, args.sample_size, args.min_votes, args.max_k, args.random_state, args.verbose, args.workers)
\ No newline at end of file
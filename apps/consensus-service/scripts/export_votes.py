@@ -0,0 +1,126 @@
+"""
+Export the actual votes of a poll or community model in the cached columnar
+format that the analysis scripts load directly (see vote_data.py).
+
+Unlike ccai_votes.sql, which cross joins every participant with every
+statement and leaves filter_votes.py to drop the NULL rows, this streams
+only real votes out of Postgres with COPY ... TO STDOUT, so export size and
+time scale with the number of votes rather than participants x statements.
+"""
+import sys
+import logging
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+# Add the parent directory to Python path to import from api
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from api.update_gac_scores import create_connection
+from vote_data import read_votes_csv, CACHE_SUFFIX
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+# COPY cannot take bind parameters, so the scope id is passed through a
+# session setting instead of being interpolated into the SQL text.
+SCOPE_SETTING = 'osccai.export_scope'
+
+SCOPE_VALUE = f"current_setting('{SCOPE_SETTING}')"
+
+SCOPE_FILTERS = {
+    'poll': f's."pollId" = {SCOPE_VALUE}',
+    'model': f's."pollId" IN (SELECT uid FROM "Poll" WHERE "communityModelId" = {SCOPE_VALUE})',
+}
+
+EXPORT_QUERY = """
+    COPY (
+        SELECT
+            v."participantId" AS participant_id,
+            v."statementId" AS statement_id,
+            v."voteValue" AS vote_value
+        FROM "Vote" v
+        JOIN "Statement" s ON s.uid = v."statementId"
+        WHERE {scope_filter}
+    ) TO STDOUT WITH (FORMAT csv, HEADER true)
+"""
+
+def get_model_id_by_name(cursor, model_name):
+    cursor.execute('SELECT uid FROM "CommunityModel" WHERE name = %s LIMIT 1', (model_name,))
+    result = cursor.fetchone()
+    if not result:
+        raise ValueError(f"Community model named {model_name!r} not found")
+    return result[0]
+
+def stream_votes_csv(cursor, scope, scope_id, stream):
+    """Stream the scope's votes as CSV into a binary file object"""
+    cursor.execute("SELECT set_config(%s, %s, false)", (SCOPE_SETTING, scope_id))
+    cursor.execute(EXPORT_QUERY.format(scope_filter=SCOPE_FILTERS[scope]), stream=stream)
+
+def export_votes(scope, scope_id, output_path, keep_csv=False):
+    """
+    Export the votes of a poll or community model to a .votes.npz file.
+
+    Returns the exported VoteData.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    start_time = datetime.now()
+
+    conn = create_connection()
+    try:
+        cursor = conn.cursor()
+        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as csv_file:
+            stream_votes_csv(cursor, scope, scope_id, csv_file)
+        cursor.close()
+    finally:
+        conn.close()
+
+    csv_path = Path(csv_file.name)
+    try:
+        data = read_votes_csv(csv_path)
+        data.save(
+            output_path,
+            scope=scope,
+            scope_id=scope_id,
+            exported_at=datetime.now().isoformat()
+        )
+        if keep_csv:
+            csv_path.replace(output_path.with_name(output_path.name.replace(CACHE_SUFFIX, '') + '.csv'))
+    finally:
+        csv_path.unlink(missing_ok=True)
+
+    logger.info(
+        f"Exported {len(data)} votes from {data.n_participants} participants on "
+        f"{data.n_statements} statements to {output_path} "
+        f"in {(datetime.now() - start_time).total_seconds():.2f}s"
+    )
+    return data
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Export actual votes in the columnar format used by the scripts')
+    scope_group = parser.add_mutually_exclusive_group(required=True)
+    scope_group.add_argument('--poll-id', help='Export the votes of a single poll')
+    scope_group.add_argument('--community-model-id', help='Export the votes of all polls of a community model')
+    scope_group.add_argument('--model-name', help="Export by community model name (e.g. 'Original CCAI')")
+    parser.add_argument('--output', help=f'Output file (default: output/votes_<id>{CACHE_SUFFIX})')
+    parser.add_argument('--keep-csv', action='store_true', help='Also keep the raw CSV next to the output file')
+
+    args = parser.parse_args()
+
+    if args.poll_id:
+        scope, scope_id = 'poll', args.poll_id
+    else:
+        scope = 'model'
+        scope_id = args.community_model_id
+        if args.model_name:
+            conn = create_connection()
+            try:
+                scope_id = get_model_id_by_name(conn.cursor(), args.model_name)
+            finally:
+                conn.close()
+
+    output = args.output or Path(__file__).parent / 'output' / f'votes_{scope_id}{CACHE_SUFFIX}'
+    export_votes(scope, scope_id, output, args.keep_csv)
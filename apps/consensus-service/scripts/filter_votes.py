@@ -1,18 +1,25 @@
 import pandas as pd
 
-def filter_votes(input_csv, min_votes_per_participant=1):
+from vote_data import NO_VOTE, VOTE_COLUMNS, encode_votes, load_votes, read_vote_frames
+
+def filter_votes(input_csv, min_votes_per_participant=1, use_cache=False):
     """
     Filter the votes CSV to keep only actual votes (non-NULL) and participants with minimum vote counts.
+
+    With use_cache, the parsed votes are also cached next to the CSV (see
+    vote_data.load_votes) so later runs skip parsing.
     """
-    # Read original CSV
-    df = pd.read_csv(input_csv)
+    # Read original CSV (or, when caching, its cached columnar form)
+    data = load_votes(input_csv, use_cache=use_cache)
     print(f"\nOriginal data:")
-    print(f"Total rows: {len(df)}")
-    print(f"Unique participants: {df['participant_id'].nunique()}")
+    print(f"Total rows: {len(data)}")
+    print(f"Unique participants: {data.n_participants}")
     
     # Count only actual votes (non-NULL values)
-    actual_votes = df[df['vote_value'].notna()]
-    vote_counts = actual_votes.groupby('participant_id').size()
+    actual = data.votes != NO_VOTE
+    counts = data.participant_vote_counts()
+    vote_counts = pd.Series(counts, index=pd.Index(data.participant_ids, name='participant_id'))
+    vote_counts = vote_counts[vote_counts > 0]
     
     print("\nActual vote count distribution:")
     print(vote_counts.describe())
@@ -23,7 +30,8 @@ def filter_votes(input_csv, min_votes_per_participant=1):
     qualified_participants = vote_counts[vote_counts >= min_votes_per_participant].index
     
     # Create filtered dataframe with only actual votes from qualified participants
-    df_filtered = actual_votes[actual_votes['participant_id'].isin(qualified_participants)]
+    qualified = counts >= min_votes_per_participant
+    df_filtered = data.subset(actual & qualified[data.participant_codes]).to_frame()
     
     # Generate output filename
     output_csv = input_csv.replace('.csv', f'_min{min_votes_per_participant}actual_votes.csv')
@@ -41,6 +49,65 @@ def filter_votes(input_csv, min_votes_per_participant=1):
     
     return df_filtered
 
+def filter_votes_streaming(input_csv, min_votes_per_participant=1, chunksize=1_000_000):
+    """
+    Two-pass, chunked version of filter_votes for exports too large to load at once.
+
+    The first pass only counts actual votes per participant; the second pass
+    re-reads the CSV and appends qualified rows to the output as it goes.
+    Memory is bounded by the chunk size plus one counter per participant,
+    independent of the number of rows. Rows are parsed and vote labels
+    encoded through vote_data like filter_votes does, so it prints the same
+    statistics and writes the same file, and returns the vote counts of the
+    participants that were kept.
+    """
+    def read_chunks():
+        for chunk in read_vote_frames(input_csv, chunksize=chunksize):
+            yield chunk, encode_votes(chunk['vote_value']) != NO_VOTE
+    
+    # Pass 1: count rows, participants and actual votes per participant
+    total_rows = 0
+    all_participants = set()
+    vote_counts = pd.Series(dtype='int64')
+    for chunk, actual in read_chunks():
+        total_rows += len(chunk)
+        all_participants.update(chunk['participant_id'].dropna().astype(str))
+        chunk_counts = chunk.loc[actual, 'participant_id'].astype(str).value_counts()
+        vote_counts = vote_counts.add(chunk_counts, fill_value=0)
+    vote_counts = vote_counts.astype('int64').sort_index().rename_axis('participant_id').rename(None)
+    
+    print(f"\nOriginal data:")
+    print(f"Total rows: {total_rows}")
+    print(f"Unique participants: {len(all_participants)}")
+    del all_participants
+    
+    print("\nActual vote count distribution:")
+    print(vote_counts.describe())
+    print(f"\nTop 10 participants by vote count:")
+    print(vote_counts.sort_values(ascending=False).head(10))
+    
+    filtered_counts = vote_counts[vote_counts >= min_votes_per_participant]
+    qualified_participants = set(filtered_counts.index)
+    
+    output_csv = input_csv.replace('.csv', f'_min{min_votes_per_participant}actual_votes.csv')
+    
+    print(f"\nParticipants with {min_votes_per_participant}+ actual votes: {len(qualified_participants)}")
+    print(f"Vote counts for filtered participants:")
+    print(filtered_counts.describe())
+    
+    # Pass 2: stream qualified actual votes to the output file
+    header = True
+    for chunk, actual in read_chunks():
+        keep = actual & chunk['participant_id'].astype(str).isin(qualified_participants).to_numpy()
+        chunk.loc[keep, VOTE_COLUMNS].to_csv(output_csv, index=False, mode='w' if header else 'a', header=header)
+        header = False
+    
+    print(f"\nFiltered data saved to: {output_csv}")
+    print(f"Total actual votes in filtered data: {int(filtered_counts.sum())}")
+    print(f"Unique participants in filtered data: {len(qualified_participants)}")
+    
+    return filtered_counts
+
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description='Filter votes CSV to keep only actual votes')
@@ -49,11 +116,18 @@ if __name__ == "__main__":
                       help='Minimum actual votes required per participant (default: 2)')
     parser.add_argument('--show-all-counts', action='store_true',
                       help='Show vote counts for all participants')
+    parser.add_argument('--cache', action='store_true',
+                      help='Cache the parsed votes next to the CSV as .votes.npz for later runs')
+    parser.add_argument('--chunksize', type=int,
+                      help='Stream the CSV in chunks of this many rows (constant memory for very large exports)')
     
     args = parser.parse_args()
-    df_filtered = filter_votes(args.input_csv, args.min_votes)
+    if args.chunksize:
+        filtered_counts = filter_votes_streaming(args.input_csv, args.min_votes, args.chunksize)
+    else:
+        df_filtered = filter_votes(args.input_csv, args.min_votes, use_cache=args.cache)
+        filtered_counts = df_filtered.groupby('participant_id', observed=True).size()
     
     if args.show_all_counts:
         print("\nAll participant actual vote counts:")
-        vote_counts = df_filtered.groupby('participant_id').size().sort_values(ascending=False)
-        print(vote_counts) 
\ No newline at end of file
+        print(filtered_counts.sort_values(ascending=False)) 
\ No newline at end of file
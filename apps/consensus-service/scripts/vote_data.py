@@ -0,0 +1,221 @@
+"""
+Shared vote data ingestion for the analysis scripts.
+
+Vote CSVs (participant_id, statement_id, vote_value) are parsed once into a
+compact columnar form: sorted id dictionaries, int32 codes into them and
+int8 vote values. That form is cached next to the CSV as a ``.votes.npz``
+file, so later runs skip CSV parsing entirely and can go straight to a
+vote matrix.
+"""
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+VOTE_CODES = {'AGREE': 1, 'DISAGREE': -1, 'PASS': 0}
+VOTE_LABELS = {code: label for label, code in VOTE_CODES.items()}
+
+# Code for rows without a vote (raw participant x statement exports)
+NO_VOTE = -128
+
+VOTE_COLUMNS = ['participant_id', 'statement_id', 'vote_value']
+
+CACHE_SUFFIX = '.votes.npz'
+FORMAT_VERSION = 1
+
+def encode_votes(vote_values):
+    """
+    int8 codes of vote labels, NO_VOTE for missing values.
+
+    Raises ValueError on values that are neither missing nor a known label,
+    so a change in the export format can't silently turn votes into non-votes.
+    """
+    values = pd.Series(vote_values).astype(object)
+    codes = values.map(VOTE_CODES)
+    unknown = codes.isna() & values.notna()
+    if unknown.any():
+        raise ValueError(f"Unrecognized vote values: {sorted(set(values[unknown].astype(str)))}")
+    return codes.fillna(NO_VOTE).to_numpy(dtype=np.int8)
+
+class VoteData:
+    """Votes as id dictionaries plus per-row codes, in original row order"""
+
+    def __init__(self, participant_ids, statement_ids, participant_codes, statement_codes, votes):
+        self.participant_ids = np.asarray(participant_ids, dtype=str)
+        self.statement_ids = np.asarray(statement_ids, dtype=str)
+        self.participant_codes = np.asarray(participant_codes, dtype=np.int32)
+        self.statement_codes = np.asarray(statement_codes, dtype=np.int32)
+        self.votes = np.asarray(votes, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.votes)
+
+    @property
+    def n_participants(self):
+        return len(self.participant_ids)
+
+    @property
+    def n_statements(self):
+        return len(self.statement_ids)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Encode a DataFrame with participant_id, statement_id and vote_value columns"""
+        participant_codes, participant_ids = pd.factorize(df['participant_id'], sort=True)
+        statement_codes, statement_ids = pd.factorize(df['statement_id'], sort=True)
+        votes = encode_votes(df['vote_value'])
+        return cls(participant_ids, statement_ids, participant_codes, statement_codes, votes)
+
+    def subset(self, row_mask):
+        """Keep only the selected rows, dropping ids that no longer occur"""
+        participant_used, participant_codes = np.unique(self.participant_codes[row_mask], return_inverse=True)
+        statement_used, statement_codes = np.unique(self.statement_codes[row_mask], return_inverse=True)
+        return VoteData(
+            self.participant_ids[participant_used],
+            self.statement_ids[statement_used],
+            participant_codes,
+            statement_codes,
+            self.votes[row_mask]
+        )
+
+    def actual(self):
+        """Only rows that carry an actual vote"""
+        return self.subset(self.votes != NO_VOTE)
+
+    def participant_vote_counts(self):
+        """Number of actual votes per participant, indexed like participant_ids"""
+        actual = self.votes != NO_VOTE
+        return np.bincount(self.participant_codes[actual], minlength=self.n_participants)
+
+    def to_frame(self):
+        """Decode into a DataFrame with categorical id and vote columns"""
+        labels = pd.Series(self.votes).map(VOTE_LABELS)
+        return pd.DataFrame({
+            'participant_id': pd.Categorical.from_codes(self.participant_codes, categories=self.participant_ids),
+            'statement_id': pd.Categorical.from_codes(self.statement_codes, categories=self.statement_ids),
+            'vote_value': labels.astype('category'),
+        })
+
+    def to_matrix(self, dtype=np.float64, path=None, block_size=4096):
+        """
+        Participants x statements matrix in the layout used by generate_vote_matrix:
+        1.0 agree, -1.0 disagree, 0.0 pass, NaN no vote.
+
+        With a path, the matrix is written to that .npy file block_size
+        participants at a time and returned as an np.memmap, so matrices
+        larger than memory can be built for out-of-core analysis.
+        """
+        shape = (self.n_participants, self.n_statements)
+        actual = self.votes != NO_VOTE
+        participant_codes = self.participant_codes[actual]
+        statement_codes = self.statement_codes[actual]
+        votes = self.votes[actual]
+
+        if path is None:
+            matrix = np.full(shape, np.nan, dtype=dtype)
+            matrix[participant_codes, statement_codes] = votes
+            return matrix
+
+        matrix = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+        order = np.argsort(participant_codes, kind='stable')
+        participant_codes, statement_codes, votes = participant_codes[order], statement_codes[order], votes[order]
+        block_starts = np.arange(0, self.n_participants + block_size, block_size)
+        bounds = np.searchsorted(participant_codes, block_starts)
+        for start, lo, hi in zip(block_starts[:-1], bounds[:-1], bounds[1:]):
+            block = np.full((min(block_size, self.n_participants - start), self.n_statements), np.nan, dtype=dtype)
+            block[participant_codes[lo:hi] - start, statement_codes[lo:hi]] = votes[lo:hi]
+            matrix[start:start + len(block)] = block
+        matrix.flush()
+        return matrix
+
+    def save(self, path, **metadata):
+        np.savez(
+            path,
+            format_version=FORMAT_VERSION,
+            participant_ids=self.participant_ids,
+            statement_ids=self.statement_ids,
+            participant_codes=self.participant_codes,
+            statement_codes=self.statement_codes,
+            votes=self.votes,
+            **metadata
+        )
+
+def cache_path_for(csv_path):
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.stem + CACHE_SUFFIX)
+
+def read_vote_frames(csv_path, chunksize=None):
+    """
+    Read only the three vote columns of a vote CSV, as categoricals.
+
+    Every reader of vote CSVs goes through here, so they all treat the same
+    values (pandas' default NA strings such as empty, NULL or NA) as missing
+    votes. With a chunksize this returns an iterator of DataFrames.
+    """
+    return pd.read_csv(
+        csv_path,
+        usecols=VOTE_COLUMNS,
+        dtype={column: 'category' for column in VOTE_COLUMNS},
+        chunksize=chunksize
+    )
+
+def read_votes_csv(csv_path):
+    """Parse a vote CSV into VoteData, reading only the three vote columns"""
+    return VoteData.from_frame(read_vote_frames(csv_path))
+
+def read_votes_npz(npz_path):
+    with np.load(npz_path) as cached:
+        if int(cached['format_version']) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vote cache format in {npz_path}")
+        return VoteData(
+            cached['participant_ids'],
+            cached['statement_ids'],
+            cached['participant_codes'],
+            cached['statement_codes'],
+            cached['votes']
+        )
+
+def _source_signature(csv_path):
+    stat = Path(csv_path).stat()
+    return stat.st_size, stat.st_mtime_ns
+
+def load_votes(path, use_cache=True):
+    """
+    Load votes from a CSV or a cached ``.votes.npz`` file.
+
+    For CSVs the cache next to the file is used when it was built from the
+    same file size and modification time, and (re)built otherwise.
+    """
+    path = Path(path)
+    if path.suffix == '.npz':
+        return read_votes_npz(path)
+
+    if not use_cache:
+        return read_votes_csv(path)
+
+    cache_path = cache_path_for(path)
+    source_size, source_mtime_ns = _source_signature(path)
+    if cache_path.exists():
+        try:
+            with np.load(cache_path) as cached:
+                fresh = (
+                    int(cached['format_version']) == FORMAT_VERSION
+                    and int(cached['source_size']) == source_size
+                    and int(cached['source_mtime_ns']) == source_mtime_ns
+                )
+            if fresh:
+                logger.info(f"Loading cached votes from {cache_path}")
+                return read_votes_npz(cache_path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable vote cache {cache_path}: {e}")
+
+    logger.info(f"Parsing {path} and caching to {cache_path}")
+    data = read_votes_csv(path)
+    try:
+        data.save(cache_path, source_size=source_size, source_mtime_ns=source_mtime_ns)
+    except OSError as e:
+        logger.warning(f"Could not write vote cache {cache_path}: {e}")
+    return data
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+from api import thread_budget
+from api.thread_budget import split_budget, blas_environment, detect_blas_backend, THREAD_ENV_VARS
+
+@pytest.mark.parametrize("poll_workers,cpu_budget,expected", [
+    (1, 8, (1, 8)),
+    (4, 8, (4, 2)),
+    (3, 8, (3, 2)),
+    (16, 8, (8, 1)),
+    (0, 8, (thread_budget.POLL_WORKERS, 8 // thread_budget.POLL_WORKERS)),
+])
+def test_split_budget(poll_workers, cpu_budget, expected):
+    assert split_budget(poll_workers, cpu_budget) == expected
+
+def test_blas_environment_overrides_and_restores(monkeypatch):
+    for name in THREAD_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('MKL_NUM_THREADS', '8')
+
+    with blas_environment(2):
+        assert all(os.environ[name] == '2' for name in THREAD_ENV_VARS)
+
+    assert os.environ['MKL_NUM_THREADS'] == '8'
+    assert 'OPENBLAS_NUM_THREADS' not in os.environ
+
+def test_limit_blas_threads_warns_without_threadpoolctl(monkeypatch, caplog):
+    monkeypatch.setattr(thread_budget, '_missing_warned', False)
+    monkeypatch.setitem(sys.modules, 'threadpoolctl', None)
+
+    with caplog.at_level('WARNING', logger=thread_budget.logger.name):
+        assert thread_budget.limit_blas_threads(1) is False
+        assert thread_budget.limit_blas_threads(1) is False
+
+    assert [r.levelname for r in caplog.records] == ['WARNING']
+
+def test_detect_blas_backend():
+    info = detect_blas_backend()
+    assert set(info) == {'backend', 'version', 'threads', 'controllable'}
+    assert info['backend']
@@ -1,15 +1,49 @@
+import os
+import json
+import shutil
+
 import pytest
 import numpy as np
+from datetime import datetime
 import pandas as pd
 from typing import Dict, List, Optional, Tuple, Union
 
 from api.update_gac_scores import (
     generate_vote_matrix,
     impute_missing_votes,
+    sds_impute,
     perform_clustering,
     calculate_gac_scores,
-    is_constitutionable
+    is_constitutionable,
+    is_material_change,
+    build_poll_diff,
+    cosine_impute,
+    stack_vote_matrices,
+    batch_cosine_impute,
+    batch_cluster_stats,
+    batch_calculate_gac_scores,
+    process_votes_batch,
+    process_votes as pipeline_process_votes,
+    calculate_cluster_assignments,
+    batch_cluster_distances,
+    exact_cosine_neighbors,
+    ann_cosine_neighbors,
+    impute_from_neighbors,
+    calculate_cosine_similarity,
+    blocked_cosine_impute,
+    perform_minibatch_kmeans,
+    assign_to_centroids,
+    perform_kmeans,
+    evaluate_k_candidates,
+    bootstrap_gac_scores,
+    cluster_stats,
+    constitutionable_threshold,
+    confident_constitutionable,
+    priority_scores,
+    resume_order
 )
+from api.vote_bitsets import VoteBitsets, pairwise_vote_products
+import api.update_gac_scores as update_gac_scores
 
 def create_participants(num_participants, ids=None):
     if ids:
@@ -1040,4 +1074,657 @@ def test_imputation_uncertainty_scaling():
     # Imputed value should show more uncertainty with less data
     assert abs(imputed1.loc['p2', 's1']) < abs(imputed2.loc['p2', 's3']), \
         "Imputed values should show more uncertainty (closer to 0) with less data"
-    
\ No newline at end of file
+    
+
+def reference_sds_impute(vote_matrix, k_user=3.0, k_statement=2.0, w_user=0.6, w_statement=0.4):
+    """Cell-by-cell SDS, as originally written in scripts/benchmark_imputation.py"""
+    values = vote_matrix.values
+    valid = ~np.isnan(values)
+    n_users = len(values)
+    imputed = values.copy()
+    
+    for u, s in zip(*np.where(~valid)):
+        similarities = np.zeros(n_users)
+        for v in range(n_users):
+            common = valid[u] & valid[v]
+            if common.any():
+                n_common = common.sum()
+                similarities[v] = np.mean(values[u][common] * values[v][common]) * n_common / (n_common + k_user)
+        
+        voters = valid[:, s].copy()
+        voters[u] = False
+        abs_sum = np.sum(np.abs(similarities[voters]))
+        user_pred = np.sum(similarities[voters] * values[voters, s]) / (abs_sum + 1e-10) if abs_sum > 0 else 0.0
+        
+        own_votes = values[u][valid[u]]
+        pattern = np.mean(own_votes) * len(own_votes) / (len(own_votes) + k_statement) if len(own_votes) else 0.0
+        imputed[u, s] = np.clip(w_user * user_pred + w_statement * pattern, -0.99, 0.99)
+    
+    return imputed
+
+def test_sds_impute_matches_cell_by_cell_reference():
+    """Vectorized SDS should reproduce the per-cell algorithm exactly"""
+    rng = np.random.default_rng(0)
+    values = rng.choice([-1.0, 0.0, 1.0], size=(12, 7))
+    values[rng.random(values.shape) < 0.4] = np.nan
+    values[3] = np.nan  # participant without any votes
+    vote_matrix = pd.DataFrame(values)
+    
+    imputed = sds_impute(vote_matrix)
+    
+    np.testing.assert_allclose(imputed.values, reference_sds_impute(vote_matrix), atol=1e-12)
+
+def test_impute_missing_votes_sds_strategy():
+    participants = create_participants(4, ids=['p1', 'p2', 'p3', 'p4'])
+    statements = create_statements(3, ids=['s1', 's2', 's3'])
+    votes = create_votes(participants, statements, {
+        ('p1', 's1'): 'AGREE', ('p2', 's1'): 'AGREE',
+        ('p1', 's2'): 'AGREE', ('p2', 's2'): 'AGREE',
+        ('p1', 's3'): 'AGREE',
+        ('p3', 's1'): 'DISAGREE', ('p4', 's1'): 'DISAGREE',
+        ('p3', 's3'): 'DISAGREE',
+    })
+    vote_matrix = generate_vote_matrix(statements, votes, participants)
+    imputed = impute_missing_votes(vote_matrix, method='sds')
+    
+    # Observed votes are kept, missing ones are filled with bounded values
+    assert imputed.loc['p1', 's1'] == 1.0
+    assert imputed.loc['p3', 's3'] == -1.0
+    assert not imputed.isnull().values.any()
+    assert imputed.loc['p2', 's3'] > 0
+    assert np.all(np.abs(imputed.values[vote_matrix.isnull().values]) <= 0.99)
+
+def test_impute_missing_votes_unknown_method():
+    vote_matrix = pd.DataFrame([[1.0, np.nan], [np.nan, -1.0]])
+    with pytest.raises(ValueError):
+        impute_missing_votes(vote_matrix, method='knn')
+
+@pytest.mark.parametrize("old_score,old_is_const,new_score,new_is_const,expected", [
+    (None, False, 0.5, False, True),     # first calculation
+    (0.5, False, 0.5, False, False),     # identical
+    (0.5, False, 0.5009, False, False),  # within epsilon
+    (0.5, False, 0.502, False, True),    # moved more than epsilon
+    (0.7, False, 0.7001, True, True),    # constitutionable flag flipped
+])
+def test_is_material_change(old_score, old_is_const, new_score, new_is_const, expected):
+    assert is_material_change(old_score, old_is_const, new_score, new_is_const, epsilon=0.001) == expected
+
+def test_build_poll_diff():
+    statements = create_statements(3)
+    gac_scores = {
+        'statement1': {'score': 0.9, 'n_votes': 10, 'n_participants': 10},
+        'statement2': {'score': 0.3, 'n_votes': 10, 'n_participants': 10},
+    }
+    current_scores = {
+        'statement1': (0.5, False),
+        'statement2': (0.3, False),
+        'statement3': (0.4, False),
+    }
+    
+    diff = build_poll_diff('poll1', statements, gac_scores, current_scores, epsilon=0.001)
+    rows = {row['statementId']: row for row in diff['statements']}
+    
+    assert rows['statement1']['newIsConstitutionable'] and rows['statement1']['material']
+    assert rows['statement1']['delta'] == pytest.approx(0.4)
+    assert not rows['statement2']['material']
+    assert rows['statement3']['newScore'] is None and rows['statement3']['material']
+    assert diff['summary']['materialChanges'] == 2
+    assert diff['summary']['becameConstitutionable'] == 1
+    assert diff['summary']['maxAbsDelta'] == pytest.approx(0.4)
+
+def create_random_polls(n_polls, seed=0):
+    rng = np.random.default_rng(seed)
+    polls = []
+    for b in range(n_polls):
+        participants = create_participants(int(rng.integers(2, 30)))
+        statements = create_statements(int(rng.integers(1, 12)), poll_id=f'poll{b}')
+        vote_map = {
+            (p['uid'], s['uid']): rng.choice(['AGREE', 'DISAGREE', 'PASS'])
+            for p in participants for s in statements if rng.random() < 0.6
+        }
+        polls.append((participants, statements, create_votes(participants, statements, vote_map)))
+    return polls
+
+def test_stack_vote_matrices_matches_generate_vote_matrix():
+    polls = create_random_polls(5)
+    stacked, n_participants, n_statements = stack_vote_matrices(polls)
+    
+    for b, (participants, statements, votes) in enumerate(polls):
+        expected = generate_vote_matrix(statements, votes, participants).values
+        block = stacked[b, :n_participants[b], :n_statements[b]]
+        np.testing.assert_array_equal(block, expected)
+        assert np.isnan(stacked[b, n_participants[b]:]).all()
+        assert np.isnan(stacked[b, :, n_statements[b]:]).all()
+
+def test_batch_cosine_impute_matches_cosine_impute():
+    polls = create_random_polls(8, seed=1)
+    stacked, n_participants, n_statements = stack_vote_matrices(polls)
+    imputed = batch_cosine_impute(stacked, n_participants)
+    
+    for b, (participants, statements, votes) in enumerate(polls):
+        vote_matrix = generate_vote_matrix(statements, votes, participants)
+        n_neighbors = min(len(participants) - 1, max(2, int(np.log2(len(participants)))))
+        expected = cosine_impute(vote_matrix, n_neighbors).values
+        np.testing.assert_allclose(imputed[b, :n_participants[b], :n_statements[b]], expected, atol=1e-12)
+
+def test_batch_calculate_gac_scores_matches_calculate_gac_scores():
+    polls = create_random_polls(6, seed=2)
+    stacked, n_participants, n_statements = stack_vote_matrices(polls)
+    imputed = np.nan_to_num(stacked)
+    rng = np.random.default_rng(3)
+    labels = np.full(stacked.shape[:2], -1)
+    for b in range(len(polls)):
+        labels[b, :n_participants[b]] = rng.integers(0, 3, n_participants[b])
+    
+    scores, total_votes = batch_calculate_gac_scores(*batch_cluster_stats(imputed, labels), n_participants)
+    
+    for b, (participants, statements, _) in enumerate(polls):
+        matrix = pd.DataFrame(imputed[b, :n_participants[b], :n_statements[b]], columns=[s['uid'] for s in statements])
+        expected = calculate_gac_scores(matrix, labels[b, :n_participants[b]])
+        for j, statement in enumerate(statements):
+            assert scores[b, j] == pytest.approx(expected[statement['uid']]['score'])
+            assert total_votes[b, j] == expected[statement['uid']]['n_votes']
+
+def test_process_votes_batch_returns_scores_per_poll():
+    polls = create_random_polls(4, seed=4)
+    results = process_votes_batch(polls)
+    
+    assert len(results) == len(polls)
+    for (participants, statements, _), gac_scores in zip(polls, results):
+        assert set(gac_scores) == {s['uid'] for s in statements}
+        for data in gac_scores.values():
+            assert 0 <= data['score'] <= 1
+            assert data['n_participants'] == len(participants)
+
+def test_calculate_cluster_assignments():
+    matrix = pd.DataFrame(
+        [[1.0, 1.0], [1.0, 0.0], [-1.0, -1.0], [-1.0, -0.5]],
+        index=['p1', 'p2', 'p3', 'p4']
+    )
+    clusters = np.array([3, 3, 7, 7])
+    
+    assignments = calculate_cluster_assignments(matrix, clusters)
+    
+    assert assignments['p1'] == (3, pytest.approx(0.5))
+    assert assignments['p2'] == (3, pytest.approx(0.5))
+    assert assignments['p3'] == (7, pytest.approx(0.25))
+    assert assignments['p4'][0] == 7
+
+def test_batch_cluster_distances_ignore_padding():
+    polls = create_random_polls(5, seed=5)
+    stacked, n_participants, n_statements = stack_vote_matrices(polls)
+    imputed = np.where(np.isnan(stacked), 0.5, stacked)  # non-zero padding must not leak in
+    rng = np.random.default_rng(6)
+    labels = np.full(stacked.shape[:2], -1)
+    for b in range(len(polls)):
+        labels[b, :n_participants[b]] = rng.integers(0, 2, n_participants[b])
+    
+    distances = batch_cluster_distances(imputed, labels, n_statements)
+    
+    for b in range(len(polls)):
+        block = imputed[b, :n_participants[b], :n_statements[b]]
+        expected = calculate_cluster_assignments(pd.DataFrame(block), labels[b, :n_participants[b]])
+        np.testing.assert_allclose(distances[b, :n_participants[b]], [expected[i][1] for i in range(n_participants[b])])
+        assert (distances[b, n_participants[b]:] == 0).all()
+
+def test_process_votes_include_clusters():
+    participants = create_participants(6)
+    statements = create_statements(3)
+    vote_map = {(p['uid'], s['uid']): 'AGREE' if i < 3 else 'DISAGREE'
+                for i, p in enumerate(participants) for s in statements}
+    votes = create_votes(participants, statements, vote_map)
+    
+    gac_scores, assignments = pipeline_process_votes(participants, statements, votes, include_clusters=True)
+    
+    assert set(gac_scores) == {s['uid'] for s in statements}
+    assert set(assignments) == {p['uid'] for p in participants}
+    assert all(distance >= 0 for _, distance in assignments.values())
+
+def create_clustered_votes(n_participants, n_statements, n_groups=3, seed=0):
+    rng = np.random.default_rng(seed)
+    group_votes = rng.choice([-1.0, 0.0, 1.0], size=(n_groups, n_statements))
+    values = group_votes[rng.integers(0, n_groups, n_participants)]
+    noisy = rng.random(values.shape) < 0.1
+    values[noisy] = rng.choice([-1.0, 0.0, 1.0], size=noisy.sum())
+    values[rng.random(values.shape) < 0.4] = np.nan
+    return values
+
+def test_impute_from_exact_neighbors_matches_cosine_impute():
+    values = create_clustered_votes(40, 15)
+    vote_matrix = pd.DataFrame(values)
+    neighbors, similarities = exact_cosine_neighbors(values, 5, block_size=16)
+    np.testing.assert_allclose(
+        impute_from_neighbors(values, neighbors, similarities, block_size=16),
+        cosine_impute(vote_matrix, 5).values,
+        atol=1e-12
+    )
+
+def test_ann_cosine_neighbors_recall():
+    values = create_clustered_votes(600, 40)
+    exact, exact_similarities = exact_cosine_neighbors(values, 8)
+    approximate, approximate_similarities = ann_cosine_neighbors(values, 8)
+
+    assert (approximate >= 0).all()
+    assert not (approximate == np.arange(600)[:, np.newaxis]).any()
+    assert all(len(set(row)) == 8 for row in approximate)
+    # Returned similarities are the exact ones of the returned neighbors
+    all_similarities = update_gac_scores._cosine_similarity_values(values)
+    np.testing.assert_allclose(approximate_similarities, np.take_along_axis(all_similarities, approximate, axis=1))
+    recall = (approximate[:, :, np.newaxis] == exact[:, np.newaxis, :]).any(axis=1).mean()
+    assert recall > 0.5
+    assert np.abs(approximate_similarities).sum() > 0.9 * np.abs(exact_similarities).sum()
+
+def test_impute_missing_votes_uses_ann_above_threshold(monkeypatch):
+    values = create_clustered_votes(64, 20)
+    vote_matrix = pd.DataFrame(values, index=[f'p{i}' for i in range(64)])
+    monkeypatch.setattr(update_gac_scores, 'ANN_MIN_PARTICIPANTS', 32)
+
+    imputed = impute_missing_votes(vote_matrix)
+
+    assert list(imputed.index) == list(vote_matrix.index)
+    assert not imputed.isna().any().any()
+    observed = ~np.isnan(values)
+    np.testing.assert_array_equal(imputed.values[observed], values[observed])
+
+def test_pairwise_vote_products_match_float_products():
+    values = create_clustered_votes(30, 150)
+    bitsets = VoteBitsets.from_values(values)
+    mask = (~np.isnan(values)).astype(float)
+    filled = np.nan_to_num(values)
+
+    covotes, dot_products = pairwise_vote_products(bitsets, bitsets.rows(slice(5, 20)), block_elements=64)
+
+    np.testing.assert_array_equal(covotes, mask @ mask[5:20].T)
+    np.testing.assert_array_equal(dot_products, filled @ filled[5:20].T)
+    np.testing.assert_array_equal(bitsets.vote_counts(), (filled != 0).sum(axis=1))
+
+def test_bitset_similarity_kernel_matches_float():
+    vote_matrix = pd.DataFrame(create_clustered_votes(25, 70))
+    pd.testing.assert_frame_equal(
+        calculate_cosine_similarity(vote_matrix, kernel='bitset'),
+        calculate_cosine_similarity(vote_matrix, kernel='float'),
+        atol=1e-12
+    )
+
+def test_bitset_similarity_kernel_falls_back_for_non_ternary_votes():
+    vote_matrix = pd.DataFrame([[0.5, 1.0, np.nan], [1.0, -1.0, 0.0], [np.nan, 0.25, 1.0]])
+    pd.testing.assert_frame_equal(
+        calculate_cosine_similarity(vote_matrix, kernel='bitset'),
+        calculate_cosine_similarity(vote_matrix, kernel='float')
+    )
+    with pytest.raises(ValueError):
+        calculate_cosine_similarity(vote_matrix, kernel='int8')
+
+def test_exact_cosine_neighbors_same_for_any_block_size():
+    values = create_clustered_votes(70, 12)
+    neighbors, similarities = exact_cosine_neighbors(values, 6, block_size=1000)
+    blocked_neighbors, blocked_similarities = exact_cosine_neighbors(values, 6, block_size=16)
+    # Blocked matrix products can round differently, which only reorders near ties
+    assert (blocked_neighbors == neighbors).mean() > 0.95
+    np.testing.assert_allclose(np.abs(blocked_similarities), np.abs(similarities), atol=1e-12)
+
+def test_blocked_cosine_impute_memmap(tmp_path):
+    values = create_clustered_votes(50, 10)
+    path = tmp_path / 'votes.npy'
+    np.save(path, values)
+    mapped = np.load(path, mmap_mode='r')
+
+    imputed = blocked_cosine_impute(mapped, 5, tmp_path / 'spill', block_size=16)
+
+    assert isinstance(imputed, np.memmap)
+    assert {'neighbors.npy', 'neighbor_similarities.npy', 'imputed.npy'} <= {p.name for p in (tmp_path / 'spill').iterdir()}
+    np.testing.assert_allclose(imputed, cosine_impute(pd.DataFrame(values), 5).values, atol=1e-12)
+
+def test_blocked_cosine_impute_defaults_to_temporary_spill_dir():
+    values = create_clustered_votes(30, 6)
+    imputed = blocked_cosine_impute(values, 4, block_size=8)
+    try:
+        np.testing.assert_allclose(imputed, cosine_impute(pd.DataFrame(values), 4).values, atol=1e-12)
+    finally:
+        shutil.rmtree(os.path.dirname(imputed.filename))
+
+def test_cluster_stats_and_bootstrap_same_for_any_block_size():
+    rng = np.random.default_rng(2)
+    imputed = rng.choice([-1.0, 0.0, 1.0], size=(40, 7))
+    labels = rng.integers(0, 3, 40)
+
+    whole = cluster_stats(imputed, labels)
+    blocked = cluster_stats(imputed, labels, block_elements=15)
+    for expected, actual in zip(whole, blocked):
+        np.testing.assert_allclose(actual, expected)
+    np.testing.assert_allclose(whole[0], batch_cluster_stats(imputed[np.newaxis], labels[np.newaxis])[0])
+
+    np.testing.assert_allclose(
+        bootstrap_gac_scores(imputed, labels, 12, seed=1, block_elements=50),
+        bootstrap_gac_scores(imputed, labels, 12, seed=1)
+    )
+
+def test_clustering_and_gac_scores_on_memmap(tmp_path, monkeypatch):
+    monkeypatch.setattr(update_gac_scores, 'MINIBATCH_MIN_PARTICIPANTS', 32)
+    monkeypatch.setattr(update_gac_scores, 'BLOCK_ELEMENTS', 64)
+    np.save(tmp_path / 'votes.npy', create_clustered_votes(60, 8))
+    imputed = blocked_cosine_impute(np.load(tmp_path / 'votes.npy', mmap_mode='r'), 5, tmp_path / 'spill')
+
+    labels = perform_clustering(imputed)
+    gac_scores = calculate_gac_scores(imputed, labels)
+    expected = calculate_gac_scores(pd.DataFrame(np.asarray(imputed)), labels)
+
+    assert len(labels) == 60
+    assert sorted(gac_scores) == list(range(8))
+    for j in range(8):
+        assert gac_scores[j]['score'] == pytest.approx(expected[j]['score'])
+
+def create_blobs(n_per_blob, centers, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = np.repeat(np.arange(len(centers)), n_per_blob)
+    return np.asarray(centers, dtype=float)[labels] + rng.normal(0, 0.1, (len(labels), len(centers[0]))), labels
+
+def test_assign_to_centroids_blocks():
+    data, labels = create_blobs(20, [[1, 1, 0], [-1, 0, 1], [0, -1, -1]])
+    np.testing.assert_array_equal(assign_to_centroids(data, np.array([[1, 1, 0], [-1, 0, 1], [0, -1, -1]]), block_size=7), labels)
+
+def test_perform_minibatch_kmeans_separates_blobs():
+    np.random.seed(3)
+    data, labels = create_blobs(200, [[1, 1, 1, 1], [-1, -1, -1, -1]])
+    found = perform_minibatch_kmeans(data, 2, batch_size=32)
+    assert len(found) == len(data)
+    # Same partition up to label order
+    assert len(set(zip(found, labels))) == 2
+
+def test_perform_clustering_uses_minibatch_above_threshold(monkeypatch):
+    calls = []
+    def fake_minibatch(data, k, **kwargs):
+        calls.append(k)
+        return np.arange(len(data)) % k
+    monkeypatch.setattr(update_gac_scores, 'MINIBATCH_MIN_PARTICIPANTS', 50)
+    monkeypatch.setattr(update_gac_scores, 'perform_minibatch_kmeans', fake_minibatch)
+
+    data, _ = create_blobs(30, [[1, 1], [-1, -1]])
+    labels = perform_clustering(pd.DataFrame(data))
+
+    # Small polls stop at the first k whose clusters are large enough
+    assert calls == [3]
+    assert len(np.unique(labels)) == 3
+
+def test_evaluate_k_candidates_reports_sizes_and_inertia():
+    data, _ = create_blobs(25, [[2, 0], [-2, 0], [0, 3]])
+    np.random.seed(0)
+    candidates = list(evaluate_k_candidates(data, [3, 2], workers=2))
+
+    assert [c['k'] for c in candidates] == [3, 2]
+    for candidate in candidates:
+        labels = candidate['labels']
+        assert candidate['sizes'].sum() == len(data)
+        expected = sum(((data[labels == c] - data[labels == c].mean(axis=0)) ** 2).sum() for c in np.unique(labels))
+        assert candidate['inertia'] == pytest.approx(expected)
+    assert candidates[0]['inertia'] < candidates[1]['inertia']
+
+    # Seeded from the global random state, so reruns are reproducible
+    np.random.seed(0)
+    rerun = list(evaluate_k_candidates(data, [3, 2], workers=2))
+    for a, b in zip(candidates, rerun):
+        np.testing.assert_array_equal(a['labels'], b['labels'])
+
+def test_evaluate_k_candidates_parallel_matches_serial(monkeypatch):
+    data, _ = create_blobs(25, [[2, 0], [-2, 0], [0, 3]])
+    np.random.seed(0)
+    serial = list(evaluate_k_candidates(data, [3, 2], workers=2))
+
+    monkeypatch.setattr(update_gac_scores, 'CLUSTER_PARALLEL_MIN_PARTICIPANTS', 0)
+    np.random.seed(0)
+    parallel = list(evaluate_k_candidates(data, [3, 2], workers=2))
+    executor = update_gac_scores._cluster_executor(2)
+    evaluate_k_candidates(data, [3, 2], workers=2)
+
+    for a, b in zip(serial, parallel):
+        np.testing.assert_array_equal(a['labels'], b['labels'])
+    # The thread pool is reused between calls
+    assert update_gac_scores._cluster_executor(2) is executor
+
+def test_perform_kmeans_accepts_generator():
+    data, labels = create_blobs(15, [[1, 1], [-1, -1]])
+    found = perform_kmeans(data, 2, rng=np.random.default_rng(1))
+    assert len(set(zip(found, labels))) == 2
+
+def test_perform_kmeans_with_shared_row_norms():
+    data, _ = create_blobs(15, [[1, 1], [-1, -1], [1, -1]])
+    plain = perform_kmeans(data, 3, rng=np.random.default_rng(2))
+    shared = perform_kmeans(data, 3, rng=np.random.default_rng(2), squared_norms=(data ** 2).sum(axis=1))
+    np.testing.assert_array_equal(plain, shared)
+
+def test_bootstrap_gac_scores_unanimous_clusters_are_stable():
+    imputed = np.array([[1.0, -1.0], [1.0, -1.0], [1.0, 1.0], [1.0, 1.0], [1.0, 1.0]])
+    labels = np.array([0, 0, 1, 1, 1])
+    replicates = bootstrap_gac_scores(imputed, labels, n_replicates=50)
+    point = calculate_gac_scores(pd.DataFrame(imputed), labels)
+
+    assert replicates.shape == (50, 2)
+    np.testing.assert_allclose(replicates[:, 0], point[0]['score'])
+    np.testing.assert_allclose(replicates[:, 1], point[1]['score'])
+
+def test_bootstrap_gac_scores_is_reproducible():
+    rng = np.random.default_rng(0)
+    imputed = rng.choice([-1.0, 0.0, 1.0], size=(30, 6))
+    labels = rng.integers(0, 3, 30)
+    np.testing.assert_array_equal(bootstrap_gac_scores(imputed, labels, 20, seed=4), bootstrap_gac_scores(imputed, labels, 20, seed=4))
+
+def test_calculate_gac_scores_includes_bootstrap_interval(monkeypatch):
+    rng = np.random.default_rng(1)
+    imputed = pd.DataFrame(rng.choice([-1.0, 1.0], p=[0.2, 0.8], size=(40, 5)))
+    labels = rng.integers(0, 2, 40)
+
+    # Off by default
+    assert 'ci_low' not in calculate_gac_scores(imputed, labels)[0]
+
+    monkeypatch.setattr(update_gac_scores, 'BOOTSTRAP_REPLICATES', 100)
+    gac_scores = calculate_gac_scores(imputed, labels)
+    replicates = bootstrap_gac_scores(imputed.to_numpy(), np.unique(labels, return_inverse=True)[1], 100)
+    for j, entry in gac_scores.items():
+        # Plain percentiles of the replicates
+        assert entry['ci_low'] == pytest.approx(np.quantile(replicates[:, j], 0.05))
+        assert entry['ci_high'] == pytest.approx(np.quantile(replicates[:, j], 0.95))
+        assert 0.0 <= entry['p_constitutionable'] <= 1.0
+
+def test_constitutionable_threshold():
+    assert constitutionable_threshold(2) == pytest.approx(0.85)
+    assert constitutionable_threshold(1000) == pytest.approx(0.66 * (1 + 2 / np.log2(1002)))
+    assert is_constitutionable({'score': constitutionable_threshold(50), 'n_participants': 50})
+
+@pytest.mark.parametrize("score,p_constitutionable,previous,expected", [
+    (0.9, 0.6, None, True),    # No stored flag: point estimate decides
+    (0.9, 0.6, False, False),  # Unconfident flip up is held back
+    (0.9, 0.95, False, True),  # Confident flip up
+    (0.5, 0.3, True, True),    # Unconfident flip down is held back
+    (0.5, 0.05, True, False),  # Confident flip down
+    (0.9, 0.6, True, True),    # No flip
+    (0.9, None, False, True),  # No bootstrap data
+])
+def test_confident_constitutionable(score, p_constitutionable, previous, expected):
+    gac_data = {'score': score, 'n_participants': 1000}
+    if p_constitutionable is not None:
+        gac_data['p_constitutionable'] = p_constitutionable
+    assert confident_constitutionable(gac_data, previous, confidence=0.8) == expected
+
+def test_priority_scores_favor_uncertain_and_undersampled_statements():
+    labels = np.array([0, 0, 0, 1, 1, 1])
+    observed = np.ones((6, 3), dtype=bool)
+    observed[3:, 2] = False  # Cluster 1 never voted on statement 2
+    scores = np.array([0.95, 0.0, 0.95])
+    intervals = {'p_constitutionable': np.array([1.0, 0.5, 1.0])}
+
+    priorities = priority_scores(observed, labels, scores, intervals)
+
+    np.testing.assert_allclose(priorities, [0.5 / 4, 0.5 + 0.5 / 4, 0.5])
+    assert priorities.argmin() == 0
+
+def test_priority_scores_without_bootstrap_use_threshold_distance():
+    labels = np.zeros(4, dtype=np.int64)
+    observed = np.ones((4, 2), dtype=bool)
+    threshold = constitutionable_threshold(4)
+    priorities = priority_scores(observed, labels, np.array([threshold, threshold - 0.5]))
+    np.testing.assert_allclose(priorities, [0.5 + 0.5 / 5, 0.5 / 5])
+
+def test_process_votes_includes_priority():
+    participants = [{'uid': f'p{i}'} for i in range(6)]
+    statements = [{'uid': f's{j}', 'pollId': 'poll'} for j in range(3)]
+    votes = [
+        {'participantId': f'p{i}', 'statementId': f's{j}', 'voteValue': 'AGREE'}
+        for i in range(6) for j in range(3) if (i + j) % 4
+    ]
+    gac_scores = pipeline_process_votes(participants, statements, votes)
+    batch_scores = process_votes_batch([(participants, statements, votes)])[0]
+    for scores in (gac_scores, batch_scores):
+        assert set(scores) == {'s0', 's1', 's2'}
+        assert all(0.0 <= entry['priority'] <= 1.0 for entry in scores.values())
+
+def test_resume_order_starts_after_cursor_and_wraps():
+    early, late = datetime(2026, 1, 1), datetime(2026, 1, 2)
+    polls = [
+        {'uid': 'a', 'staleSince': early},
+        {'uid': 'b', 'staleSince': early},
+        {'uid': 'c', 'staleSince': late},
+        {'uid': 'd', 'staleSince': late},
+    ]
+    assert [p['uid'] for p in resume_order(polls)] == ['a', 'b', 'c', 'd']
+    assert [p['uid'] for p in resume_order(polls, early, 'b')] == ['c', 'd', 'a', 'b']
+    # The cursor poll itself was scored and dropped out of the queue
+    assert [p['uid'] for p in resume_order(polls[1:], early, 'a')] == ['b', 'c', 'd']
+    assert [p['uid'] for p in resume_order(polls, late, 'd')] == ['a', 'b', 'c', 'd']
+
+class FakeCursor:
+    """Cursor stand-in for code paths whose queries are patched out."""
+    def execute(self, query, params=None):
+        pass
+
+    def fetchone(self):
+        return (None,)
+
+class FakeConnection:
+    def commit(self):
+        pass
+
+def test_failed_scoring_is_retried_on_next_run(monkeypatch):
+    participants = [{'uid': f'p{i}'} for i in range(6)]
+    statements = [{'uid': f's{j}', 'pollId': 'poll'} for j in range(3)]
+    votes = [
+        {'participantId': f'p{i}', 'statementId': f's{j}', 'voteValue': 'AGREE' if (i + j) % 3 else 'DISAGREE'}
+        for i in range(6) for j in range(3)
+    ]
+    cache = {}
+    monkeypatch.setattr(update_gac_scores, 'compute_poll_fingerprint', lambda cursor, poll_id: ('fp', len(votes), None))
+    monkeypatch.setattr(update_gac_scores, 'get_cached_fingerprint', lambda cursor, poll_id: cache.get(poll_id))
+    monkeypatch.setattr(update_gac_scores, 'save_poll_fingerprint',
+                        lambda cursor, poll_id, fingerprint, *args: cache.__setitem__(poll_id, fingerprint))
+    monkeypatch.setattr(update_gac_scores, 'fetch_poll_data', lambda cursor, poll_id: (statements, votes, participants))
+    monkeypatch.setattr(update_gac_scores, 'get_constitutionable_statements', lambda cursor, poll_id: set())
+    monkeypatch.setattr(update_gac_scores, 'get_community_model_id', lambda cursor, poll_id: (None, False))
+    monkeypatch.setattr(update_gac_scores, 'update_statements', lambda *args, **kwargs: [])
+    monkeypatch.setattr(update_gac_scores, 'save_cluster_stats', lambda *args: None)
+    monkeypatch.setattr(update_gac_scores, 'save_participant_clusters', lambda *args: None)
+
+    def run():
+        job = update_gac_scores.prepare_poll(FakeCursor(), 'poll')
+        if job == update_gac_scores.CACHE_HIT:
+            return job
+        update_gac_scores.score_poll_jobs([job])
+        update_gac_scores.write_poll_results(FakeCursor(), FakeConnection(), job)
+        return job
+
+    perform_clustering = update_gac_scores.perform_clustering
+    def failing_clustering(matrix):
+        raise RuntimeError("clustering failed")
+    monkeypatch.setattr(update_gac_scores, 'perform_clustering', failing_clustering)
+    assert run()['gacScores'] == {}
+    assert cache == {}
+
+    # The failure was not cached, so the next run rescores the poll
+    monkeypatch.setattr(update_gac_scores, 'perform_clustering', perform_clustering)
+    assert set(run()['gacScores']) == {'s0', 's1', 's2'}
+    assert cache == {'poll': 'fp'}
+    # A cache hit advances the poll's watermark so it isn't fetched again next tick
+    advanced = []
+    monkeypatch.setattr(update_gac_scores, 'advance_calculated_at', lambda cursor, poll_id, at: advanced.append(poll_id))
+    assert run() == update_gac_scores.CACHE_HIT
+    assert advanced == ['poll']
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+class ScheduledConnection(FakeConnection):
+    def cursor(self):
+        return self
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.mark.parametrize("write_seconds,written", [
+    (6, ['a', 'b']),
+    # A poll that alone overruns the budget is still written, so the queue moves on
+    (20, ['a']),
+])
+def test_scheduled_run_stops_between_writes_at_deadline(monkeypatch, write_seconds, written):
+    polls = [{'uid': uid, 'staleSince': i} for i, uid in enumerate('abc')]
+    clock = FakeClock()
+    writes, cursor_saves = [], []
+
+    def write_poll_results(cursor, conn, job, dry_run=False):
+        clock.now += write_seconds
+        writes.append(job['pollId'])
+        return False
+
+    monkeypatch.setattr(update_gac_scores, 'time', clock)
+    monkeypatch.setattr(update_gac_scores, 'create_connection', ScheduledConnection)
+    monkeypatch.setattr(update_gac_scores, 'fetch_polls_with_changes', lambda cursor: polls)
+    monkeypatch.setattr(update_gac_scores, 'get_run_cursor', lambda cursor: (None, None, None))
+    monkeypatch.setattr(update_gac_scores, 'save_run_cursor',
+                        lambda cursor, stale_since, poll_id, seconds: cursor_saves.append(poll_id))
+    monkeypatch.setattr(update_gac_scores, 'prepare_poll', lambda cursor, poll_id, use_cache: {'pollId': poll_id})
+    monkeypatch.setattr(update_gac_scores, 'score_poll_jobs', lambda jobs: None)
+    monkeypatch.setattr(update_gac_scores, 'write_poll_results', write_poll_results)
+
+    result = update_gac_scores.main(time_budget=10)
+
+    assert writes == written
+    # The cursor follows every write, and never covers polls left for the next run
+    assert cursor_saves[:len(written)] == written
+    assert set(cursor_saves) == set(written)
+    assert result['remaining'] == 3 - len(written)
+    assert result['deadlineReached']
+
+def test_max_duration_matches_vercel_config():
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'vercel.json')
+    with open(config_path) as f:
+        config = json.load(f)
+    build = next(b for b in config['builds'] if b['src'] == 'api/update_gac_scores.py')
+    assert build['config']['maxDuration'] == update_gac_scores.MAX_DURATION_SECONDS
+    assert update_gac_scores.TIME_BUDGET_SECONDS < update_gac_scores.MAX_DURATION_SECONDS
+
+class FingerprintCursor(FakeCursor):
+    def fetchone(self):
+        return (3, 42, 18, None, 7)
+
+@pytest.mark.parametrize("setting,value", [
+    ('GAC_SCORE_EPSILON', 0.01),
+    ('CONSTITUTIONABLE_CONFIDENCE', 0.9),
+    ('BOOTSTRAP_REPLICATES', 50),
+    ('BOOTSTRAP_SEED', 1),
+    ('SIMILARITY_KERNEL', 'bitset'),
+    ('ANN_MIN_PARTICIPANTS', 100),
+    ('MINIBATCH_MIN_PARTICIPANTS', 100),
+    ('MINIBATCH_SIZE', 64),
+    ('CLUSTER_PARALLEL_MIN_PARTICIPANTS', 0),
+    ('BATCH_MAX_PARTICIPANTS', 10),
+])
+def test_fingerprint_changes_with_scoring_settings(monkeypatch, setting, value):
+    before = update_gac_scores.compute_poll_fingerprint(FingerprintCursor(), 'poll')
+    monkeypatch.setattr(update_gac_scores, setting, value)
+    after = update_gac_scores.compute_poll_fingerprint(FingerprintCursor(), 'poll')
+    assert before[0] != after[0]
+    assert before[1:] == after[1:]
@@ -0,0 +1,19 @@
+import pytest
+
+from api.update_vote_counts import (
+    ALL_STATEMENTS,
+    CHANGED_STATEMENTS,
+    MODEL_STATEMENTS,
+    POLL_STATEMENTS,
+    get_reconciliation_targets
+)
+
+def test_reconciliation_targets():
+    assert get_reconciliation_targets() == (ALL_STATEMENTS, ())
+    assert get_reconciliation_targets(since='t') == (CHANGED_STATEMENTS, ('t',))
+    assert get_reconciliation_targets(poll_id='poll') == (POLL_STATEMENTS, ('poll',))
+    assert get_reconciliation_targets(community_model_id='model') == (MODEL_STATEMENTS, ('model',))
+
+def test_poll_and_model_scope_cannot_be_combined():
+    with pytest.raises(ValueError):
+        get_reconciliation_targets(poll_id='poll', community_model_id='model')
@@ -0,0 +1,103 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from vote_data import NO_VOTE, VoteData, cache_path_for, encode_votes, load_votes
+from filter_votes import filter_votes, filter_votes_streaming
+
+def vote_frame():
+    return pd.DataFrame({
+        'participant_id': ['p2', 'p1', 'p2', 'p3', 'p1'],
+        'statement_id': ['s1', 's2', 's2', 's1', 's1'],
+        'vote_value': ['AGREE', 'DISAGREE', None, 'PASS', 'AGREE'],
+    })
+
+def test_from_frame_to_frame_round_trip():
+    df = vote_frame()
+    data = VoteData.from_frame(df)
+
+    assert list(data.participant_ids) == ['p1', 'p2', 'p3']
+    assert list(data.statement_ids) == ['s1', 's2']
+    np.testing.assert_array_equal(data.votes, [1, -1, NO_VOTE, 0, 1])
+
+    decoded = data.to_frame()
+    assert list(decoded['participant_id']) == list(df['participant_id'])
+    assert list(decoded['statement_id']) == list(df['statement_id'])
+    assert decoded['vote_value'].astype(object).where(decoded['vote_value'].notna(), None).tolist() == list(df['vote_value'])
+
+def test_subset_drops_unused_ids():
+    data = VoteData.from_frame(vote_frame()).actual()
+
+    assert len(data) == 4
+    assert list(data.participant_ids) == ['p1', 'p2', 'p3']
+    np.testing.assert_array_equal(data.participant_vote_counts(), [2, 1, 1])
+
+    only_p3 = data.subset(data.participant_ids[data.participant_codes] == 'p3')
+    assert list(only_p3.participant_ids) == ['p3']
+    assert list(only_p3.statement_ids) == ['s1']
+
+def test_to_matrix_in_memory_and_on_disk(tmp_path):
+    data = VoteData.from_frame(vote_frame())
+    expected = np.array([[1.0, -1.0], [1.0, np.nan], [0.0, np.nan]])
+
+    np.testing.assert_array_equal(data.to_matrix(), expected)
+    on_disk = data.to_matrix(path=tmp_path / 'matrix.npy', block_size=2)
+    np.testing.assert_array_equal(np.asarray(on_disk), expected)
+
+def test_unrecognized_vote_values_raise():
+    with pytest.raises(ValueError, match="agree"):
+        encode_votes(pd.Series(['AGREE', 'agree', None]))
+
+def test_cache_is_rebuilt_when_csv_changes(tmp_path):
+    csv_path = tmp_path / 'votes.csv'
+    vote_frame().to_csv(csv_path, index=False)
+
+    first = load_votes(csv_path)
+    assert cache_path_for(csv_path).exists()
+    np.testing.assert_array_equal(load_votes(csv_path).votes, first.votes)
+
+    changed = vote_frame()
+    changed.loc[[0, 1], 'vote_value'] = ['DISAGREE', 'AGREE']
+    changed.to_csv(csv_path, index=False)
+    # Same size as before, so only the modification time tells the files apart
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert load_votes(csv_path).votes[0] == -1
+
+def test_filter_votes_does_not_cache_by_default(tmp_path):
+    csv_path = tmp_path / 'votes.csv'
+    vote_frame().to_csv(csv_path, index=False)
+
+    filter_votes(str(csv_path), 1)
+    assert not cache_path_for(csv_path).exists()
+
+    filter_votes(str(csv_path), 1, use_cache=True)
+    assert cache_path_for(csv_path).exists()
+
+def test_streaming_filter_writes_the_same_file(tmp_path):
+    csv_path = tmp_path / 'votes.csv'
+    csv_path.write_text(
+        "participant_id,statement_id,vote_value,created_at\n"
+        "p1,s1,AGREE,2024-01-01\n"
+        "p1,s2,NULL,2024-01-01\n"
+        "p2,s1,,2024-01-01\n"
+        "p2,s2,DISAGREE,2024-01-01\n"
+        "p3,s1,NA,2024-01-01\n"
+        "p1,s3,PASS,2024-01-01\n"
+        "p3,s2,,2024-01-01\n"
+    )
+    output_path = tmp_path / 'votes_min1actual_votes.csv'
+
+    filter_votes(str(csv_path), 1)
+    in_memory = output_path.read_bytes()
+    output_path.unlink()
+    counts = filter_votes_streaming(str(csv_path), 1, chunksize=2)
+
+    assert output_path.read_bytes() == in_memory
+    assert counts.to_dict() == {'p1': 2, 'p2': 1}
@@ -0,0 +1,105 @@
+import os
+import json
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from api import deliver_webhooks
+from api.webhook_utils import (
+    WebhookDispatcher,
+    backoff_delay,
+    create_signature
+)
+
+SECRET = 'test-secret'
+
+async def run_with_server(handler, coroutine_factory):
+    """Serve handler on a local port and run coroutine_factory(url) against it."""
+    app = web.Application()
+    app.router.add_post('/webhook', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return await coroutine_factory(f'http://127.0.0.1:{port}/webhook')
+    finally:
+        await runner.cleanup()
+
+def dispatcher_options(url, **options):
+    return {'webhook_url': url, 'webhook_secret': SECRET, 'backoff_base': 0.001, **options}
+
+def test_dispatch_bounded_concurrency_and_signatures():
+    in_flight = 0
+    max_in_flight = 0
+    received = []
+
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        body = await request.text()
+        assert request.headers['X-Webhook-Signature'] == create_signature(json.loads(body), SECRET)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        received.append(json.loads(body)['pollId'])
+        return web.json_response({'success': True})
+
+    async def run(url):
+        async with WebhookDispatcher(**dispatcher_options(url, max_concurrency=3)) as dispatcher:
+            results = await dispatcher.dispatch(triggers)
+        return results, dispatcher.summary()
+
+    triggers = [('model1', f'poll{i}') for i in range(8)]
+    results, summary = asyncio.run(run_with_server(handler, run))
+
+    assert results == [True] * 8
+    assert summary['attempts'] == 8
+    assert summary['failedAttempts'] == 0
+    assert sorted(received) == sorted(poll_id for _, poll_id in triggers)
+    assert 1 < max_in_flight <= 3
+
+def test_dispatch_retries_server_errors_but_not_client_errors():
+    calls = {}
+
+    async def handler(request):
+        poll_id = (await request.json())['pollId']
+        calls[poll_id] = calls.get(poll_id, 0) + 1
+        if poll_id == 'flaky' and calls[poll_id] < 3:
+            return web.json_response({'error': 'unavailable'}, status=503)
+        if poll_id == 'rejected':
+            return web.json_response({'error': 'bad request'}, status=400)
+        return web.json_response({'success': True})
+
+    async def run(url):
+        async with WebhookDispatcher(**dispatcher_options(url, max_attempts=3)) as dispatcher:
+            results = await dispatcher.dispatch([('m', 'flaky'), ('m', 'rejected')])
+        return results, dispatcher.attempts
+
+    results, attempts = asyncio.run(run_with_server(handler, run))
+
+    assert results == [True, False]
+    assert calls == {'flaky': 3, 'rejected': 1}
+    assert [a['status'] for a in attempts if a['pollId'] == 'flaky'] == [503, 503, 200]
+    assert all(a['latencyMs'] >= 0 for a in attempts)
+
+def test_dispatcher_requires_configuration():
+    async def run():
+        async with WebhookDispatcher(webhook_url='', webhook_secret='') as dispatcher:
+            return await dispatcher.send('m', 'p'), dispatcher.attempts
+
+    assert asyncio.run(run()) == (False, [])
+
+@pytest.mark.parametrize('attempt', [0, 1, 5, 20])
+def test_backoff_delay_is_capped(attempt):
+    delays = [backoff_delay(attempt, base=0.5, cap=4.0) for _ in range(50)]
+    assert all(0 <= delay <= min(4.0, 0.5 * 2 ** attempt) for delay in delays)
+
+def test_delivery_time_budget_fits_vercel_max_duration():
+    with open(os.path.join(os.path.dirname(__file__), '..', 'vercel.json')) as f:
+        config = json.load(f)
+    build = next(b for b in config['builds'] if b['src'] == 'api/deliver_webhooks.py')
+    assert build['config']['maxDuration'] == deliver_webhooks.MAX_DURATION_SECONDS
+    assert deliver_webhooks.TIME_BUDGET_SECONDS < deliver_webhooks.MAX_DURATION_SECONDS
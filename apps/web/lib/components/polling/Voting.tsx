@@ -117,12 +117,21 @@ export default function Voting({
       return null;
     }
 
-    // Sort unvoted statements by vote count and date
+    // Sort unvoted statements by priority, vote count and date
     const sortedUnvoted = unvotedStatements.sort((a, b) => {
+      // Statements not yet scored by the GAC run get the highest priority
+      const priorityA = a.priorityScore ?? 1;
+      const priorityB = b.priorityScore ?? 1;
+
+      // First sort by priority (descending)
+      if (priorityA !== priorityB) {
+        return priorityB - priorityA;
+      }
+
       const totalVotesA = a.agreeCount + a.disagreeCount + a.passCount;
       const totalVotesB = b.agreeCount + b.disagreeCount + b.passCount;
 
-      // First sort by total votes (ascending)
+      // Then by total votes (ascending)
       if (totalVotesA !== totalVotesB) {
         return totalVotesA - totalVotesB;
       }
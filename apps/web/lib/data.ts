@@ -220,3 +220,31 @@ export async function getCommunityModel(modelId: string): Promise<{
     allowContributions: firstPoll?.allowParticipantStatements || false,
   };
 }
+
+// Per opinion group aggregates of each statement from the latest GAC run,
+// keyed by statement ID
+export async function getStatementClusterStats(pollId: string) {
+  const stats = await prisma.statementClusterStat.findMany({
+    where: { pollId },
+    orderBy: [{ statementId: "asc" }, { clusterId: "asc" }],
+  });
+
+  const byStatement: Record<
+    string,
+    {
+      clusterId: number;
+      agreeCount: number;
+      activeCount: number;
+      clusterSize: number;
+    }[]
+  > = {};
+  for (const { statementId, clusterId, agreeCount, activeCount, clusterSize } of stats) {
+    (byStatement[statementId] ??= []).push({
+      clusterId,
+      agreeCount,
+      activeCount,
+      clusterSize,
+    });
+  }
+  return byStatement;
+}
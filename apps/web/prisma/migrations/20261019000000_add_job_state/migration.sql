@@ -0,0 +1,12 @@
+-- CreateTable
+CREATE TABLE "JobState" (
+    "name" TEXT NOT NULL,
+    "watermark" TIMESTAMP(3),
+    "metadata" JSONB,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "JobState_pkey" PRIMARY KEY ("name")
+);
+
+-- CreateIndex
+CREATE INDEX "Vote_updatedAt_idx" ON "Vote"("updatedAt");
@@ -0,0 +1,22 @@
+-- CreateTable
+CREATE TABLE "WebhookOutbox" (
+    "uid" TEXT NOT NULL,
+    "eventType" TEXT NOT NULL,
+    "communityModelId" TEXT NOT NULL,
+    "pollId" TEXT NOT NULL,
+    "status" TEXT NOT NULL DEFAULT 'PENDING',
+    "attempts" INTEGER NOT NULL DEFAULT 0,
+    "nextAttemptAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "lastError" TEXT,
+    "deliveredAt" TIMESTAMP(3),
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "WebhookOutbox_pkey" PRIMARY KEY ("uid")
+);
+
+-- CreateIndex
+CREATE INDEX "WebhookOutbox_status_nextAttemptAt_idx" ON "WebhookOutbox"("status", "nextAttemptAt");
+
+-- CreateIndex
+CREATE INDEX "WebhookOutbox_pollId_idx" ON "WebhookOutbox"("pollId");
@@ -0,0 +1,10 @@
+-- CreateTable
+CREATE TABLE "PollScoreCache" (
+    "pollId" TEXT NOT NULL,
+    "fingerprint" TEXT NOT NULL,
+    "voteCount" INTEGER NOT NULL,
+    "lastVoteAt" TIMESTAMP(3),
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "PollScoreCache_pkey" PRIMARY KEY ("pollId")
+);
@@ -0,0 +1,18 @@
+-- CreateTable
+CREATE TABLE "StatementClusterStat" (
+    "statementId" TEXT NOT NULL,
+    "clusterId" INTEGER NOT NULL,
+    "pollId" TEXT NOT NULL,
+    "agreeCount" INTEGER NOT NULL,
+    "activeCount" INTEGER NOT NULL,
+    "clusterSize" INTEGER NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "StatementClusterStat_pkey" PRIMARY KEY ("statementId","clusterId")
+);
+
+-- CreateIndex
+CREATE INDEX "StatementClusterStat_pollId_idx" ON "StatementClusterStat"("pollId");
+
+-- AddForeignKey
+ALTER TABLE "StatementClusterStat" ADD CONSTRAINT "StatementClusterStat_statementId_fkey" FOREIGN KEY ("statementId") REFERENCES "Statement"("uid") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,19 @@
+-- CreateTable
+CREATE TABLE "ParticipantCluster" (
+    "pollId" TEXT NOT NULL,
+    "participantId" TEXT NOT NULL,
+    "clusterId" INTEGER NOT NULL,
+    "distance" DOUBLE PRECISION NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "ParticipantCluster_pkey" PRIMARY KEY ("pollId","participantId")
+);
+
+-- CreateIndex
+CREATE INDEX "ParticipantCluster_participantId_idx" ON "ParticipantCluster"("participantId");
+
+-- AddForeignKey
+ALTER TABLE "ParticipantCluster" ADD CONSTRAINT "ParticipantCluster_pollId_fkey" FOREIGN KEY ("pollId") REFERENCES "Poll"("uid") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "ParticipantCluster" ADD CONSTRAINT "ParticipantCluster_participantId_fkey" FOREIGN KEY ("participantId") REFERENCES "Participant"("uid") ON DELETE CASCADE ON UPDATE CASCADE;
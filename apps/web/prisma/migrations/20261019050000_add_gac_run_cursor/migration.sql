@@ -0,0 +1,10 @@
+-- CreateTable
+CREATE TABLE "GacRunCursor" (
+    "id" TEXT NOT NULL,
+    "staleSince" TIMESTAMP(3),
+    "pollId" TEXT,
+    "secondsPerPoll" DOUBLE PRECISION,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "GacRunCursor_pkey" PRIMARY KEY ("id")
+);